@@ -1,78 +1,118 @@
 from flask import Flask, send_from_directory
 from flask_cors import CORS
-from flask_mysqldb import MySQL
 from config import Config
+from utils.db import mysql
+from utils import metrics, slow_query_log, admission, readiness, compression, shared_store, party_owners, ballot_journal, rate_limit, jobs
 import os
 
-# Initialize Flask app
-app = Flask(__name__)
-app.config.from_object(Config)
-
-# Initialize CORS
-CORS(app, 
-     origins=Config.CORS_ORIGINS,
-     supports_credentials=True,
-     allow_headers=['Content-Type', 'Authorization'],
-     methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
-
-# Initialize MySQL
-mysql = MySQL(app)
-
-# Create upload directories
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-os.makedirs(app.config['CAMPAIGN_UPLOAD_FOLDER'], exist_ok=True)
-
-# Import and initialize helpers
-from utils import helpers
-helpers.mysql = mysql
-
-# Register Blueprints
-from blueprints.auth import auth_bp
-from blueprints.voter import voter_bp
-from blueprints.party import party_bp
-from blueprints.admin import admin_bp
-
-auth_bp.mysql = mysql
-voter_bp.mysql = mysql
-party_bp.mysql = mysql
-admin_bp.mysql = mysql
-
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
-app.register_blueprint(voter_bp, url_prefix='/api/voter')
-app.register_blueprint(party_bp, url_prefix='/api/party')
-app.register_blueprint(admin_bp, url_prefix='/api/admin')
-
-# Route to serve uploaded files
-@app.route('/uploads/<path:filename>')
-def serve_upload(filename):
-    """Serve uploaded files"""
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
-
-@app.route('/')
-def index():
-    return {
-        'message': 'Online Voting System API',
-        'version': '1.0.0',
-        'status': 'running',
-        'endpoints': {
-            'auth': '/api/auth',
-            'voter': '/api/voter',
-            'party': '/api/party',
-            'admin': '/api/admin',
-            'uploads': '/uploads'
+def create_app(config_object=Config):
+    """Build and configure a Flask app; called once per process (or once in a preloading master)"""
+    # Initialize Flask app
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+    
+    # Initialize CORS
+    CORS(app,
+         origins=app.config['CORS_ORIGINS'],
+         supports_credentials=True,
+         allow_headers=['Content-Type', 'Authorization'],
+         methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
+    
+    # Initialize MySQL (connections are pooled per process and opened on first use)
+    mysql.init_app(app)
+    
+    # Per-route latency and DB instrumentation
+    metrics.init_app(app)
+    slow_query_log.init_app(app)
+    
+    # Adaptive load shedding for write endpoints
+    admission.init_app(app)
+    
+    # Per-IP and per-account limits on login, registration and voting
+    rate_limit.init_app(app)
+    
+    # Negotiated gzip/br/zstd for JSON and CSV bodies
+    compression.init_app(app)
+    
+    # Party list and tallies shared across workers; the publisher starts with each worker
+    shared_store.init_app(app)
+    party_owners.init_app(app)
+    
+    # Optional local write-ahead journal for ballots
+    ballot_journal.init_app(app)
+    
+    # Background job leases; jobs left by a stopped worker are resumed by the heartbeat
+    jobs.init_app(app)
+    
+    # Create upload directories
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    os.makedirs(app.config['CAMPAIGN_UPLOAD_FOLDER'], exist_ok=True)
+    
+    # Register Blueprints
+    from blueprints.auth import auth_bp
+    from blueprints.voter import voter_bp
+    from blueprints.party import party_bp
+    from blueprints.admin import admin_bp
+    from blueprints.station import station_bp
+    
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(voter_bp, url_prefix='/api/voter')
+    app.register_blueprint(party_bp, url_prefix='/api/party')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(station_bp, url_prefix='/api/station')
+    
+    # Register CLI maintenance commands
+    from commands import register_commands
+    register_commands(app)
+    
+    # Route to serve uploaded files
+    @app.route('/uploads/<path:filename>')
+    def serve_upload(filename):
+        """Serve uploaded files"""
+        return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    
+    @app.route('/')
+    def index():
+        return {
+            'message': 'Online Voting System API',
+            'version': '1.0.0',
+            'status': 'running',
+            'endpoints': {
+                'auth': '/api/auth',
+                'voter': '/api/voter',
+                'party': '/api/party',
+                'admin': '/api/admin',
+                'station': '/api/station',
+                'uploads': '/uploads'
+            }
         }
-    }
-
-@app.route('/health')
-def health():
-    return {'status': 'healthy'}, 200
+    
+    @app.route('/health')
+    def health():
+        return {'status': 'healthy'}, 200
+    
+    @app.route('/ready')
+    def ready():
+        """Readiness: DB reachable, pool and queues not saturated, worker warmed up"""
+        result = readiness.check()
+        return result, 200 if result['status'] == 'ready' else 503
+    
+    @app.route('/metrics')
+    def metrics_endpoint():
+        return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+    
+    return app
 
 if __name__ == '__main__':
+    app = create_app()
+    readiness.start_background(app)
+    readiness.warm_up(app)
     print("=" * 70)
-    print("ONLINE VOTING SYSTEM - Backend Server")
+    print("ONLINE VOTING SYSTEM - Backend Server (development)")
     print("=" * 70)
     print("Server running on: http://localhost:5000")
     print("Database: XAMPP MySQL (voting_system)")
     print(f"Upload folder: {app.config['UPLOAD_FOLDER']}")
+    print("For production use: gunicorn -c gunicorn.conf.py wsgi:app")
     print("=" * 70)
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,220 @@
+"""Async (ASGI) implementation of the read-only voter routes.
+
+Serves the same JSON as blueprints/voter.py using aiomysql, so one worker
+can hold thousands of connections while they wait on MySQL. It reads the
+Flask session cookie, so it runs beside the WSGI app behind a proxy that
+sends exactly these routes here and everything else to gunicorn:
+
+    GET /api/voter/parties
+    GET /api/voter/campaigns
+    GET /api/voter/status
+
+Voting (POST /api/voter/vote) and /api/voter/search stay on gunicorn: the
+vote goes through rate limiting, admission control, the ballot journal and
+the shared store, none of which this app has.
+
+    uvicorn asgi_voter:app --host 0.0.0.0 --port 5002 --workers 4
+
+Requires the packages in requirements-asgi.txt.
+"""
+import hashlib
+import json
+from datetime import date, datetime
+import aiomysql
+from flask.json.tag import TaggedJSONSerializer
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
+from starlette.routing import Route
+from werkzeug.http import http_date
+from config import Config
+from utils.pagination import parse_limit, parse_fields, encode_cursor, decode_cursor
+from utils.campaigns import CAMPAIGNS_PAGE_SIZE, CAMPAIGNS_MAX_PAGE_SIZE, CAMPAIGN_FIELDS, campaign_page_query
+
+SESSION_COOKIE_NAME = 'session'
+
+# Identical to Flask's SecureCookieSessionInterface so both stacks share sessions
+session_serializer = URLSafeTimedSerializer(
+    Config.SECRET_KEY,
+    salt='cookie-session',
+    serializer=TaggedJSONSerializer(),
+    signer_kwargs={'key_derivation': 'hmac', 'digest_method': hashlib.sha1}
+)
+
+pool = None
+
+def _json_default(value):
+    # Match Flask's JSON provider, which renders datetimes as HTTP dates
+    if isinstance(value, (datetime, date)):
+        return http_date(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+def jsonify(data, status=200):
+    return Response(
+        json.dumps(data, default=_json_default, separators=(',', ':')),
+        status_code=status,
+        media_type='application/json'
+    )
+
+def load_session(request):
+    cookie = request.cookies.get(SESSION_COOKIE_NAME)
+    if not cookie:
+        return {}
+    try:
+        max_age = int(Config.PERMANENT_SESSION_LIFETIME.total_seconds())
+        return session_serializer.loads(cookie, max_age=max_age)
+    except BadSignature:
+        return {}
+
+def require_role(session, role=None):
+    """Return an error response if the session is not allowed, mirroring helpers.role_required"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Authentication required'}, 401)
+    if role and session.get('role') != role:
+        return jsonify({'error': 'Unauthorized access'}, 403)
+    return None
+
+def upload_url(path):
+    return f"http://localhost:5000/uploads/{path}"
+
+async def get_active_election_id(cur):
+    await cur.execute("SELECT id FROM elections WHERE status = 'open' ORDER BY id DESC LIMIT 1")
+    election = await cur.fetchone()
+    return election['id'] if election else None
+
+async def get_parties(request):
+    denied = require_role(load_session(request))
+    if denied:
+        return denied
+    
+    try:
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                election_id = await get_active_election_id(cur)
+                await cur.execute("""
+                    SELECT p.id, p.name, p.description, p.logo_url, 
+                           COUNT(v.id) as vote_count
+                    FROM parties p
+                    LEFT JOIN votes v ON p.id = v.party_id AND v.election_id = %s
+                    WHERE p.deleted_at IS NULL
+                    GROUP BY p.id
+                    ORDER BY p.name
+                """, (election_id,))
+                parties = await cur.fetchall()
+        
+        for party in parties:
+            if party['logo_url'] and not party['logo_url'].startswith('http') and '/' in party['logo_url']:
+                party['logo_url'] = upload_url(party['logo_url'])
+        
+        return jsonify({'parties': parties})
+    except Exception as e:
+        return jsonify({'error': str(e)}, 500)
+
+async def get_campaigns(request):
+    denied = require_role(load_session(request))
+    if denied:
+        return denied
+    
+    party_id = request.query_params.get('party_id')
+    cursor = request.query_params.get('cursor')
+    
+    try:
+        party_id = int(party_id) if party_id else None
+        fields = parse_fields(request.query_params.get('fields'), CAMPAIGN_FIELDS, CAMPAIGN_FIELDS)
+        limit = parse_limit(request.query_params.get('limit'), CAMPAIGNS_PAGE_SIZE, CAMPAIGNS_MAX_PAGE_SIZE)
+        after = decode_cursor(cursor, 2) if cursor else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}, 400)
+    
+    try:
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                await cur.execute(*campaign_page_query(fields, limit, party_id=party_id, after=after))
+                campaigns = await cur.fetchall()
+        
+        next_cursor = None
+        if len(campaigns) > limit:
+            campaigns = campaigns[:limit]
+            next_cursor = encode_cursor(campaigns[-1]['created_at'], campaigns[-1]['id'])
+        
+        for campaign in campaigns:
+            if campaign.get('image_url') and not campaign['image_url'].startswith('http'):
+                campaign['image_url'] = upload_url(campaign['image_url'])
+        
+        return jsonify({'campaigns': campaigns, 'next_cursor': next_cursor, 'limit': limit})
+    except Exception as e:
+        return jsonify({'error': str(e)}, 500)
+
+async def get_status(request):
+    session = load_session(request)
+    denied = require_role(session, 'voter')
+    if denied:
+        return denied
+    
+    user_id = session['user_id']
+    
+    try:
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                election_id = await get_active_election_id(cur)
+                await cur.execute("SELECT voted_election_id FROM users WHERE id = %s", (user_id,))
+                user = await cur.fetchone()
+                
+                has_voted = election_id is not None and user['voted_election_id'] == election_id
+                # A journaled (202) vote is only in the session until the replayer applies it
+                pending = not has_voted and election_id is not None and session.get('voted_election_id') == election_id
+                
+                voted_party = None
+                if has_voted:
+                    await cur.execute("""
+                        SELECT p.id, p.name, v.voted_at
+                        FROM votes v
+                        JOIN parties p ON v.party_id = p.id
+                        WHERE v.election_id = %s AND v.voter_id = %s
+                    """, (election_id, user_id))
+                    voted_party = await cur.fetchone()
+        
+        return jsonify({'hasVoted': has_voted or pending, 'pending': pending, 'votedParty': voted_party})
+    except Exception as e:
+        return jsonify({'error': str(e)}, 500)
+
+async def startup():
+    global pool
+    pool = await aiomysql.create_pool(
+        host=Config.MYSQL_HOST,
+        port=Config.MYSQL_PORT,
+        user=Config.MYSQL_USER,
+        password=Config.MYSQL_PASSWORD,
+        db=Config.MYSQL_DB,
+        minsize=1,
+        maxsize=Config.ASGI_MYSQL_POOL_SIZE,
+        # Handlers only read; outside autocommit every SELECT leaves a transaction open and
+        # aiomysql closes such connections on release instead of reusing them
+        autocommit=True,
+        charset='utf8mb4'
+    )
+
+async def shutdown():
+    pool.close()
+    await pool.wait_closed()
+
+app = Starlette(
+    routes=[
+        Route('/api/voter/parties', get_parties, methods=['GET']),
+        Route('/api/voter/campaigns', get_campaigns, methods=['GET']),
+        Route('/api/voter/status', get_status, methods=['GET'])
+    ],
+    middleware=[
+        Middleware(
+            CORSMiddleware,
+            allow_origins=Config.CORS_ORIGINS,
+            allow_credentials=True,
+            allow_headers=['Content-Type', 'Authorization'],
+            allow_methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS']
+        )
+    ],
+    on_startup=[startup],
+    on_shutdown=[shutdown]
+)
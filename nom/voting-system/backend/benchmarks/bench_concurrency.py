@@ -0,0 +1,122 @@
+"""Measure how many concurrent connections a server keeps answering.
+
+Opens N simultaneous keep-alive connections and has each issue requests
+back to back for a fixed time, then reports completed requests, errors
+and latency percentiles. Start both stacks first, for example:
+
+    gunicorn -c gunicorn.conf.py wsgi:app                  # sync, port 5000
+    uvicorn asgi_voter:app --port 5002 --workers 4         # async
+
+    python benchmarks/bench_concurrency.py --cookie 'session=...' \\
+        --target sync=http://127.0.0.1:5000 --target async=http://127.0.0.1:5002 \\
+        --connections 10000 --duration 30
+
+Use a voter session cookie from /api/auth/login. The client needs a file
+descriptor limit above the connection count (ulimit -n).
+"""
+import argparse
+import asyncio
+import resource
+import time
+from urllib.parse import urlsplit
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Connection closed')
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value.strip())
+    if length:
+        await reader.readexactly(length)
+    return status
+
+async def connection_worker(host, port, request, stop_at, latencies, counters):
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        counters['connect_errors'] += 1
+        return
+    counters['connected'] += 1
+    try:
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status = await asyncio.wait_for(_read_response(reader), timeout=30)
+            if status < 500:
+                latencies.append(time.perf_counter() - start)
+            else:
+                counters['errors'] += 1
+    except (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError):
+        counters['errors'] += 1
+    finally:
+        writer.close()
+
+async def run_target(url, path, cookie, connections, duration, ramp_seconds):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    headers = [f'GET {path} HTTP/1.1', f'Host: {host}:{port}', 'Connection: keep-alive']
+    if cookie:
+        headers.append(f'Cookie: {cookie}')
+    request = ('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1')
+    
+    latencies = []
+    counters = {'connected': 0, 'connect_errors': 0, 'errors': 0}
+    stop_at = time.perf_counter() + ramp_seconds + duration
+    
+    tasks = []
+    for i in range(connections):
+        tasks.append(asyncio.create_task(connection_worker(host, port, request, stop_at, latencies, counters)))
+        # Spread connection setup over the ramp so the listen backlog isn't the bottleneck
+        if ramp_seconds and i % 100 == 99:
+            await asyncio.sleep(ramp_seconds * 100 / connections)
+    await asyncio.gather(*tasks)
+    
+    latencies.sort()
+    return {
+        'connected': counters['connected'],
+        'connect_errors': counters['connect_errors'],
+        'errors': counters['errors'],
+        'requests': len(latencies),
+        'rps': len(latencies) / duration,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', action='append', required=True, help='name=http://host:port')
+    parser.add_argument('--path', default='/api/voter/parties')
+    parser.add_argument('--cookie', default=None)
+    parser.add_argument('--connections', type=int, default=10000)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--ramp', type=float, default=5, help='Seconds over which connections are opened')
+    args = parser.parse_args()
+    
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = min(hard, args.connections + 1024)
+    if soft < wanted:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+    
+    for target in args.target:
+        name, _, url = target.partition('=')
+        result = asyncio.run(run_target(url, args.path, args.cookie, args.connections, args.duration, args.ramp))
+        print(f"{name:8s} connected {result['connected']:6d}/{args.connections} "
+              f"(connect errors {result['connect_errors']}, request errors {result['errors']}) "
+              f"{result['rps']:9.1f} req/s  p50 {result['p50_ms']:8.1f} ms  p99 {result['p99_ms']:8.1f} ms")
+
+if __name__ == '__main__':
+    main()
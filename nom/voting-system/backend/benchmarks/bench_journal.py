@@ -0,0 +1,99 @@
+"""Measure ballot journal acks per second at different fsync batching intervals.
+
+Each run starts --threads writers that append ballot-sized records to a
+fresh journal in --dir for --seconds, and reports acks/s, ack latency
+percentiles and how many ballots each fsync covered. Interval 0 flushes as
+soon as a writer arrives (leader-based group commit); larger intervals trade
+ack latency for fewer fsyncs. Use a --dir on the disk the journal will live
+on, since fsync cost is the whole story:
+
+    python benchmarks/bench_journal.py --dir /var/lib/votex/bench --intervals 0,1,2,5,10
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ballot_journal import Journal, Replayer
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def run(directory, interval_ms, threads, seconds, segment_bytes):
+    journal = Journal(directory, segment_bytes, interval_ms / 1000)
+    latencies = [[] for _ in range(threads)]
+    stop = threading.Event()
+    
+    def writer(index):
+        voter_id = index * 10_000_000
+        record = latencies[index]
+        while not stop.is_set():
+            voter_id += 1
+            payload = json.dumps([1, voter_id, voter_id % 12 + 1, round(time.time(), 3)], separators=(',', ':'))
+            start = time.perf_counter()
+            journal.append(payload.encode('utf-8'))
+            record.append(time.perf_counter() - start)
+    
+    workers = [threading.Thread(target=writer, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    journal.close()
+    
+    # Every acked ballot must be readable back
+    replayed = []
+    Replayer(directory, batch_size=10000).replay(replayed.extend)
+    
+    all_latencies = sorted(latency for thread in latencies for latency in thread)
+    acks = len(all_latencies)
+    assert len(replayed) == acks, f'{acks} acked but {len(replayed)} replayed'
+    return {
+        'interval_ms': interval_ms,
+        'acks': acks,
+        'acks_per_second': acks / elapsed,
+        'p50_ms': percentile(all_latencies, 0.50) * 1000,
+        'p99_ms': percentile(all_latencies, 0.99) * 1000,
+        'ballots_per_fsync': acks / max(journal.fsyncs, 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dir', default=None, help='Directory on the disk to test (default: a temporary directory)')
+    parser.add_argument('--intervals', default='0,1,2,5,10', help='Comma-separated fsync intervals in milliseconds')
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent writers (request threads)')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--segment-bytes', type=int, default=16 * 1024 * 1024)
+    args = parser.parse_args()
+    
+    root = args.dir or tempfile.mkdtemp(prefix='votex-journal-bench-')
+    os.makedirs(root, exist_ok=True)
+    
+    print(f'{args.threads} writers, {args.seconds:g}s per interval, journal in {root}')
+    print(f"{'interval':>9} {'acks/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'ballots/fsync':>14}")
+    try:
+        for interval in [float(value) for value in args.intervals.split(',')]:
+            directory = os.path.join(root, f'interval-{interval:g}')
+            shutil.rmtree(directory, ignore_errors=True)
+            result = run(directory, interval, args.threads, args.seconds, args.segment_bytes)
+            print(f"{result['interval_ms']:>7g}ms {result['acks_per_second']:>10,.0f} {result['p50_ms']:>8.2f} "
+                  f"{result['p99_ms']:>8.2f} {result['ballots_per_fsync']:>14.1f}")
+            shutil.rmtree(directory, ignore_errors=True)
+    finally:
+        if args.dir is None:
+            shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Measure the per-request cost of the metrics middleware.
+
+Times the before/after request hooks directly inside a request context,
+then runs a trivial route through the test client with and without
+metrics.init_app. Needs only Flask, not a database:
+
+    python benchmarks/bench_metrics.py --requests 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from utils import metrics
+
+def build_app(instrumented):
+    app = Flask(__name__)
+    if instrumented:
+        metrics.init_app(app)
+    
+    @app.route('/ping')
+    def ping():
+        # Two fake statements so the DB counters are exercised too
+        metrics.record_query(0.0001)
+        metrics.record_query(0.0002)
+        return {'ok': True}
+    
+    return app
+
+def time_requests(app, count):
+    client = app.test_client()
+    for _ in range(200):
+        client.get('/ping')
+    start = time.perf_counter()
+    for _ in range(count):
+        client.get('/ping')
+    return (time.perf_counter() - start) / count
+
+def time_hooks(app, count):
+    response = app.response_class('ok')
+    with app.test_request_context('/ping'):
+        start = time.perf_counter()
+        for _ in range(count):
+            metrics.start_request()
+            metrics.record_query(0.0001)
+            metrics.finish_request(response)
+        return (time.perf_counter() - start) / count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    
+    plain = build_app(False)
+    instrumented = build_app(True)
+    
+    hooks = min(time_hooks(instrumented, args.requests) for _ in range(args.rounds))
+    
+    # Interleave rounds and keep the best of each to damp machine noise
+    plain_times = []
+    instrumented_times = []
+    for _ in range(args.rounds):
+        plain_times.append(time_requests(plain, args.requests))
+        instrumented_times.append(time_requests(instrumented, args.requests))
+    best_plain = min(plain_times)
+    best_instrumented = min(instrumented_times)
+    
+    start = time.perf_counter()
+    metrics.render()
+    render_ms = (time.perf_counter() - start) * 1000
+    
+    print(f"middleware hooks:{hooks * 1e6:8.1f} us/request")
+    print(f"without metrics: {best_plain * 1e6:8.1f} us/request")
+    print(f"with metrics:    {best_instrumented * 1e6:8.1f} us/request")
+    print(f"overhead:        {(best_instrumented - best_plain) * 1e6:8.1f} us/request")
+    print(f"render /metrics: {render_ms:8.2f} ms")
+
+if __name__ == '__main__':
+    main()
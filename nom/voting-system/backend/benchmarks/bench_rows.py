@@ -0,0 +1,89 @@
+"""Compare DictCursor-style dict rows with tuple RowSets for list endpoints.
+
+Builds synthetic user rows shaped like /api/admin/users, then measures the
+memory each representation holds per 100k rows (tracemalloc) and the time
+to serialize them: jsonify over dicts against json_response over a RowSet.
+Needs the app's requirements, not a database:
+
+    python benchmarks/bench_rows.py --rows 100000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+from utils.rows import RowSet, json_response
+
+COLUMNS = ['id', 'name', 'email', 'role', 'has_voted', 'created_at']
+
+class SlotsRow:
+    __slots__ = COLUMNS
+    
+    def __init__(self, *values):
+        for column, value in zip(COLUMNS, values):
+            setattr(self, column, value)
+
+def make_tuples(count):
+    start = datetime(2024, 1, 1)
+    return [
+        (i, f'Voter {i}', f'voter{i}@example.com', 'voter', i % 2, start + timedelta(seconds=i))
+        for i in range(1, count + 1)
+    ]
+
+def measure_memory(build):
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del value
+    return current
+
+def best_time(function, rounds):
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    
+    per_100k = 100000 / args.rows
+    memory = {
+        'dict rows': measure_memory(lambda: [dict(zip(COLUMNS, row)) for row in make_tuples(args.rows)]),
+        '__slots__ rows': measure_memory(lambda: [SlotsRow(*row) for row in make_tuples(args.rows)]),
+        'tuple RowSet': measure_memory(lambda: RowSet(COLUMNS, make_tuples(args.rows)))
+    }
+    
+    tuples = make_tuples(args.rows)
+    dicts = [dict(zip(COLUMNS, row)) for row in tuples]
+    rowset = RowSet(COLUMNS, tuples)
+    
+    app = Flask(__name__)
+    with app.app_context():
+        dict_body = jsonify({'users': dicts}).get_data()
+        rowset_body = json_response(users=rowset).get_data()
+        assert json.loads(dict_body) == json.loads(rowset_body), 'encoders disagree'
+        
+        dict_time = best_time(lambda: jsonify({'users': dicts}), args.rounds)
+        rowset_time = best_time(lambda: json_response(users=rowset), args.rounds)
+    
+    for name, used in memory.items():
+        print(f"{name:15s} {used * per_100k / 1024 / 1024:8.1f} MiB per 100k rows")
+    print(f"jsonify dicts:       {dict_time * 1000:8.1f} ms for {args.rows} rows")
+    print(f"json_response tuples:{rowset_time * 1000:8.1f} ms for {args.rows} rows")
+
+if __name__ == '__main__':
+    main()
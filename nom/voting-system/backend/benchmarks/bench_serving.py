@@ -0,0 +1,108 @@
+"""Compare cold start and throughput of the dev server and the production setup.
+
+Starts each server in turn, measures the time until it first answers
+/health, then drives it with keep-alive client threads:
+
+    python benchmarks/bench_serving.py --duration 10 --clients 32
+    python benchmarks/bench_serving.py --path /api/voter/parties --cookie 'session=...'
+
+'dev' is `python app.py` (Werkzeug with the reloader and debugger),
+'prod' is `gunicorn -c gunicorn.conf.py wsgi:app`. The app needs its
+MySQL database for anything beyond /health.
+"""
+import argparse
+import http.client
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    'dev': ([sys.executable, 'app.py'], 5000),
+    'prod': (['gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'], 5001)
+}
+
+def wait_until_up(port, timeout):
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return time.perf_counter() - start
+        except OSError:
+            time.sleep(0.02)
+    raise RuntimeError(f'Server on port {port} did not start within {timeout}s')
+
+def measure_import_time(runs):
+    """Time `from app import create_app; create_app()` in fresh interpreters"""
+    code = ('import time; t = time.perf_counter(); from app import create_app; '
+            'create_app(); print(time.perf_counter() - t)')
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR,
+                             capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return min(samples)
+
+def drive(port, path, cookie, clients, duration):
+    counts = [0] * clients
+    errors = [0] * clients
+    stop = time.perf_counter() + duration
+    headers = {'Cookie': cookie} if cookie else {}
+    
+    def client(index):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        while time.perf_counter() < stop:
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status < 500:
+                    counts[index] += 1
+                else:
+                    errors[index] += 1
+            except (OSError, http.client.HTTPException):
+                errors[index] += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / duration, sum(errors)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--servers', default='dev,prod')
+    parser.add_argument('--path', default='/health')
+    parser.add_argument('--cookie', default=None)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--import-runs', type=int, default=5)
+    args = parser.parse_args()
+    
+    print(f"create_app() in a fresh interpreter: {measure_import_time(args.import_runs) * 1000:.1f} ms")
+    
+    for name in args.servers.split(','):
+        command, port = SERVERS[name]
+        env = dict(os.environ, GUNICORN_BIND=f'127.0.0.1:{port}')
+        process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, start_new_session=True,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            startup = wait_until_up(port, timeout=60)
+            rps, errors = drive(port, args.path, args.cookie, args.clients, args.duration)
+            print(f"{name:5s} ready in {startup * 1000:7.1f} ms, {rps:9.1f} req/s, {errors} errors")
+        finally:
+            # The dev reloader runs the app in a child process; stop the whole group
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait(timeout=30)
+
+if __name__ == '__main__':
+    main()
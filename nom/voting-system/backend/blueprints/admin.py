@@ -1,28 +1,44 @@
-from flask import Blueprint, jsonify, request, session, make_response
-from flask_mysqldb import MySQL
+from flask import Blueprint, jsonify, request, session, make_response, current_app
+from utils.db import mysql
 from utils.helpers import login_required, role_required, log_action
-import csv
-from io import StringIO
+from utils.elections import get_active_election_id, open_new_election, purge_election_votes
+from utils.jobs import start_job, get_job
+from utils.cascade import delete_party_cascade, delete_user_cascade
+from utils.archive import archive_election, get_archived_results
+from utils.upload_gc import gc_uploads_job
+from utils.pagination import parse_limit, encode_cursor, decode_cursor, escape_like
+from utils import slow_query_log, shared_store, party_owners
+from utils.admission import admission_controlled
+from utils.rows import tuple_cursor, RowSet, json_response, stream_csv
 
 admin_bp = Blueprint('admin', __name__)
-mysql = MySQL()
 
 @admin_bp.route('/stats', methods=['GET'])
 @role_required('admin')
 def get_stats():
+    snapshot = shared_store.read()
+    if snapshot is not None:
+        return jsonify(snapshot['stats']), 200
+    
     try:
         cur = mysql.connection.cursor()
         
-        cur.execute("SELECT COUNT(*) as count FROM users WHERE role = 'voter'")
+        cur.execute("SELECT COUNT(*) as count FROM users WHERE role = 'voter' AND deleted_at IS NULL")
         total_voters = cur.fetchone()['count']
         
-        cur.execute("SELECT COUNT(*) as count FROM parties")
+        cur.execute("SELECT COUNT(*) as count FROM parties WHERE deleted_at IS NULL")
         total_parties = cur.fetchone()['count']
         
-        cur.execute("SELECT COUNT(*) as count FROM votes")
+        election_id = get_active_election_id(cur)
+        cur.execute("""
+            SELECT COUNT(*) as count
+            FROM votes v
+            JOIN parties p ON v.party_id = p.id
+            WHERE v.election_id = %s AND p.deleted_at IS NULL
+        """, (election_id,))
         total_votes = cur.fetchone()['count']
         
-        cur.execute("SELECT COUNT(*) as count FROM users")
+        cur.execute("SELECT COUNT(*) as count FROM users WHERE deleted_at IS NULL")
         total_users = cur.fetchone()['count']
         
         cur.close()
@@ -37,20 +53,92 @@ def get_stats():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+USERS_PAGE_SIZE = 50
+USERS_MAX_PAGE_SIZE = 200
+
 @admin_bp.route('/users', methods=['GET'])
 @role_required('admin')
 def get_users():
+    """List users a page at a time.
+    
+    Without a search the newest users come first (ordered by id). A search
+    matches a prefix of the name, or of the email when the query contains
+    '@' or search_by=email, and walks that column's index in order.
+    """
+    role = request.args.get('role')
+    has_voted = request.args.get('has_voted')
+    query = (request.args.get('q') or '').strip()
+    search_by = request.args.get('search_by') or ('email' if '@' in query else 'name')
+    cursor = request.args.get('cursor')
+    
+    if role and role not in ['voter', 'party', 'admin']:
+        return jsonify({'error': 'Invalid role'}), 400
+    if has_voted and has_voted not in ['true', 'false']:
+        return jsonify({'error': 'has_voted must be true or false'}), 400
+    if search_by not in ['name', 'email']:
+        return jsonify({'error': 'search_by must be name or email'}), 400
+    
+    try:
+        limit = parse_limit(request.args.get('limit'), USERS_PAGE_SIZE, USERS_MAX_PAGE_SIZE)
+        after = decode_cursor(cursor, 2 if query else 1) if cursor else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     try:
         cur = mysql.connection.cursor()
-        cur.execute("""
-            SELECT id, name, email, role, has_voted, created_at
+        election_id = get_active_election_id(cur)
+        
+        conditions = ["deleted_at IS NULL"]
+        params = [election_id]
+        
+        if role:
+            conditions.append("role = %s")
+            params.append(role)
+        
+        if has_voted == 'true':
+            conditions.append("voted_election_id = %s")
+            params.append(election_id)
+        elif has_voted == 'false':
+            conditions.append("(voted_election_id IS NULL OR voted_election_id <> %s)")
+            params.append(election_id)
+        
+        if query:
+            # Prefix match is a range scan on idx_name / idx_email, already in (column, id) order
+            conditions.append(f"{search_by} LIKE %s")
+            params.append(escape_like(query) + '%')
+            if after:
+                conditions.append(f"({search_by} > %s OR ({search_by} = %s AND id > %s))")
+                params.extend([after[0], after[0], after[1]])
+            order_by = f"{search_by}, id"
+        else:
+            if after:
+                conditions.append("id < %s")
+                params.append(after[0])
+            order_by = "id DESC"
+        
+        # Fetch one extra row to learn whether another page exists
+        params.append(limit + 1)
+        cur.close()
+        
+        cur = tuple_cursor()
+        cur.execute(f"""
+            SELECT id, name, email, role,
+                   COALESCE(voted_election_id = %s, FALSE) as has_voted, created_at
             FROM users
-            ORDER BY created_at DESC
-        """)
-        users = cur.fetchall()
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {order_by}
+            LIMIT %s
+        """, tuple(params))
+        users = RowSet.fetch(cur)
         cur.close()
         
-        return jsonify({'users': users}), 200
+        next_cursor = None
+        if len(users) > limit:
+            users.truncate(limit)
+            next_cursor = (encode_cursor(users.value(-1, search_by), users.value(-1, 'id')) if query
+                           else encode_cursor(users.value(-1, 'id')))
+        
+        return json_response(users=users, next_cursor=next_cursor, limit=limit), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -66,23 +154,31 @@ def delete_user(user_id):
     try:
         cur = mysql.connection.cursor()
         
-        cur.execute("SELECT name, email FROM users WHERE id = %s", (user_id,))
+        cur.execute("SELECT name, email FROM users WHERE id = %s AND deleted_at IS NULL", (user_id,))
         user = cur.fetchone()
         
         if not user:
             cur.close()
             return jsonify({'error': 'User not found'}), 404
         
-        cur.execute("DELETE FROM users WHERE id = %s", (user_id,))
+        # Hide the user at once; dependent rows are removed by a chunked background job
+        cur.execute("UPDATE users SET deleted_at = CURRENT_TIMESTAMP WHERE id = %s", (user_id,))
+        cur.execute("UPDATE parties SET deleted_at = CURRENT_TIMESTAMP WHERE created_by = %s AND deleted_at IS NULL",
+                    (user_id,))
         mysql.connection.commit()
         cur.close()
+        shared_store.mark_dirty()
+        party_owners.forget(user_id)
         
-        log_action(f'User deleted: {user["name"]} ({user["email"]})', admin_id)
+        job_id = start_job('delete_user', delete_user_cascade, user_id, created_by=admin_id)
+        
+        log_action(f'User deleted: {user["name"]} ({user["email"]})', admin_id, f'Cleanup job {job_id}')
         
         return jsonify({
             'success': True,
-            'message': 'User deleted successfully'
-        }), 200
+            'message': 'User deleted successfully',
+            'job_id': job_id
+        }), 202
         
     except Exception as e:
         return jsonify({'error': f'Deletion failed: {str(e)}'}), 500
@@ -92,20 +188,25 @@ def delete_user(user_id):
 def get_parties():
     try:
         cur = mysql.connection.cursor()
+        election_id = get_active_election_id(cur)
+        cur.close()
+        
+        cur = tuple_cursor()
         cur.execute("""
             SELECT p.id, p.name, p.description, p.logo_url, p.created_at,
                    u.name as creator_name, u.email as creator_email,
                    COUNT(v.id) as vote_count
             FROM parties p
             JOIN users u ON p.created_by = u.id
-            LEFT JOIN votes v ON p.id = v.party_id
+            LEFT JOIN votes v ON p.id = v.party_id AND v.election_id = %s
+            WHERE p.deleted_at IS NULL
             GROUP BY p.id
             ORDER BY p.created_at DESC
-        """)
-        parties = cur.fetchall()
+        """, (election_id,))
+        parties = RowSet.fetch(cur)
         cur.close()
         
-        return jsonify({'parties': parties}), 200
+        return json_response(parties=parties), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -118,23 +219,29 @@ def delete_party(party_id):
     try:
         cur = mysql.connection.cursor()
         
-        cur.execute("SELECT name FROM parties WHERE id = %s", (party_id,))
+        cur.execute("SELECT name, created_by FROM parties WHERE id = %s AND deleted_at IS NULL", (party_id,))
         party = cur.fetchone()
         
         if not party:
             cur.close()
             return jsonify({'error': 'Party not found'}), 404
         
-        cur.execute("DELETE FROM parties WHERE id = %s", (party_id,))
+        # Hide the party from tallies at once; its rows are removed by a chunked background job
+        cur.execute("UPDATE parties SET deleted_at = CURRENT_TIMESTAMP WHERE id = %s", (party_id,))
         mysql.connection.commit()
         cur.close()
+        shared_store.mark_dirty()
+        party_owners.forget(party['created_by'])
         
-        log_action(f'Party deleted: {party["name"]}', admin_id)
+        job_id = start_job('delete_party', delete_party_cascade, party_id, created_by=admin_id)
+        
+        log_action(f'Party deleted: {party["name"]}', admin_id, f'Cleanup job {job_id}')
         
         return jsonify({
             'success': True,
-            'message': 'Party deleted successfully'
-        }), 200
+            'message': 'Party deleted successfully',
+            'job_id': job_id
+        }), 202
         
     except Exception as e:
         return jsonify({'error': f'Deletion failed: {str(e)}'}), 500
@@ -143,7 +250,7 @@ def delete_party(party_id):
 @role_required('admin')
 def get_logs():
     try:
-        cur = mysql.connection.cursor()
+        cur = tuple_cursor()
         cur.execute("""
             SELECT l.id, l.action, l.details, l.created_at,
                    u.name as user_name, u.email as user_email
@@ -152,200 +259,351 @@ def get_logs():
             ORDER BY l.created_at DESC
             LIMIT 100
         """)
-        logs = cur.fetchall()
+        logs = RowSet.fetch(cur)
         cur.close()
         
-        return jsonify({'logs': logs}), 200
+        return json_response(logs=logs), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/reset', methods=['POST'])
 @role_required('admin')
+@admission_controlled('normal')
 def reset_election():
+    data = request.get_json(silent=True) or {}
+    purge_previous = data.get('purge_previous', False)
+    if not isinstance(purge_previous, bool):
+        return jsonify({'error': 'purge_previous must be true or false'}), 400
     admin_id = session['user_id']
     
     try:
         cur = mysql.connection.cursor()
         
-        cur.execute("DELETE FROM votes")
-        cur.execute("UPDATE users SET has_voted = FALSE")
+        # Opening a new election is a constant-time write; old ballots are left in place
+        previous_id, election_id = open_new_election(cur, data.get('name'))
         
         mysql.connection.commit()
         cur.close()
+        shared_store.mark_dirty()
         
         session['has_voted'] = False
         
-        log_action('Election reset - all votes cleared', admin_id)
+        # Drop the previous election's ballots in the background, in chunks
+        job_id = None
+        if previous_id and purge_previous:
+            job_id = start_job('purge_election', purge_election_votes, previous_id, created_by=admin_id)
+        
+        log_action('Election reset - new election opened', admin_id,
+                   f'Election {election_id} opened, election {previous_id} closed')
         
         return jsonify({
             'success': True,
-            'message': 'Election reset successfully'
+            'message': 'Election reset successfully',
+            'election_id': election_id,
+            'purge_job_id': job_id
         }), 200
         
     except Exception as e:
         return jsonify({'error': f'Reset failed: {str(e)}'}), 500
 
-@admin_bp.route('/export/users', methods=['GET'])
+@admin_bp.route('/elections', methods=['GET'])
 @role_required('admin')
-def export_users():
+def get_elections():
     try:
         cur = mysql.connection.cursor()
         cur.execute("""
-            SELECT id, name, email, role, has_voted, created_at
-            FROM users
-            ORDER BY id
+            SELECT id, name, status, opened_at, closed_at
+            FROM elections
+            ORDER BY id DESC
         """)
-        users = cur.fetchall()
+        elections = cur.fetchall()
+        cur.close()
+        
+        return jsonify({'elections': elections}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/elections/<int:election_id>/purge', methods=['POST'])
+@role_required('admin')
+def purge_election(election_id):
+    try:
+        job_id = start_job('purge_election', purge_election_votes, election_id, created_by=session['user_id'])
+        
+        log_action(f'Election purge started: {election_id}', session['user_id'])
+        
+        return jsonify({'success': True, 'job_id': job_id}), 202
+        
+    except Exception as e:
+        return jsonify({'error': f'Purge failed: {str(e)}'}), 500
+
+@admin_bp.route('/elections/<int:election_id>/archive', methods=['POST'])
+@role_required('admin')
+def archive_election_route(election_id):
+    try:
+        job_id = start_job('archive_election', archive_election, election_id, created_by=session['user_id'])
+        
+        log_action(f'Election archive started: {election_id}', session['user_id'])
+        
+        return jsonify({'success': True, 'job_id': job_id}), 202
+        
+    except Exception as e:
+        return jsonify({'error': f'Archive failed: {str(e)}'}), 500
+
+@admin_bp.route('/elections/<int:election_id>/results', methods=['GET'])
+@role_required('admin')
+def get_election_results(election_id):
+    try:
+        # Archived elections are served straight from their files
+        results = get_archived_results(election_id)
+        if results:
+            return jsonify({'source': 'archive', **results}), 200
+        
+        cur = mysql.connection.cursor()
+        cur.execute("SELECT id, name, status, opened_at, closed_at FROM elections WHERE id = %s", (election_id,))
+        election = cur.fetchone()
+        
+        if not election:
+            cur.close()
+            return jsonify({'error': 'Election not found'}), 404
+        
+        cur.execute("""
+            SELECT v.party_id, p.name as party_name, COUNT(*) as vote_count
+            FROM votes v
+            LEFT JOIN parties p ON v.party_id = p.id
+            WHERE v.election_id = %s
+            GROUP BY v.party_id, p.name
+            ORDER BY v.party_id
+        """, (election_id,))
+        tallies = cur.fetchall()
+        cur.close()
+        
+        return jsonify({
+            'source': 'database',
+            'election': election,
+            'totalVotes': sum(row['vote_count'] for row in tallies),
+            'tallies': tallies
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/jobs/<int:job_id>', methods=['GET'])
+@role_required('admin')
+def get_job_status(job_id):
+    try:
+        job = get_job(job_id)
+        
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        return jsonify({'job': job}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/uploads/gc', methods=['POST'])
+@role_required('admin')
+def gc_uploads():
+    data = request.get_json(silent=True) or {}
+    dry_run = data.get('dry_run', True)
+    grace_seconds = data.get('grace_seconds')
+    max_deletes_per_second = data.get('max_deletes_per_second')
+    
+    if not isinstance(dry_run, bool):
+        return jsonify({'error': 'dry_run must be true or false'}), 400
+    for name, value in (('grace_seconds', grace_seconds), ('max_deletes_per_second', max_deletes_per_second)):
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0):
+            return jsonify({'error': f'{name} must be a non-negative number'}), 400
+    
+    admin_id = session['user_id']
+    
+    try:
+        # The sweep walks the whole upload folder, so it runs as a job; poll /api/admin/jobs/<id>
+        job_id = start_job('gc_uploads', gc_uploads_job, dry_run, grace_seconds, max_deletes_per_second, admin_id,
+                           created_by=admin_id)
+        
+        log_action('Orphaned upload cleanup started', admin_id, f"Job {job_id}{' (dry run)' if dry_run else ''}")
+        
+        return jsonify({'success': True, 'job_id': job_id}), 202
+        
+    except Exception as e:
+        return jsonify({'error': f'Upload cleanup failed: {str(e)}'}), 500
+
+@admin_bp.route('/stations', methods=['POST'])
+@role_required('admin')
+def create_station():
+    import secrets
+    
+    data = request.get_json(silent=True) or {}
+    name = data.get('name')
+    
+    if not name:
+        return jsonify({'error': 'Station name required'}), 400
+    
+    try:
+        cur = mysql.connection.cursor()
+        
+        cur.execute("SELECT id FROM polling_stations WHERE name = %s", (name,))
+        if cur.fetchone():
+            cur.close()
+            return jsonify({'error': 'Station name already exists'}), 400
+        
+        api_secret = secrets.token_hex(32)
+        cur.execute("INSERT INTO polling_stations (name, api_secret) VALUES (%s, %s)", (name, api_secret))
+        mysql.connection.commit()
+        station_id = cur.lastrowid
         cur.close()
         
-        si = StringIO()
-        writer = csv.writer(si)
-        writer.writerow(['ID', 'Name', 'Email', 'Role', 'Has Voted', 'Created At'])
+        log_action(f'Polling station registered: {name}', session['user_id'])
         
-        for user in users:
-            writer.writerow([
-                user['id'],
-                user['name'],
-                user['email'],
-                user['role'],
-                user['has_voted'],
-                user['created_at']
-            ])
+        # The secret is only ever shown here; the kiosk signs every batch with it
+        return jsonify({
+            'success': True,
+            'station_id': station_id,
+            'api_secret': api_secret
+        }), 201
         
-        output = make_response(si.getvalue())
-        output.headers["Content-Disposition"] = "attachment; filename=users.csv"
-        output.headers["Content-type"] = "text/csv"
+    except Exception as e:
+        return jsonify({'error': f'Station creation failed: {str(e)}'}), 500
+
+@admin_bp.route('/slow-queries', methods=['GET'])
+@role_required('admin')
+def get_slow_queries():
+    try:
+        limit = parse_limit(request.args.get('limit'), 100, 500)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'threshold_ms': current_app.config['SLOW_QUERY_THRESHOLD_MS'],
+        'queries': slow_query_log.recent(limit)
+    }), 200
+
+@admin_bp.route('/profile', methods=['POST'])
+@role_required('admin')
+def run_profiler():
+    """Sample all worker threads for a few seconds and return collapsed stacks"""
+    from utils.profiler import sample_stacks
+    
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        seconds = float(data.get('seconds', 10))
+        interval_ms = float(data.get('interval_ms', 5))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'seconds and interval_ms must be numbers'}), 400
+    
+    if not 0 < seconds <= current_app.config['PROFILER_MAX_SECONDS']:
+        return jsonify({'error': f"seconds must be between 0 and {current_app.config['PROFILER_MAX_SECONDS']}"}), 400
+    if interval_ms < 1:
+        return jsonify({'error': 'interval_ms must be at least 1'}), 400
+    
+    try:
+        samples, collapsed = sample_stacks(seconds, interval_ms / 1000.0)
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    
+    log_action('Profiler run', session['user_id'], f'{seconds}s, {samples} samples')
+    
+    output = make_response(collapsed)
+    output.headers["Content-type"] = "text/plain"
+    output.headers["X-Profile-Samples"] = str(samples)
+    return output
+
+@admin_bp.route('/export/users', methods=['GET'])
+@role_required('admin')
+@admission_controlled('low')
+def export_users():
+    try:
+        cur = mysql.connection.cursor()
+        election_id = get_active_election_id(cur)
+        cur.close()
         
         log_action('Users data exported', session['user_id'])
         
-        return output
+        return stream_csv('users.csv', ['ID', 'Name', 'Email', 'Role', 'Has Voted', 'Created At'], """
+            SELECT id, name, email, role,
+                   COALESCE(voted_election_id = %s, FALSE) as has_voted, created_at
+            FROM users
+            WHERE deleted_at IS NULL
+            ORDER BY id
+        """, (election_id,))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/export/parties', methods=['GET'])
 @role_required('admin')
+@admission_controlled('low')
 def export_parties():
     try:
         cur = mysql.connection.cursor()
-        cur.execute("""
-            SELECT p.id, p.name, p.description, p.created_at,
+        election_id = get_active_election_id(cur)
+        cur.close()
+        
+        log_action('Parties data exported', session['user_id'])
+        
+        return stream_csv('parties.csv', ['ID', 'Party Name', 'Description', 'Creator', 'Vote Count', 'Created At'], """
+            SELECT p.id, p.name, p.description,
                    u.name as creator_name,
-                   COUNT(v.id) as vote_count
+                   COUNT(v.id) as vote_count,
+                   p.created_at
             FROM parties p
             JOIN users u ON p.created_by = u.id
-            LEFT JOIN votes v ON p.id = v.party_id
+            LEFT JOIN votes v ON p.id = v.party_id AND v.election_id = %s
+            WHERE p.deleted_at IS NULL
             GROUP BY p.id
             ORDER BY p.id
-        """)
-        parties = cur.fetchall()
-        cur.close()
-        
-        si = StringIO()
-        writer = csv.writer(si)
-        writer.writerow(['ID', 'Party Name', 'Description', 'Creator', 'Vote Count', 'Created At'])
-        
-        for party in parties:
-            writer.writerow([
-                party['id'],
-                party['name'],
-                party['description'],
-                party['creator_name'],
-                party['vote_count'],
-                party['created_at']
-            ])
-        
-        output = make_response(si.getvalue())
-        output.headers["Content-Disposition"] = "attachment; filename=parties.csv"
-        output.headers["Content-type"] = "text/csv"
-        
-        log_action('Parties data exported', session['user_id'])
-        
-        return output
+        """, (election_id,))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/export/votes', methods=['GET'])
 @role_required('admin')
+@admission_controlled('low')
 def export_votes():
     try:
         cur = mysql.connection.cursor()
-        cur.execute("""
-            SELECT v.id, v.voter_id, v.party_id, v.voted_at,
+        election_id = get_active_election_id(cur)
+        cur.close()
+        
+        log_action('Votes data exported', session['user_id'])
+        
+        return stream_csv('votes.csv', ['ID', 'Voter ID', 'Voter Name', 'Voter Email', 'Party ID', 'Party Name', 'Voted At'], """
+            SELECT v.id, v.voter_id,
                    u.name as voter_name, u.email as voter_email,
-                   p.name as party_name
+                   v.party_id, p.name as party_name,
+                   v.voted_at
             FROM votes v
             JOIN users u ON v.voter_id = u.id
             JOIN parties p ON v.party_id = p.id
+            WHERE v.election_id = %s AND p.deleted_at IS NULL
             ORDER BY v.voted_at DESC
-        """)
-        votes = cur.fetchall()
-        cur.close()
-        
-        si = StringIO()
-        writer = csv.writer(si)
-        writer.writerow(['ID', 'Voter ID', 'Voter Name', 'Voter Email', 'Party ID', 'Party Name', 'Voted At'])
-        
-        for vote in votes:
-            writer.writerow([
-                vote['id'],
-                vote['voter_id'],
-                vote['voter_name'],
-                vote['voter_email'],
-                vote['party_id'],
-                vote['party_name'],
-                vote['voted_at']
-            ])
-        
-        output = make_response(si.getvalue())
-        output.headers["Content-Disposition"] = "attachment; filename=votes.csv"
-        output.headers["Content-type"] = "text/csv"
-        
-        log_action('Votes data exported', session['user_id'])
-        
-        return output
+        """, (election_id,))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/export/logs', methods=['GET'])
 @role_required('admin')
+@admission_controlled('low')
 def export_logs():
     try:
-        cur = mysql.connection.cursor()
-        cur.execute("""
-            SELECT l.id, l.action, l.details, l.created_at,
-                   u.name as user_name, u.email as user_email
+        log_action('Logs data exported', session['user_id'])
+        
+        return stream_csv('logs.csv', ['ID', 'Action', 'User Name', 'User Email', 'Details', 'Created At'], """
+            SELECT l.id, l.action,
+                   COALESCE(u.name, 'N/A') as user_name,
+                   COALESCE(u.email, 'N/A') as user_email,
+                   COALESCE(l.details, '') as details,
+                   l.created_at
             FROM logs l
             LEFT JOIN users u ON l.user_id = u.id
             ORDER BY l.created_at DESC
         """)
-        logs = cur.fetchall()
-        cur.close()
-        
-        si = StringIO()
-        writer = csv.writer(si)
-        writer.writerow(['ID', 'Action', 'User Name', 'User Email', 'Details', 'Created At'])
-        
-        for log in logs:
-            writer.writerow([
-                log['id'],
-                log['action'],
-                log['user_name'] or 'N/A',
-                log['user_email'] or 'N/A',
-                log['details'] or '',
-                log['created_at']
-            ])
-        
-        output = make_response(si.getvalue())
-        output.headers["Content-Disposition"] = "attachment; filename=logs.csv"
-        output.headers["Content-type"] = "text/csv"
-        
-        log_action('Logs data exported', session['user_id'])
-        
-        return output
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
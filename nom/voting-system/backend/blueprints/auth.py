@@ -1,12 +1,14 @@
 from flask import Blueprint, request, jsonify, session
-from flask_mysqldb import MySQL
+from utils.db import mysql
 from werkzeug.security import generate_password_hash, check_password_hash
 from utils.helpers import log_action, login_required
+from utils.elections import get_active_election_id
+from utils.rate_limit import rate_limited, json_email
 
 auth_bp = Blueprint('auth', __name__)
-mysql = MySQL()
 
 @auth_bp.route('/register', methods=['POST'])
+@rate_limited('register', account=json_email)
 def register():
     data = request.get_json()
     
@@ -51,6 +53,7 @@ def register():
         return jsonify({'error': f'Registration failed: {str(e)}'}), 500
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limited('login', account=json_email)
 def login():
     data = request.get_json()
     
@@ -62,7 +65,12 @@ def login():
     
     try:
         cur = mysql.connection.cursor()
-        cur.execute("SELECT id, name, email, password_hash, role, has_voted FROM users WHERE email = %s", (email,))
+        election_id = get_active_election_id(cur)
+        cur.execute("""
+            SELECT id, name, email, password_hash, role,
+                   COALESCE(voted_election_id = %s, FALSE) as has_voted
+            FROM users WHERE email = %s AND deleted_at IS NULL
+        """, (election_id, email))
         user = cur.fetchone()
         cur.close()
         
@@ -76,6 +84,7 @@ def login():
         session['email'] = user['email']
         session['role'] = user['role']
         session['has_voted'] = user['has_voted']
+        session['voted_election_id'] = election_id if user['has_voted'] else None
         
         log_action(f'User logged in', user['id'], f'Email: {email}')
         
@@ -1,10 +1,68 @@
 from flask import Blueprint, jsonify, request, session
-from flask_mysqldb import MySQL
+from utils.db import mysql
 from utils.helpers import login_required, role_required, log_action
-from utils.file_handler import save_campaign_image, save_base64_image, delete_campaign_image
+from utils.admission import admission_controlled
+from utils.rows import tuple_cursor, RowSet, json_response
+from utils import shared_store
+from utils.party_owners import owned_party_id
+from utils.pagination import parse_limit, parse_fields, encode_cursor, decode_cursor
+from utils.campaigns import CAMPAIGNS_PAGE_SIZE, CAMPAIGNS_MAX_PAGE_SIZE, CAMPAIGN_FIELDS, campaign_page_query
 
 party_bp = Blueprint('party', __name__)
-mysql = MySQL()
+
+PARTY_CAMPAIGN_FIELDS = ['id', 'title', 'description', 'image_url', 'created_at']
+
+def _vote_count(cur, party_id):
+    """The party's ballots in the open election, from the shared store when it is fresh"""
+    snapshot = shared_store.read()
+    if snapshot is not None and str(party_id) in snapshot['tallies']:
+        return snapshot['tallies'][str(party_id)]
+    
+    cur.execute("""
+        SELECT COUNT(*) as count FROM votes
+        WHERE party_id = %s
+          AND election_id = (SELECT id FROM elections WHERE status = 'open' ORDER BY id DESC LIMIT 1)
+    """, (party_id,))
+    return cur.fetchone()['count']
+
+def _party_profile(cur, user_id):
+    """The user's party with its vote count, or None"""
+    cur.execute(
+        "SELECT id, name, description, logo_url, created_at FROM parties WHERE created_by = %s AND deleted_at IS NULL",
+        (user_id,)
+    )
+    party = cur.fetchone()
+    if not party:
+        return None
+    
+    party['vote_count'] = _vote_count(cur, party['id'])
+    
+    # Convert local file path to full URL for logo
+    if party['logo_url'] and not party['logo_url'].startswith('http') and '/' in party['logo_url']:
+        party['logo_url'] = f"http://localhost:5000/uploads/{party['logo_url']}"
+    
+    return party
+
+def _campaign_page(party_id, fields, limit, after=None):
+    """One page of the party's campaigns and the cursor of the next page"""
+    cur = tuple_cursor()
+    cur.execute(*campaign_page_query(fields, limit, party_id=party_id, after=after))
+    campaigns = RowSet.fetch(cur)
+    cur.close()
+    
+    next_cursor = None
+    if len(campaigns) > limit:
+        campaigns.truncate(limit)
+        next_cursor = encode_cursor(campaigns.value(-1, 'created_at'), campaigns.value(-1, 'id'))
+    
+    # Convert local file paths to full URLs
+    if 'image_url' in campaigns.columns:
+        campaigns.map_column('image_url', lambda image_url: (
+            f"http://localhost:5000/uploads/{image_url}"
+            if image_url and not image_url.startswith('http') else image_url
+        ))
+    
+    return campaigns, next_cursor
 
 @party_bp.route('/profile', methods=['GET'])
 @role_required('party')
@@ -13,20 +71,7 @@ def get_profile():
     
     try:
         cur = mysql.connection.cursor()
-        cur.execute("""
-            SELECT p.id, p.name, p.description, p.logo_url, p.created_at,
-                   COUNT(v.id) as vote_count
-            FROM parties p
-            LEFT JOIN votes v ON p.id = v.party_id
-            WHERE p.created_by = %s
-            GROUP BY p.id
-        """, (user_id,))
-        party = cur.fetchone()
-        
-        # Convert local file path to full URL for logo
-        if party and party['logo_url'] and not party['logo_url'].startswith('http') and '/' in party['logo_url']:
-            party['logo_url'] = f"http://localhost:5000/uploads/{party['logo_url']}"
-        
+        party = _party_profile(cur, user_id)
         cur.close()
         
         return jsonify({'party': party}), 200
@@ -36,6 +81,7 @@ def get_profile():
 
 @party_bp.route('/create', methods=['POST'])
 @role_required('party')
+@admission_controlled('normal')
 def create_party():
     data = request.get_json()
     
@@ -52,7 +98,7 @@ def create_party():
         cur = mysql.connection.cursor()
         
         # Check if user already has a party
-        cur.execute("SELECT id FROM parties WHERE created_by = %s", (user_id,))
+        cur.execute("SELECT id FROM parties WHERE created_by = %s AND deleted_at IS NULL", (user_id,))
         if cur.fetchone():
             cur.close()
             return jsonify({'error': 'You already have a party'}), 400
@@ -71,6 +117,7 @@ def create_party():
         mysql.connection.commit()
         party_id = cur.lastrowid
         cur.close()
+        shared_store.mark_dirty()
         
         log_action(f'Party created: {name}', user_id)
         
@@ -85,6 +132,7 @@ def create_party():
 
 @party_bp.route('/update', methods=['PUT'])
 @role_required('party')
+@admission_controlled('normal')
 def update_party():
     data = request.get_json()
     
@@ -97,10 +145,9 @@ def update_party():
         cur = mysql.connection.cursor()
         
         # Get party
-        cur.execute("SELECT id FROM parties WHERE created_by = %s", (user_id,))
-        party = cur.fetchone()
+        party_id = owned_party_id(cur, user_id)
         
-        if not party:
+        if not party_id:
             cur.close()
             return jsonify({'error': 'Party not found'}), 404
         
@@ -117,10 +164,11 @@ def update_party():
             params.append(logo_url)
         
         if updates:
-            params.append(party['id'])
+            params.append(party_id)
             query = f"UPDATE parties SET {', '.join(updates)} WHERE id = %s"
             cur.execute(query, tuple(params))
             mysql.connection.commit()
+            shared_store.mark_dirty()
         
         cur.close()
         
@@ -136,6 +184,7 @@ def update_party():
 
 @party_bp.route('/campaign', methods=['POST'])
 @role_required('party')
+@admission_controlled('normal')
 def create_campaign():
     data = request.get_json()
     
@@ -152,20 +201,20 @@ def create_campaign():
         cur = mysql.connection.cursor()
         
         # Get party
-        cur.execute("SELECT id FROM parties WHERE created_by = %s", (user_id,))
-        party = cur.fetchone()
+        party_id = owned_party_id(cur, user_id)
         
-        if not party:
+        if not party_id:
             cur.close()
             return jsonify({'error': 'Create a party first'}), 404
         
         # Handle image upload
+        from utils.file_handler import save_base64_image
         saved_image_path = None
         
         # Check if it's a base64 image
         if image_url and image_url.startswith('data:image'):
             try:
-                saved_image_path = save_base64_image(image_url, f"campaign_{party['id']}")
+                saved_image_path = save_base64_image(image_url, f"campaign_{party_id}")
             except ValueError as e:
                 cur.close()
                 return jsonify({'error': str(e)}), 400
@@ -179,7 +228,7 @@ def create_campaign():
         # Create campaign
         cur.execute(
             "INSERT INTO campaigns (party_id, title, description, image_url) VALUES (%s, %s, %s, %s)",
-            (party['id'], title, description, saved_image_path)
+            (party_id, title, description, saved_image_path)
         )
         mysql.connection.commit()
         campaign_id = cur.lastrowid
@@ -198,8 +247,11 @@ def create_campaign():
 
 @party_bp.route('/campaign/upload', methods=['POST'])
 @role_required('party')
+@admission_controlled('low')
 def upload_campaign_image():
     """Handle file upload for campaign images"""
+    from utils.file_handler import save_campaign_image
+    
     if 'image' not in request.files:
         return jsonify({'error': 'No image file provided'}), 400
     
@@ -209,11 +261,10 @@ def upload_campaign_image():
     try:
         # Get party to verify ownership
         cur = mysql.connection.cursor()
-        cur.execute("SELECT id FROM parties WHERE created_by = %s", (user_id,))
-        party = cur.fetchone()
+        party_id = owned_party_id(cur, user_id)
         cur.close()
         
-        if not party:
+        if not party_id:
             return jsonify({'error': 'Create a party first'}), 404
         
         # Save image
@@ -238,8 +289,11 @@ def upload_campaign_image():
 
 @party_bp.route('/logo/upload', methods=['POST'])
 @role_required('party')
+@admission_controlled('low')
 def upload_party_logo():
     """Handle file upload for party logos"""
+    from utils.file_handler import save_campaign_image, delete_campaign_image
+    
     if 'image' not in request.files:
         return jsonify({'error': 'No image file provided'}), 400
     
@@ -249,7 +303,7 @@ def upload_party_logo():
     try:
         # Get party to verify ownership
         cur = mysql.connection.cursor()
-        cur.execute("SELECT id, logo_url FROM parties WHERE created_by = %s", (user_id,))
+        cur.execute("SELECT id, logo_url FROM parties WHERE created_by = %s AND deleted_at IS NULL", (user_id,))
         party = cur.fetchone()
         
         if not party:
@@ -272,6 +326,7 @@ def upload_party_logo():
         cur.execute("UPDATE parties SET logo_url = %s WHERE id = %s", (image_path, party['id']))
         mysql.connection.commit()
         cur.close()
+        shared_store.mark_dirty()
         
         # Return the URL path for frontend to use
         image_url = f"http://localhost:5000/uploads/{image_path}"
@@ -292,36 +347,32 @@ def upload_party_logo():
 @party_bp.route('/campaigns', methods=['GET'])
 @role_required('party')
 def get_campaigns():
+    """The party's own campaigns, newest first, with the same paging and ?fields= as the voter list"""
     user_id = session['user_id']
+    cursor = request.args.get('cursor')
+    
+    try:
+        fields = parse_fields(request.args.get('fields'), CAMPAIGN_FIELDS, PARTY_CAMPAIGN_FIELDS)
+        limit = parse_limit(request.args.get('limit'), CAMPAIGNS_PAGE_SIZE, CAMPAIGNS_MAX_PAGE_SIZE)
+        after = decode_cursor(cursor, 2) if cursor else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     try:
         cur = mysql.connection.cursor()
         
         # Get party
-        cur.execute("SELECT id FROM parties WHERE created_by = %s", (user_id,))
-        party = cur.fetchone()
+        party_id = owned_party_id(cur, user_id)
         
-        if not party:
+        if not party_id:
             cur.close()
-            return jsonify({'campaigns': []}), 200
-        
-        # Get campaigns
-        cur.execute("""
-            SELECT id, title, description, image_url, created_at
-            FROM campaigns
-            WHERE party_id = %s
-            ORDER BY created_at DESC
-        """, (party['id'],))
-        campaigns = cur.fetchall()
-        
-        # Convert local file paths to full URLs
-        for campaign in campaigns:
-            if campaign['image_url'] and not campaign['image_url'].startswith('http'):
-                campaign['image_url'] = f"http://localhost:5000/uploads/{campaign['image_url']}"
+            return jsonify({'campaigns': [], 'next_cursor': None, 'limit': limit}), 200
         
         cur.close()
         
-        return jsonify({'campaigns': campaigns}), 200
+        campaigns, next_cursor = _campaign_page(party_id, fields, limit, after)
+        
+        return json_response(campaigns=campaigns, next_cursor=next_cursor, limit=limit), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -335,19 +386,54 @@ def get_votes():
         cur = mysql.connection.cursor()
         
         # Get party
-        cur.execute("SELECT id FROM parties WHERE created_by = %s", (user_id,))
-        party = cur.fetchone()
+        party_id = owned_party_id(cur, user_id)
         
-        if not party:
+        if not party_id:
             cur.close()
             return jsonify({'voteCount': 0}), 200
         
-        # Get vote count
-        cur.execute("SELECT COUNT(*) as count FROM votes WHERE party_id = %s", (party['id'],))
-        result = cur.fetchone()
+        # Get vote count for the open election
+        vote_count = _vote_count(cur, party_id)
         cur.close()
         
-        return jsonify({'voteCount': result['count']}), 200
+        return jsonify({'voteCount': vote_count}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@party_bp.route('/dashboard', methods=['GET'])
+@role_required('party')
+def get_dashboard():
+    """Profile, tally and the first page of campaigns in one response.
+    
+    Two queries when the shared store has the tally (profile, campaigns),
+    three otherwise. Takes the same ?fields= and ?limit= as /campaigns.
+    """
+    user_id = session['user_id']
+    
+    try:
+        fields = parse_fields(request.args.get('fields'), CAMPAIGN_FIELDS, PARTY_CAMPAIGN_FIELDS)
+        limit = parse_limit(request.args.get('limit'), CAMPAIGNS_PAGE_SIZE, CAMPAIGNS_MAX_PAGE_SIZE)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        cur = mysql.connection.cursor()
+        party = _party_profile(cur, user_id)
+        cur.close()
+        
+        if not party:
+            return jsonify({'party': None, 'voteCount': 0, 'campaigns': [], 'next_cursor': None, 'limit': limit}), 200
+        
+        campaigns, next_cursor = _campaign_page(party['id'], fields, limit)
+        
+        return json_response(
+            party=party,
+            voteCount=party['vote_count'],
+            campaigns=campaigns,
+            next_cursor=next_cursor,
+            limit=limit
+        ), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -0,0 +1,228 @@
+import hashlib
+import hmac
+import json
+import time
+from datetime import datetime, timedelta
+from flask import Blueprint, jsonify, request, current_app
+import MySQLdb
+from utils.db import mysql
+from utils.helpers import log_action
+from utils.admission import admission_controlled
+from utils import shared_store
+
+station_bp = Blueprint('station', __name__)
+
+def _verify_station():
+    """Check the X-Station-* headers; return (station, None) or (None, error response)"""
+    station_id = request.headers.get('X-Station-Id')
+    timestamp = request.headers.get('X-Station-Timestamp')
+    signature = request.headers.get('X-Signature')
+    
+    if not all([station_id, timestamp, signature]):
+        return None, (jsonify({'error': 'Station authentication required'}), 401)
+    
+    try:
+        signed_at = float(timestamp)
+    except ValueError:
+        return None, (jsonify({'error': 'Invalid station timestamp'}), 401)
+    
+    if abs(time.time() - signed_at) > current_app.config['STATION_SIGNATURE_MAX_AGE_SECONDS']:
+        return None, (jsonify({'error': 'Station signature expired'}), 401)
+    
+    cur = mysql.connection.cursor()
+    cur.execute("SELECT id, name, api_secret FROM polling_stations WHERE id = %s AND is_active = TRUE", (station_id,))
+    station = cur.fetchone()
+    cur.close()
+    
+    if not station:
+        return None, (jsonify({'error': 'Unknown station'}), 401)
+    
+    # Signature covers the timestamp and the exact body bytes
+    message = timestamp.encode('utf-8') + b'.' + request.get_data()
+    expected = hmac.new(station['api_secret'].encode('utf-8'), message, hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected, signature):
+        return None, (jsonify({'error': 'Invalid station signature'}), 401)
+    
+    return station, None
+
+def _parse_timestamp(value):
+    """Naive datetime in server local time, the zone CURRENT_TIMESTAMP fills voted_at in.
+    
+    Unix seconds and ISO 8601 strings with an offset are converted; an ISO
+    string without an offset is taken as server local time already.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return datetime.fromtimestamp(value)
+    if isinstance(value, str):
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone().replace(tzinfo=None)
+        return parsed
+    raise ValueError('Invalid timestamp')
+
+def _ingest_chunk(cur, election_id, chunk, results):
+    """Insert one chunk of ballots in a single transaction, filling results by index"""
+    voter_ids = sorted({ballot['voter_id'] for _, ballot in chunk})
+    placeholders = ', '.join(['%s'] * len(voter_ids))
+    
+    # One set-based eligibility check; rows are locked so an online vote can't slip in between
+    cur.execute(f"""
+        SELECT id, role, voted_election_id
+        FROM users
+        WHERE id IN ({placeholders}) AND deleted_at IS NULL
+        ORDER BY id
+        FOR UPDATE
+    """, tuple(voter_ids))
+    voters = {row['id']: row for row in cur.fetchall()}
+    
+    accepted = []
+    for index, ballot in chunk:
+        voter = voters.get(ballot['voter_id'])
+        if not voter:
+            results[index]['status'] = 'unknown_voter'
+        elif voter['role'] != 'voter':
+            results[index]['status'] = 'not_eligible'
+        elif voter['voted_election_id'] == election_id:
+            results[index]['status'] = 'already_voted'
+        else:
+            accepted.append((index, ballot))
+    
+    if accepted:
+        cur.executemany(
+            "INSERT INTO votes (election_id, voter_id, party_id, voted_at) VALUES (%s, %s, %s, %s)",
+            [(election_id, ballot['voter_id'], ballot['party_id'], ballot['voted_at']) for _, ballot in accepted]
+        )
+        accepted_ids = [ballot['voter_id'] for _, ballot in accepted]
+        cur.execute(
+            f"UPDATE users SET voted_election_id = %s WHERE id IN ({', '.join(['%s'] * len(accepted_ids))})",
+            (election_id, *accepted_ids)
+        )
+    
+    mysql.connection.commit()
+    if accepted:
+        shared_store.mark_dirty()
+    
+    for index, _ in accepted:
+        results[index]['status'] = 'accepted'
+
+@station_bp.route('/ballots', methods=['POST'])
+@admission_controlled('normal')
+def submit_ballots():
+    """Bulk ballot upload from an authenticated polling-station kiosk.
+    
+    Body: {"ballots": [{"voter_id": 1, "party_id": 2, "timestamp": "2024-05-01T09:30:00"}, ...]}
+    Headers: X-Station-Id, X-Station-Timestamp (unix seconds) and X-Signature,
+    the hex HMAC-SHA256 of "<timestamp>.<body>" under the station secret.
+    """
+    try:
+        station, error = _verify_station()
+    except Exception as e:
+        return jsonify({'error': f'Station authentication failed: {str(e)}'}), 500
+    if error:
+        return error
+    
+    try:
+        data = json.loads(request.get_data())
+        ballots = data['ballots']
+        if not isinstance(ballots, list):
+            raise ValueError
+    except (ValueError, KeyError, TypeError):
+        return jsonify({'error': 'Body must be a JSON object with a ballots list'}), 400
+    
+    max_batch = current_app.config['STATION_MAX_BATCH_SIZE']
+    if len(ballots) > max_batch:
+        return jsonify({'error': f'At most {max_batch} ballots per batch'}), 400
+    
+    # Validate shape and drop in-batch duplicates before touching the database
+    results = []
+    pending = []
+    seen_voters = set()
+    for index, ballot in enumerate(ballots):
+        result = {'index': index, 'voter_id': None, 'status': None}
+        results.append(result)
+        try:
+            voter_id = int(ballot['voter_id'])
+            party_id = int(ballot['party_id'])
+            voted_at = _parse_timestamp(ballot['timestamp'])
+        except (KeyError, TypeError, ValueError, OverflowError, OSError):
+            # fromtimestamp raises OverflowError/OSError for times the platform can't represent
+            result['status'] = 'invalid'
+            continue
+        
+        result['voter_id'] = voter_id
+        if voter_id in seen_voters:
+            result['status'] = 'duplicate_in_batch'
+            continue
+        seen_voters.add(voter_id)
+        pending.append((index, {'voter_id': voter_id, 'party_id': party_id, 'voted_at': voted_at}))
+    
+    try:
+        cur = mysql.connection.cursor()
+        
+        cur.execute("SELECT id, opened_at FROM elections WHERE status = 'open' ORDER BY id DESC LIMIT 1")
+        election = cur.fetchone()
+        if not election:
+            cur.close()
+            return jsonify({'error': 'No election is currently open'}), 400
+        election_id = election['id']
+        
+        # Ballots must fall inside the open election; allow kiosk clocks the same skew as signatures
+        earliest = election['opened_at'] or datetime.min
+        latest = datetime.now() + timedelta(seconds=current_app.config['STATION_SIGNATURE_MAX_AGE_SECONDS'])
+        
+        party_ids = sorted({ballot['party_id'] for _, ballot in pending})
+        valid_parties = set()
+        if party_ids:
+            cur.execute(
+                f"SELECT id FROM parties WHERE id IN ({', '.join(['%s'] * len(party_ids))}) AND deleted_at IS NULL",
+                tuple(party_ids)
+            )
+            valid_parties = {row['id'] for row in cur.fetchall()}
+        
+        valid = []
+        for index, ballot in pending:
+            if not earliest <= ballot['voted_at'] <= latest:
+                results[index]['status'] = 'outside_election'
+            elif ballot['party_id'] in valid_parties:
+                valid.append((index, ballot))
+            else:
+                results[index]['status'] = 'invalid_party'
+        
+        chunk_size = current_app.config['STATION_INGEST_CHUNK_SIZE']
+        for start in range(0, len(valid), chunk_size):
+            chunk = valid[start:start + chunk_size]
+            
+            # A concurrent online vote can still hit the unique key; re-check the chunk and retry
+            for attempt in range(3):
+                try:
+                    _ingest_chunk(cur, election_id, chunk, results)
+                    break
+                except MySQLdb.IntegrityError:
+                    mysql.connection.rollback()
+                    if attempt == 2:
+                        for index, _ in chunk:
+                            results[index]['status'] = 'error'
+                except Exception:
+                    mysql.connection.rollback()
+                    for index, _ in chunk:
+                        results[index]['status'] = 'error'
+                    break
+        
+        cur.close()
+        
+    except Exception as e:
+        return jsonify({'error': f'Ballot ingest failed: {str(e)}'}), 500
+    
+    summary = {}
+    for result in results:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    
+    log_action(f"Station batch ingested: {station['name']}", None,
+               ', '.join(f'{status}: {count}' for status, count in sorted(summary.items())))
+    
+    return jsonify({
+        'success': True,
+        'election_id': election_id,
+        'summary': summary,
+        'results': results
+    }), 200
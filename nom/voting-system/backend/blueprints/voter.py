@@ -1,63 +1,238 @@
+import re
 from flask import Blueprint, jsonify, request, session
-from flask_mysqldb import MySQL
+from utils.db import mysql
 from utils.helpers import login_required, role_required, log_action
+from utils.elections import get_active_election_id
+from utils.admission import admission_controlled
+from utils.rate_limit import rate_limited, session_user
+from utils.pagination import parse_limit, parse_fields, encode_cursor, decode_cursor
+from utils.campaigns import CAMPAIGNS_PAGE_SIZE, CAMPAIGNS_MAX_PAGE_SIZE, CAMPAIGN_FIELDS, campaign_page_query
+from utils.rows import tuple_cursor, RowSet, json_response
+from utils import shared_store, ballot_journal
 
 voter_bp = Blueprint('voter', __name__)
-mysql = MySQL()
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+SEARCH_MAX_TERMS = 10
+SEARCH_SNIPPET_LENGTH = 300
 
 @voter_bp.route('/parties', methods=['GET'])
 @login_required
 def get_parties():
     try:
-        cur = mysql.connection.cursor()
-        cur.execute("""
-            SELECT p.id, p.name, p.description, p.logo_url, 
-                   COUNT(v.id) as vote_count
-            FROM parties p
-            LEFT JOIN votes v ON p.id = v.party_id
-            GROUP BY p.id
-            ORDER BY p.name
-        """)
-        parties = cur.fetchall()
+        snapshot = shared_store.read()
+        if snapshot is not None:
+            # Same rows as the query below, published by one worker for all of them
+            tallies = snapshot['tallies']
+            parties = RowSet(
+                ['id', 'name', 'description', 'logo_url', 'vote_count'],
+                [tuple(party) + (tallies[str(party[0])],) for party in snapshot['parties']]
+            )
+        else:
+            cur = mysql.connection.cursor()
+            election_id = get_active_election_id(cur)
+            cur.close()
+            
+            cur = tuple_cursor()
+            cur.execute("""
+                SELECT p.id, p.name, p.description, p.logo_url, 
+                       COUNT(v.id) as vote_count
+                FROM parties p
+                LEFT JOIN votes v ON p.id = v.party_id AND v.election_id = %s
+                WHERE p.deleted_at IS NULL
+                GROUP BY p.id
+                ORDER BY p.name
+            """, (election_id,))
+            parties = RowSet.fetch(cur)
+            cur.close()
         
         # Convert local file paths to full URLs for logos
-        for party in parties:
-            if party['logo_url'] and not party['logo_url'].startswith('http') and '/' in party['logo_url']:
-                party['logo_url'] = f"http://localhost:5000/uploads/{party['logo_url']}"
-        
-        cur.close()
+        parties.map_column('logo_url', lambda logo_url: (
+            f"http://localhost:5000/uploads/{logo_url}"
+            if logo_url and not logo_url.startswith('http') and '/' in logo_url else logo_url
+        ))
         
-        return jsonify({'parties': parties}), 200
+        return json_response(parties=parties), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @voter_bp.route('/campaigns', methods=['GET'])
 @login_required
 def get_campaigns():
+    """List campaigns newest first, a page at a time.
+    
+    Optional ?party_id= narrows to one party and ?fields=id,title,... picks
+    the returned fields (id and created_at are always included).
+    """
+    party_id = request.args.get('party_id')
+    cursor = request.args.get('cursor')
+    
     try:
-        cur = mysql.connection.cursor()
-        cur.execute("""
-            SELECT c.id, c.party_id, c.title, c.description, c.image_url, c.created_at,
-                   p.name as party_name
-            FROM campaigns c
-            JOIN parties p ON c.party_id = p.id
-            ORDER BY c.created_at DESC
-        """)
-        campaigns = cur.fetchall()
+        party_id = int(party_id) if party_id else None
+        fields = parse_fields(request.args.get('fields'), CAMPAIGN_FIELDS, CAMPAIGN_FIELDS)
+        limit = parse_limit(request.args.get('limit'), CAMPAIGNS_PAGE_SIZE, CAMPAIGNS_MAX_PAGE_SIZE)
+        after = decode_cursor(cursor, 2) if cursor else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        cur = tuple_cursor()
+        cur.execute(*campaign_page_query(fields, limit, party_id=party_id, after=after))
+        campaigns = RowSet.fetch(cur)
+        cur.close()
+        
+        next_cursor = None
+        if len(campaigns) > limit:
+            campaigns.truncate(limit)
+            next_cursor = encode_cursor(campaigns.value(-1, 'created_at'), campaigns.value(-1, 'id'))
         
         # Convert local file paths to full URLs
-        for campaign in campaigns:
-            if campaign['image_url'] and not campaign['image_url'].startswith('http'):
-                campaign['image_url'] = f"http://localhost:5000/uploads/{campaign['image_url']}"
+        if 'image_url' in campaigns.columns:
+            campaigns.map_column('image_url', lambda image_url: (
+                f"http://localhost:5000/uploads/{image_url}"
+                if image_url and not image_url.startswith('http') else image_url
+            ))
         
+        return json_response(campaigns=campaigns, next_cursor=next_cursor, limit=limit), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _fulltext_query(query):
+    """Turn free text into a BOOLEAN MODE query: each word is an optional prefix term"""
+    # Drop FULLTEXT operators so user input can't change the query's meaning
+    terms = [term for term in re.split(r'[^\w]+', query) if len(term) > 1]
+    return ' '.join(f'{term}*' for term in terms[:SEARCH_MAX_TERMS])
+
+@voter_bp.route('/search', methods=['GET'])
+@login_required
+def search():
+    """Ranked keyword search over campaigns and parties.
+    
+    Backed by the FULLTEXT indexes on campaigns(title, description) and
+    parties(name, description), which InnoDB keeps current as rows are
+    written. Results are ordered by relevance; type=campaign or type=party
+    narrows the search to one kind.
+    """
+    query = (request.args.get('q') or '').strip()
+    kind = request.args.get('type')
+    cursor = request.args.get('cursor')
+    
+    if kind and kind not in ['campaign', 'party']:
+        return jsonify({'error': 'type must be campaign or party'}), 400
+    
+    terms = _fulltext_query(query)
+    if not terms:
+        return jsonify({'error': 'Search query required'}), 400
+    
+    try:
+        limit = parse_limit(request.args.get('limit'), SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE)
+        after = decode_cursor(cursor, 3) if cursor else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        cur = tuple_cursor()
+        
+        sources = []
+        params = []
+        if kind in [None, 'campaign']:
+            sources.append("""
+                SELECT 'campaign' as type, c.id, c.party_id, c.title,
+                       LEFT(c.description, %s) as description, c.image_url, c.created_at,
+                       p.name as party_name,
+                       MATCH(c.title, c.description) AGAINST (%s IN BOOLEAN MODE) as score
+                FROM campaigns c
+                JOIN parties p ON c.party_id = p.id
+                WHERE MATCH(c.title, c.description) AGAINST (%s IN BOOLEAN MODE)
+                  AND p.deleted_at IS NULL
+            """)
+            params.extend([SEARCH_SNIPPET_LENGTH, terms, terms])
+        if kind in [None, 'party']:
+            sources.append("""
+                SELECT 'party' as type, p.id, p.id as party_id, p.name as title,
+                       LEFT(p.description, %s) as description, p.logo_url as image_url, p.created_at,
+                       p.name as party_name,
+                       MATCH(p.name, p.description) AGAINST (%s IN BOOLEAN MODE) as score
+                FROM parties p
+                WHERE MATCH(p.name, p.description) AGAINST (%s IN BOOLEAN MODE)
+                  AND p.deleted_at IS NULL
+            """)
+            params.extend([SEARCH_SNIPPET_LENGTH, terms, terms])
+        
+        # Keyset on (score, type, id); scores are recomputed identically while the index is unchanged
+        conditions = ""
+        if after:
+            conditions = "WHERE score < %s OR (score = %s AND (type > %s OR (type = %s AND id > %s)))"
+            params.extend([after[0], after[0], after[1], after[1], after[2]])
+        
+        # Fetch one extra row to learn whether another page exists
+        params.append(limit + 1)
+        cur.execute(f"""
+            SELECT * FROM ({' UNION ALL '.join(sources)}) results
+            {conditions}
+            ORDER BY score DESC, type, id
+            LIMIT %s
+        """, tuple(params))
+        results = RowSet.fetch(cur)
         cur.close()
         
-        return jsonify({'campaigns': campaigns}), 200
+        next_cursor = None
+        if len(results) > limit:
+            results.truncate(limit)
+            next_cursor = encode_cursor(results.value(-1, 'score'), results.value(-1, 'type'), results.value(-1, 'id'))
+        
+        # Convert local file paths to full URLs
+        results.map_column('image_url', lambda image_url: (
+            f"http://localhost:5000/uploads/{image_url}"
+            if image_url and not image_url.startswith('http') and '/' in image_url else image_url
+        ))
+        
+        return json_response(results=results, next_cursor=next_cursor, limit=limit), 200
+        
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _journal_vote(party_id, user_id):
+    """Ack a ballot once it is fsynced to the local journal; None means use the direct MySQL write.
+    
+    Needs a fresh shared store snapshot to know the open election and its
+    parties, so without one the vote goes straight to MySQL. A voter who
+    already voted from another session, or whose election closes before the
+    ballot is replayed, is caught at replay: the ballot is not counted and a
+    log row records why. The replay also writes the usual 'Vote cast' log row.
+    """
+    snapshot = shared_store.read()
+    try:
+        party_id = int(party_id)
+    except (TypeError, ValueError):
+        return None
+    if snapshot is None or not snapshot['election_id'] or str(party_id) not in snapshot['tallies']:
+        return None
+    
+    election_id = snapshot['election_id']
+    if session.get('voted_election_id') == election_id:
+        return jsonify({'error': 'You have already voted'}), 400
+    
+    try:
+        ballot_journal.record_ballot(election_id, user_id, party_id)
+    except (ballot_journal.JournalError, OSError) as e:
+        print(f"Ballot journal unavailable, writing directly: {e}")
+        return None
+    
+    session['has_voted'] = True
+    session['voted_election_id'] = election_id
+    
+    return jsonify({
+        'success': True,
+        'queued': True,
+        'message': 'Vote received and will be counted shortly'
+    }), 202
+
 @voter_bp.route('/vote', methods=['POST'])
 @role_required('voter')
+@rate_limited('vote', account=session_user)
+@admission_controlled('critical')
 def cast_vote():
     data = request.get_json()
     party_id = data.get('party_id')
@@ -67,37 +242,53 @@ def cast_vote():
     
     user_id = session['user_id']
     
+    if ballot_journal.enabled():
+        response = _journal_vote(party_id, user_id)
+        if response is not None:
+            return response
+    
     try:
         cur = mysql.connection.cursor()
         
-        # Check if already voted
-        cur.execute("SELECT has_voted FROM users WHERE id = %s", (user_id,))
+        election_id = get_active_election_id(cur)
+        if not election_id:
+            cur.close()
+            return jsonify({'error': 'No election is currently open'}), 400
+        
+        # Check if already voted in this election
+        cur.execute("SELECT voted_election_id FROM users WHERE id = %s AND deleted_at IS NULL", (user_id,))
         user = cur.fetchone()
         
-        if user['has_voted']:
+        if not user:
+            cur.close()
+            return jsonify({'error': 'Account not found'}), 404
+        
+        if user['voted_election_id'] == election_id:
             cur.close()
             return jsonify({'error': 'You have already voted'}), 400
         
         # Check if party exists
-        cur.execute("SELECT id FROM parties WHERE id = %s", (party_id,))
+        cur.execute("SELECT id FROM parties WHERE id = %s AND deleted_at IS NULL", (party_id,))
         if not cur.fetchone():
             cur.close()
             return jsonify({'error': 'Party not found'}), 404
         
         # Cast vote
         cur.execute(
-            "INSERT INTO votes (voter_id, party_id) VALUES (%s, %s)",
-            (user_id, party_id)
+            "INSERT INTO votes (election_id, voter_id, party_id) VALUES (%s, %s, %s)",
+            (election_id, user_id, party_id)
         )
         
         # Update user voted status
-        cur.execute("UPDATE users SET has_voted = TRUE WHERE id = %s", (user_id,))
+        cur.execute("UPDATE users SET voted_election_id = %s WHERE id = %s", (election_id, user_id))
         
         mysql.connection.commit()
         cur.close()
+        shared_store.mark_dirty()
         
         # Update session
         session['has_voted'] = True
+        session['voted_election_id'] = election_id
         
         log_action(f'Vote cast for party ID: {party_id}', user_id)
         
@@ -111,28 +302,35 @@ def cast_vote():
 
 @voter_bp.route('/status', methods=['GET'])
 @role_required('voter')
+@admission_controlled('critical')
 def get_status():
     user_id = session['user_id']
     
     try:
         cur = mysql.connection.cursor()
-        cur.execute("SELECT has_voted FROM users WHERE id = %s", (user_id,))
+        election_id = get_active_election_id(cur)
+        cur.execute("SELECT voted_election_id FROM users WHERE id = %s", (user_id,))
         user = cur.fetchone()
         
+        has_voted = election_id is not None and user['voted_election_id'] == election_id
+        # A journaled (202) vote is only in the session until the replayer applies it
+        pending = not has_voted and election_id is not None and session.get('voted_election_id') == election_id
+        
         voted_party = None
-        if user['has_voted']:
+        if has_voted:
             cur.execute("""
                 SELECT p.id, p.name, v.voted_at
                 FROM votes v
                 JOIN parties p ON v.party_id = p.id
-                WHERE v.voter_id = %s
-            """, (user_id,))
+                WHERE v.election_id = %s AND v.voter_id = %s
+            """, (election_id, user_id))
             voted_party = cur.fetchone()
         
         cur.close()
         
         return jsonify({
-            'hasVoted': user['has_voted'],
+            'hasVoted': has_voted or pending,
+            'pending': pending,
             'votedParty': voted_party
         }), 200
         
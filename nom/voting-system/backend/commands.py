@@ -0,0 +1,106 @@
+import click
+from utils.db import mysql
+
+class ConsoleProgress:
+    """Progress handle for running job targets from the command line"""
+    
+    def __init__(self):
+        self.values = {}
+    
+    def update(self, force=False, **values):
+        self.values.update(values)
+        click.echo(', '.join(f'{key}={value}' for key, value in self.values.items()))
+
+def register_commands(app):
+    """Register maintenance commands on the Flask CLI"""
+    
+    @app.cli.command('gc-uploads')
+    @click.option('--dry-run/--delete', default=True, help='Only report orphaned files (default) or delete them')
+    @click.option('--grace-seconds', type=int, default=None, help='Minimum file age before it can be removed')
+    @click.option('--max-deletes-per-second', type=float, default=None, help='Deletion rate limit (0 disables it)')
+    def gc_uploads(dry_run, grace_seconds, max_deletes_per_second):
+        """Remove uploaded images no party or campaign references"""
+        from utils.upload_gc import collect_orphaned_uploads
+        
+        stats = collect_orphaned_uploads(
+            mysql.connection,
+            dry_run=dry_run,
+            grace_seconds=grace_seconds,
+            max_deletes_per_second=max_deletes_per_second
+        )
+        
+        for path in stats['files']:
+            click.echo(f"{'would delete' if dry_run else 'deleted'}: {path}")
+        
+        click.echo(
+            f"Scanned {stats['scanned']} files, {stats['referenced']} referenced, "
+            f"{stats['orphaned']} orphaned, {stats['deleted']} deleted, "
+            f"{stats['skipped_recent']} within grace period, {stats['bytes_freed']} bytes"
+        )
+    
+    @app.cli.command('archive-election')
+    @click.argument('election_id', type=int)
+    def archive_election_command(election_id):
+        """Archive a closed election to compressed files and remove its rows"""
+        from utils.archive import archive_election
+        
+        manifest = archive_election(ConsoleProgress(), election_id)
+        
+        for name, dataset in manifest['datasets'].items():
+            click.echo(f"{name}: {dataset['rows']} rows, sha256 {dataset['sha256']}")
+        click.echo(f'Election {election_id} archived')
+    
+    @app.cli.command('recount')
+    @click.argument('election_id', type=int)
+    @click.option('--file', 'path', type=click.Path(exists=True, dir_okay=False), default=None,
+                  help='Recount a votes CSV export or archived votes.jsonl.gz instead of the database')
+    @click.option('--processes', type=int, default=None, help='Worker processes for database recounts (default: CPU count)')
+    @click.option('--chunk-size', type=int, default=None, help='Rows fetched per round trip')
+    @click.option('--skip-voter-check', is_flag=True, help='Only compare tallies, not per-voter records')
+    @click.option('--json', 'as_json', is_flag=True, help='Print the full report as JSON')
+    def recount_command(election_id, path, processes, chunk_size, skip_voter_check, as_json):
+        """Independently recount an election and cross-check the served results"""
+        import json
+        from utils.recount import recount
+        
+        report = recount(
+            election_id,
+            path=path,
+            processes=processes,
+            chunk_size=chunk_size,
+            check_voters=not skip_voter_check
+        )
+        
+        if as_json:
+            click.echo(json.dumps(report, indent=2))
+        else:
+            click.echo(f"Election {election_id} ({report['status']}), source: {report['source']}")
+            click.echo(f"Recounted {report['total_ballots']} ballots, served total {report['served_total']}")
+            for party_id, count in sorted(report['tallies'].items()):
+                click.echo(f'  party {party_id}: {count}')
+            for mismatch in report['tally_mismatches']:
+                click.echo(f"MISMATCH party {mismatch['party_id']}: recounted {mismatch['recounted']}, served {mismatch['served']}")
+            for party_id, count in sorted(report['deleted_party_ballots'].items()):
+                click.echo(f'  party {party_id} is deleted; {count} ballots await the purge job')
+            for warning in report['warnings']:
+                click.echo(f'WARNING {warning}')
+            for key in ('duplicate_voters', 'ballots_without_flag', 'flagged_without_ballot'):
+                if report.get(key):
+                    click.echo(f"MISMATCH {key.replace('_', ' ')}: {report[key]} (e.g. {report[key + '_sample']})")
+            click.echo('Recount matches' if report['ok'] else 'Recount found discrepancies')
+        
+        if not report['ok']:
+            raise SystemExit(1)
+    
+    @app.cli.command('replay-journal')
+    def replay_journal_command():
+        """Apply every ballot left in journal slots no running worker holds"""
+        from flask import current_app
+        from utils.ballot_journal import drain_orphaned_slots, apply_ballots
+        
+        replayed = drain_orphaned_slots(
+            current_app.config['BALLOT_JOURNAL_DIR'],
+            apply_ballots,
+            current_app.config['BALLOT_JOURNAL_REPLAY_BATCH_SIZE']
+        )
+        click.echo(f'Replayed {replayed} journaled ballots')
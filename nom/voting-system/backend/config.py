@@ -5,12 +5,20 @@ class Config:
     # Secret Key for Sessions
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production-2024'
     
-    # XAMPP MySQL Configuration
-    MYSQL_HOST = 'localhost'
-    MYSQL_USER = 'root'
-    MYSQL_PASSWORD = ''  # Default XAMPP has no password
-    MYSQL_DB = 'voting_system'
+    # Request threads per worker (gunicorn.conf.py reads the same variable)
+    REQUEST_THREADS = int(os.environ.get('GUNICORN_THREADS', 4))
+    
+    # XAMPP MySQL Configuration (overridable, e.g. to point at the load-test container)
+    MYSQL_HOST = os.environ.get('MYSQL_HOST', 'localhost')
+    MYSQL_PORT = int(os.environ.get('MYSQL_PORT', 3306))
+    MYSQL_USER = os.environ.get('MYSQL_USER', 'root')
+    MYSQL_PASSWORD = os.environ.get('MYSQL_PASSWORD', '')  # Default XAMPP has no password
+    MYSQL_DB = os.environ.get('MYSQL_DB', 'voting_system')
     MYSQL_CURSORCLASS = 'DictCursor'
+    MYSQL_POOL_SIZE = int(os.environ.get('MYSQL_POOL_SIZE', 10))  # Per worker process; at least the thread count
+    MYSQL_POOL_TIMEOUT = 5  # Seconds to wait for a free connection
+    MYSQL_POOL_RECYCLE_SECONDS = 60  # Ping connections idle longer than this before reuse
+    ASGI_MYSQL_POOL_SIZE = int(os.environ.get('ASGI_MYSQL_POOL_SIZE', 20))  # Per asgi_voter.py worker
     
     # Session Configuration
     PERMANENT_SESSION_LIFETIME = timedelta(hours=24)
@@ -29,4 +37,97 @@ class Config:
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
     CAMPAIGN_UPLOAD_FOLDER = os.path.join(UPLOAD_FOLDER, 'campaigns')
     MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5MB max file size
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
\ No newline at end of file
+    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+    
+    # Orphaned Upload Cleanup
+    UPLOAD_GC_GRACE_SECONDS = 24 * 60 * 60  # Keep unreferenced files for a day
+    UPLOAD_GC_MAX_DELETES_PER_SECOND = 50
+    
+    # Elections
+    ELECTION_PURGE_CHUNK_SIZE = 5000  # Ballots deleted per transaction when purging a closed election
+    
+    # Closed Election Archive
+    ARCHIVE_FOLDER = os.environ.get('ARCHIVE_FOLDER') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archive')
+    ARCHIVE_CHUNK_SIZE = 10000  # Rows per column group and per delete batch
+    EXPORT_CHUNK_SIZE = 5000  # Rows per fetch when streaming CSV exports
+    
+    # Background Deletes
+    DELETE_CHUNK_SIZE = 1000  # Dependent rows removed per transaction when deleting users and parties
+    
+    # Background Jobs
+    JOB_LEASE_SECONDS = 60  # An unfinished job whose worker stops renewing this long is resumed elsewhere
+    JOB_HEARTBEAT_SECONDS = 10
+    
+    # Diagnostics
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+    SLOW_QUERY_LOG_SIZE = 500  # Recent slow statements kept for /api/admin/slow-queries
+    PROFILER_MAX_SECONDS = 60
+    
+    # Admission Control (per worker process, so never more than its request threads)
+    ADMISSION_INITIAL_LIMIT = REQUEST_THREADS
+    ADMISSION_MIN_LIMIT = min(2, REQUEST_THREADS)
+    ADMISSION_MAX_LIMIT = REQUEST_THREADS
+    ADMISSION_TARGET_DB_LATENCY_MS = 50  # Slower requests shrink the concurrency limit
+    ADMISSION_DECREASE_FACTOR = 0.9
+    ADMISSION_QUEUE_TIMEOUT_MS = 50  # Only vote/status requests wait, and only this long
+    ADMISSION_RETRY_AFTER_SECONDS = 1
+    
+    # Polling Station Batch Upload
+    STATION_MAX_BATCH_SIZE = 20000
+    STATION_INGEST_CHUNK_SIZE = 1000  # Ballots per transaction
+    STATION_SIGNATURE_MAX_AGE_SECONDS = 300
+    
+    # Response Compression (zstd and br need requirements-compression.txt)
+    COMPRESS_ENCODINGS = ['zstd', 'br', 'gzip']
+    COMPRESS_LEVELS = {'gzip': 6, 'br': 5, 'zstd': 3}
+    COMPRESS_MIN_SIZE = 1024  # Smaller bodies are sent as is
+    COMPRESS_MIMETYPES = ['application/json', 'text/csv', 'text/plain']
+    COMPRESS_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Compressed bodies kept per worker for reuse
+    COMPRESS_CACHE_MAX_ENTRY_BYTES = 4 * 1024 * 1024
+    
+    # Cross-worker shared store (party list, tallies and dashboard counts in one mmap file)
+    SHARED_STORE_ENABLED = os.environ.get('SHARED_STORE_ENABLED', '1') == '1'
+    SHARED_STORE_PATH = os.environ.get('SHARED_STORE_PATH')  # Default: /dev/shm/votex-store-<MYSQL_DB>
+    SHARED_STORE_SIZE = 8 * 1024 * 1024
+    SHARED_STORE_REFRESH_SECONDS = 2  # Publisher refreshes at least this often
+    SHARED_STORE_MIN_INTERVAL_SECONDS = 0.25  # and at most this often when writes mark it dirty
+    SHARED_STORE_POLL_SECONDS = 0.05
+    SHARED_STORE_FULL_REFRESH_SECONDS = 300  # Tallies are recounted from scratch this often
+    SHARED_STORE_STATS_REFRESH_SECONDS = 10  # User counts for the admin dashboard
+    SHARED_STORE_SETTLE_SECONDS = 5  # Ballot ids older than this are folded into the running totals
+    SHARED_STORE_MAX_AGE_SECONDS = 10  # Older snapshots are ignored and requests query MySQL
+    SHARED_STORE_LEADER_RETRY_SECONDS = 1
+    PARTY_OWNER_CACHE_SIZE = 10000  # Party account -> party id entries kept per worker
+    
+    # Write-ahead ballot journal: votes are acked once fsynced locally and replayed into MySQL
+    BALLOT_JOURNAL_ENABLED = os.environ.get('BALLOT_JOURNAL_ENABLED', '0') == '1'
+    BALLOT_JOURNAL_DIR = os.environ.get('BALLOT_JOURNAL_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'journal')
+    BALLOT_JOURNAL_SEGMENT_BYTES = 16 * 1024 * 1024
+    BALLOT_JOURNAL_FSYNC_INTERVAL_MS = 2  # Group-commit window; 0 flushes as soon as a writer arrives
+    BALLOT_JOURNAL_ACK_TIMEOUT_SECONDS = 5  # Longer waits for the fsync fall back to writing MySQL directly
+    BALLOT_JOURNAL_REPLAY_INTERVAL_SECONDS = 0.2
+    BALLOT_JOURNAL_REPLAY_BATCH_SIZE = 500  # Ballots applied per transaction
+    BALLOT_JOURNAL_ADOPT_INTERVAL_SECONDS = 30  # How often slots left by dead workers are drained
+    
+    # Rate Limiting (token buckets shared by all workers on the host)
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+    RATE_LIMIT_PATH = os.environ.get('RATE_LIMIT_PATH')  # Default: /dev/shm/votex-ratelimit-<MYSQL_DB>
+    RATE_LIMIT_SLOTS = 65536  # Buckets tracked at once (32 bytes each)
+    RATE_LIMIT_PROXY_HOPS = int(os.environ.get('RATE_LIMIT_PROXY_HOPS', 0))  # Trusted proxies setting X-Forwarded-For
+    # route -> {'ip' | 'account': (burst, seconds to refill the whole burst)}
+    RATE_LIMITS = {
+        'login': {'ip': (30, 60), 'account': (10, 300)},
+        'register': {'ip': (10, 600)},
+        'vote': {'ip': (120, 60), 'account': (5, 60)}
+    }
+    
+    # Readiness (/ready) and worker warm-up
+    READY_CACHE_SECONDS = 2  # Probes within this window reuse the last result
+    READY_DB_TIMEOUT_SECONDS = 1  # Max wait for a pooled connection during a probe
+    READY_MAX_POOL_WAITING = REQUEST_THREADS // 2  # Not ready while more threads than this wait for a connection
+    READY_MAX_ADMISSION_QUEUE = REQUEST_THREADS // 2  # Not ready while more critical requests than this are queued
+    READY_MAX_JOURNAL_LAG_SECONDS = 30  # Not ready while the oldest unreplayed journaled ballot is older than this
+    WARMUP_POOL_CONNECTIONS = REQUEST_THREADS  # Opened before a worker serves
+    
+    # Recount (flask recount)
+    RECOUNT_CHUNK_SIZE = 100000  # Rows per fetch in each worker
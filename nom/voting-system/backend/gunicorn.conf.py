@@ -0,0 +1,39 @@
+"""Gunicorn settings for production serving.
+
+Pre-forks WORKERS processes, each running THREADS request threads. The app
+is imported once in the master (preload_app) so workers start quickly and
+share its memory pages; every worker then builds its own DB pool after fork.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Requests mostly wait on MySQL, so a few threads per worker keep CPUs busy
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+preload_app = True
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then to cap slow memory growth, staggered so they don't restart together
+max_requests = 10000
+max_requests_jitter = 1000
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')
+errorlog = '-'
+
+def post_fork(server, worker):
+    # Sockets created before fork must never be shared between workers
+    from utils.db import mysql
+    mysql.reset_pool()
+
+def post_worker_init(worker):
+    # Runs before the worker accepts connections, so it only takes traffic once warm
+    from utils import readiness
+    # Job leases and journal replay must keep running even if the database is not up yet
+    readiness.start_background(worker.wsgi)
+    readiness.warm_up(worker.wsgi)
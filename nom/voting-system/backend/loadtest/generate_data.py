@@ -0,0 +1,257 @@
+"""Generate a large, reproducible data set for benchmarks and EXPLAIN checks.
+
+Fills users, parties, campaigns, votes and logs for the open election. The
+same --seed and sizes always produce the same rows on a freshly reset
+database:
+
+    docker compose -f loadtest/docker-compose.yml up -d --wait
+    python loadtest/generate_data.py --reset --voters 25000000 --turnout 0.8 --parties 12
+
+Party popularity follows a Zipf distribution (--skew), registrations span
+the year before the election, and ballots follow a day-long turnout curve.
+Every account shares one precomputed scrypt hash of loadtest/run.py's
+password, and the account naming matches the load-test harness, so the
+generated data also serves as its fixture. Rows are bulk-loaded with
+LOAD DATA LOCAL INFILE (--method load-data, which needs local_infile=ON on
+the server) or multi-row INSERTs (--method insert).
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from run import PASSWORD, ADMIN_EMAIL
+
+WORDS = (
+    'health education energy jobs housing transport water climate security trade farming '
+    'justice tax pension youth digital rail road school hospital river forest city village '
+    'reform future growth fair green safe open local national free strong community'
+).split()
+
+ACTIONS = ['User logged in', 'User logged out', 'Vote cast', 'Party updated', 'Campaign created']
+
+# Share of the day's ballots cast in each hour (polls 07:00-22:00, morning and evening peaks)
+HOURLY_TURNOUT = [0, 0, 0, 0, 0, 0, 0, 6, 9, 8, 6, 5, 6, 6, 5, 5, 6, 8, 10, 9, 6, 3, 2, 0]
+
+def scrypt_hash(password, salt, n=2 ** 15, r=8, p=1):
+    """A werkzeug-format scrypt hash with a fixed salt, so generated rows are reproducible"""
+    digest = hashlib.scrypt(password.encode(), salt=salt.encode(), n=n, r=r, p=p, maxmem=132 * n * r * p)
+    return f'scrypt:{n}:{r}:{p}${salt}${digest.hex()}'
+
+def format_time(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+def escape_field(value):
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+class Loader:
+    """Bulk-loads row iterators in batches through LOAD DATA or multi-row INSERTs"""
+    
+    def __init__(self, conn, method, batch_size):
+        self.conn = conn
+        self.method = method
+        self.batch_size = batch_size
+    
+    def load(self, table, columns, rows):
+        start = time.perf_counter()
+        total = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                total += self._flush(table, columns, batch)
+                batch = []
+        if batch:
+            total += self._flush(table, columns, batch)
+        self.conn.commit()
+        elapsed = time.perf_counter() - start
+        print(f'{table}: {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)')
+        return total
+    
+    def _flush(self, table, columns, batch):
+        cur = self.conn.cursor()
+        if self.method == 'load-data':
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.tsv', delete=False) as f:
+                for row in batch:
+                    f.write('\t'.join(escape_field(value) for value in row) + '\n')
+            try:
+                cur.execute(f"""
+                    LOAD DATA LOCAL INFILE %s INTO TABLE {table}
+                    CHARACTER SET utf8mb4
+                    FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'
+                    LINES TERMINATED BY '\\n'
+                    ({', '.join(columns)})
+                """, (f.name,))
+            finally:
+                os.unlink(f.name)
+        else:
+            # PyMySQL rewrites this into one multi-row INSERT per batch
+            cur.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})",
+                batch
+            )
+        self.conn.commit()
+        cur.close()
+        return len(batch)
+
+def random_text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+def generate(args, conn):
+    rng = random.Random(args.seed)
+    loader = Loader(conn, args.method, args.batch_size)
+    cur = conn.cursor()
+    
+    cur.execute("SELECT id, opened_at FROM elections WHERE status = 'open' ORDER BY id DESC LIMIT 1")
+    election = cur.fetchone()
+    if not election:
+        cur.execute("INSERT INTO elections (name) VALUES ('Generated election')")
+        conn.commit()
+        cur.execute("SELECT id, opened_at FROM elections WHERE id = %s", (cur.lastrowid,))
+        election = cur.fetchone()
+    election_id = election[0]
+    
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM users")
+    first_user_id = cur.fetchone()[0] + 1
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM parties")
+    first_party_id = cur.fetchone()[0] + 1
+    cur.close()
+    
+    password_hash = scrypt_hash(PASSWORD, f'votex{args.seed:011d}')
+    election_day = datetime(2024, 11, 5) if not args.election_day else datetime.fromisoformat(args.election_day)
+    registration_start = election_day - timedelta(days=365)
+    
+    # Layout: admin, then one account per party, then the voters
+    admin_id = first_user_id
+    party_user_ids = range(first_user_id + 1, first_user_id + 1 + args.parties)
+    first_voter_id = first_user_id + 1 + args.parties
+    party_ids = list(range(first_party_id, first_party_id + args.parties))
+    
+    # Zipf popularity: the k-th party is chosen with weight 1 / k^skew
+    weights = [1 / (rank ** args.skew) for rank in range(1, args.parties + 1)]
+    total_weight = sum(weights)
+    cumulative = []
+    running = 0.0
+    for weight in weights:
+        running += weight / total_weight
+        cumulative.append(running)
+    
+    hour_weights = []
+    running = 0
+    for share in HOURLY_TURNOUT:
+        running += share
+        hour_weights.append(running)
+    
+    def voter_turnout():
+        # A fresh generator per pass, so the users and votes passes see the same ballots
+        vote_rng = random.Random(args.seed + 1)
+        for offset in range(args.voters):
+            if vote_rng.random() < args.turnout:
+                hour = vote_rng.choices(range(24), cum_weights=hour_weights)[0]
+                voted_at = election_day + timedelta(hours=hour, seconds=vote_rng.randrange(3600))
+                party_id = party_ids[vote_rng.choices(range(args.parties), cum_weights=cumulative)[0]]
+                yield offset, party_id, voted_at
+            else:
+                yield offset, None, None
+    
+    def users():
+        yield admin_id, 'Load Test Admin', ADMIN_EMAIL, password_hash, 'admin', None, format_time(registration_start)
+        for i, user_id in enumerate(party_user_ids):
+            created_at = registration_start + timedelta(seconds=rng.randrange(86400 * 30))
+            yield user_id, f'Load Party User {i}', f'loadtest-party-{i}@example.test', password_hash, 'party', None, format_time(created_at)
+        for offset, party_id, _ in voter_turnout():
+            created_at = registration_start + timedelta(seconds=rng.randrange(86400 * 364))
+            yield (first_voter_id + offset, f'Load Voter {offset}', f'loadtest-voter-{offset}@example.test',
+                   password_hash, 'voter', election_id if party_id else None, format_time(created_at))
+    
+    loader.load('users', ['id', 'name', 'email', 'password_hash', 'role', 'voted_election_id', 'created_at'], users())
+    
+    loader.load('parties', ['id', 'name', 'description', 'logo_url', 'created_by', 'created_at'], (
+        (party_id, f'Load Test Party {i}', random_text(rng, 30), '🎯', party_user_ids[i],
+         format_time(registration_start + timedelta(days=30 + i)))
+        for i, party_id in enumerate(party_ids)
+    ))
+    
+    loader.load('campaigns', ['party_id', 'title', 'description', 'image_url', 'created_at'], (
+        (party_id, random_text(rng, 4).title(), random_text(rng, 60), '📢',
+         format_time(registration_start + timedelta(seconds=rng.randrange(86400 * 364))))
+        for party_id in party_ids
+        for _ in range(args.campaigns_per_party)
+    ))
+    
+    loader.load('votes', ['election_id', 'voter_id', 'party_id', 'voted_at'], (
+        (election_id, first_voter_id + offset, party_id, format_time(voted_at))
+        for offset, party_id, voted_at in voter_turnout()
+        if party_id is not None
+    ))
+    
+    log_rng = random.Random(args.seed + 2)
+    log_window = int((election_day + timedelta(days=1) - registration_start).total_seconds())
+    loader.load('logs', ['action', 'user_id', 'details', 'created_at'], (
+        (log_rng.choice(ACTIONS), first_voter_id + log_rng.randrange(max(args.voters, 1)), 'Generated',
+         format_time(registration_start + timedelta(seconds=log_rng.randrange(log_window))))
+        for _ in range(args.logs)
+    ))
+
+def reset(conn):
+    """Empty the generated tables (elections are kept) so ids start from 1 again"""
+    cur = conn.cursor()
+    cur.execute("SET FOREIGN_KEY_CHECKS = 0")
+    for table in ['votes', 'logs', 'campaigns', 'parties', 'jobs', 'users']:
+        cur.execute(f"TRUNCATE TABLE {table}")
+    cur.execute("SET FOREIGN_KEY_CHECKS = 1")
+    conn.commit()
+    cur.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--voters', type=int, default=1000000)
+    parser.add_argument('--parties', type=int, default=12)
+    parser.add_argument('--campaigns-per-party', type=int, default=50)
+    parser.add_argument('--turnout', type=float, default=0.8, help='Share of voters with a ballot in the open election')
+    parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent of party popularity')
+    parser.add_argument('--logs', type=int, default=1000000)
+    parser.add_argument('--election-day', default=None, help='Date ballots are cast on (default 2024-11-05)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--method', choices=['load-data', 'insert'], default='load-data')
+    parser.add_argument('--batch-size', type=int, default=50000)
+    parser.add_argument('--reset', action='store_true', help='Truncate users, parties, campaigns, votes, logs and jobs first')
+    parser.add_argument('--mysql-host', default='127.0.0.1')
+    parser.add_argument('--mysql-port', type=int, default=3307)
+    parser.add_argument('--mysql-user', default='root')
+    parser.add_argument('--mysql-password', default='loadtest')
+    parser.add_argument('--mysql-db', default='voting_system')
+    args = parser.parse_args()
+    
+    if args.parties < 1:
+        parser.error('--parties must be at least 1')
+    
+    import pymysql
+    conn = pymysql.connect(host=args.mysql_host, port=args.mysql_port, user=args.mysql_user,
+                           password=args.mysql_password, database=args.mysql_db, charset='utf8mb4',
+                           autocommit=False, local_infile=args.method == 'load-data')
+    try:
+        if args.reset:
+            reset(conn)
+            
+            # Rows generated into empty tables are consistent by construction; skip per-row checks
+            cur = conn.cursor()
+            cur.execute("SET SESSION unique_checks = 0, foreign_key_checks = 0")
+            cur.close()
+        
+        start = time.perf_counter()
+        generate(args, conn)
+        print(f'done in {time.perf_counter() - start:.1f}s')
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    main()
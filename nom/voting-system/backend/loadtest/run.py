@@ -0,0 +1,362 @@
+"""Election-day load test: mixed traffic against the app and a local MySQL.
+
+Start the database, then run a scenario. The harness seeds its own
+accounts, opens a fresh election, drives the app with concurrent clients
+and reports throughput and p50/p95/p99 per endpoint:
+
+    docker compose -f loadtest/docker-compose.yml up -d --wait
+    python loadtest/run.py --scenario election_day --duration 60 --start-server
+    python loadtest/run.py --scenario election_day --save-baseline
+    python loadtest/run.py --scenario election_day --compare        # exits 1 on regression
+
+--start-server runs `gunicorn -c gunicorn.conf.py wsgi:app` pointed at the
+container with rate limiting off, since every simulated client shares one
+IP; without it an already running server at --base-url is used and must
+talk to the same database and run with RATE_LIMIT_ENABLED=0. Baselines are JSON files under
+loadtest/baselines/ and are specific to the machine that recorded them.
+"""
+import argparse
+import http.client
+import json
+import os
+import queue
+import random
+import subprocess
+import sys
+import threading
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(BACKEND_DIR, 'loadtest', 'baselines')
+
+PASSWORD = 'loadtest-password'
+ADMIN_EMAIL = 'loadtest-admin@example.test'
+
+# Client threads per role; each role loops until the run ends
+SCENARIOS = {
+    'smoke': {'login_burst': 2, 'voters': 4, 'pollers': 2, 'admins': 1},
+    'election_day': {'login_burst': 20, 'voters': 60, 'pollers': 40, 'admins': 2},
+    'vote_surge': {'login_burst': 0, 'voters': 150, 'pollers': 10, 'admins': 1},
+    'results_night': {'login_burst': 0, 'voters': 10, 'pollers': 150, 'admins': 4}
+}
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+class Client:
+    """One keep-alive HTTP connection with its own session cookie"""
+    
+    def __init__(self, base_url, recorder):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.recorder = recorder
+        self.cookie = None
+        self.conn = None
+    
+    def request(self, name, method, path, body=None):
+        headers = {'Connection': 'keep-alive'}
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        
+        start = time.perf_counter()
+        status = 0
+        data = b''
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            data = response.read()
+            status = response.status
+            set_cookie = response.getheader('Set-Cookie')
+            if set_cookie:
+                morsel = SimpleCookie(set_cookie).get('session')
+                if morsel:
+                    self.cookie = f'session={morsel.value}'
+        except (OSError, http.client.HTTPException):
+            self.close()
+        self.recorder.record(name, time.perf_counter() - start, status)
+        return status, data
+    
+    def login(self, email):
+        status, _ = self.request('auth.login', 'POST', '/api/auth/login', {'email': email, 'password': PASSWORD})
+        return status == 200
+    
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+class Recorder:
+    """Collects (endpoint, latency, status) samples from every client thread"""
+    
+    def __init__(self):
+        self.samples = {}
+        self.lock = threading.Lock()
+        self.recording = False
+    
+    def record(self, name, seconds, status):
+        if not self.recording:
+            return
+        with self.lock:
+            self.samples.setdefault(name, []).append((seconds, status))
+    
+    def report(self, duration):
+        endpoints = {}
+        for name, samples in sorted(self.samples.items()):
+            latencies = sorted(seconds for seconds, status in samples if 0 < status < 400)
+            errors = sum(1 for _, status in samples if status == 0 or status >= 400)
+            endpoints[name] = {
+                'requests': len(samples),
+                'errors': errors,
+                'error_rate': errors / len(samples),
+                'throughput': len(latencies) / duration,
+                'p50_ms': percentile(latencies, 0.50) * 1000,
+                'p95_ms': percentile(latencies, 0.95) * 1000,
+                'p99_ms': percentile(latencies, 0.99) * 1000
+            }
+        return endpoints
+
+def seed(args):
+    """Create the harness's admin, party and voter accounts if they are missing"""
+    import pymysql
+    from werkzeug.security import generate_password_hash
+    
+    # One hash shared by every account keeps seeding fast; logins still pay for scrypt
+    password_hash = generate_password_hash(PASSWORD)
+    conn = pymysql.connect(host=args.mysql_host, port=args.mysql_port, user=args.mysql_user,
+                           password=args.mysql_password, database=args.mysql_db, autocommit=False)
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT IGNORE INTO users (name, email, password_hash, role) VALUES (%s, %s, %s, 'admin')",
+            ('Load Test Admin', ADMIN_EMAIL, password_hash)
+        )
+        for start in range(0, args.voters, 1000):
+            cur.executemany(
+                "INSERT IGNORE INTO users (name, email, password_hash, role) VALUES (%s, %s, %s, 'voter')",
+                [(f'Load Voter {i}', f'loadtest-voter-{i}@example.test', password_hash)
+                 for i in range(start, min(start + 1000, args.voters))]
+            )
+        for i in range(args.parties):
+            email = f'loadtest-party-{i}@example.test'
+            cur.execute(
+                "INSERT IGNORE INTO users (name, email, password_hash, role) VALUES (%s, %s, %s, 'party')",
+                (f'Load Party User {i}', email, password_hash)
+            )
+            cur.execute("""
+                INSERT IGNORE INTO parties (name, description, logo_url, created_by)
+                SELECT %s, %s, '🎯', id FROM users WHERE email = %s
+            """, (f'Load Test Party {i}', 'Seeded by loadtest/run.py', email))
+        conn.commit()
+        
+        cur.execute("SELECT id FROM parties WHERE name LIKE 'Load Test Party %' AND deleted_at IS NULL")
+        party_ids = [row[0] for row in cur.fetchall()]
+        cur.close()
+    finally:
+        conn.close()
+    return party_ids
+
+def open_election(base_url):
+    """Start every run from an empty ballot box so each seeded voter can vote once"""
+    client = Client(base_url, Recorder())
+    if not client.login(ADMIN_EMAIL):
+        raise SystemExit('Could not log in as the load-test admin')
+    status, data = client.request('admin.reset', 'POST', '/api/admin/reset', {'name': 'Load test', 'purge_previous': True})
+    client.close()
+    if status != 200:
+        raise SystemExit(f'Could not open a new election: {status} {data[:200]!r}')
+
+def login_burst_worker(client, stop_at, voters):
+    # Logins only; scrypt verification makes this the CPU-heavy part of the morning rush
+    while time.perf_counter() < stop_at:
+        client.cookie = None
+        client.login(f'loadtest-voter-{random.randrange(voters)}@example.test')
+
+def voter_worker(client, stop_at, ballot_queue, party_ids):
+    # Each voter logs in, looks around, votes once and leaves; then the thread takes the next voter
+    while time.perf_counter() < stop_at:
+        try:
+            email = ballot_queue.get_nowait()
+        except queue.Empty:
+            return
+        client.cookie = None
+        if not client.login(email):
+            continue
+        client.request('voter.get_parties', 'GET', '/api/voter/parties')
+        client.request('voter.get_status', 'GET', '/api/voter/status')
+        client.request('voter.cast_vote', 'POST', '/api/voter/vote', {'party_id': random.choice(party_ids)})
+        client.request('auth.logout', 'POST', '/api/auth/logout')
+
+def poller_worker(client, stop_at, voters, interval):
+    client.login(f'loadtest-voter-{random.randrange(voters)}@example.test')
+    while time.perf_counter() < stop_at:
+        client.request('voter.get_parties', 'GET', '/api/voter/parties')
+        time.sleep(random.uniform(0, interval * 2))
+
+def admin_worker(client, stop_at, export_every):
+    client.login(ADMIN_EMAIL)
+    next_export = time.perf_counter() + random.uniform(0, export_every)
+    while time.perf_counter() < stop_at:
+        client.request('admin.get_stats', 'GET', '/api/admin/stats')
+        if time.perf_counter() >= next_export:
+            client.request('admin.export_votes', 'GET', '/api/admin/export/votes')
+            next_export = time.perf_counter() + export_every
+        time.sleep(1)
+
+def run_scenario(args, party_ids):
+    roles = SCENARIOS[args.scenario]
+    recorder = Recorder()
+    
+    ballot_queue = queue.Queue()
+    order = list(range(args.voters))
+    random.shuffle(order)
+    for i in order:
+        ballot_queue.put(f'loadtest-voter-{i}@example.test')
+    
+    stop_at = time.perf_counter() + args.warmup + args.duration
+    workers = []
+    for role, count in roles.items():
+        for _ in range(count):
+            client = Client(args.base_url, recorder)
+            if role == 'login_burst':
+                target = (login_burst_worker, (client, stop_at, args.voters))
+            elif role == 'voters':
+                target = (voter_worker, (client, stop_at, ballot_queue, party_ids))
+            elif role == 'pollers':
+                target = (poller_worker, (client, stop_at, args.voters, args.poll_interval))
+            else:
+                target = (admin_worker, (client, stop_at, args.export_every))
+            workers.append((threading.Thread(target=target[0], args=target[1], daemon=True), client))
+    
+    for thread, _ in workers:
+        thread.start()
+    
+    # Samples from the warm-up period are dropped
+    time.sleep(args.warmup)
+    recorder.recording = True
+    started = time.perf_counter()
+    for thread, _ in workers:
+        thread.join(max(0.0, stop_at - time.perf_counter()) + 60)
+    recorder.recording = False
+    elapsed = min(time.perf_counter() - started, args.duration) or args.duration
+    
+    for _, client in workers:
+        client.close()
+    
+    if ballot_queue.empty():
+        print('note: every seeded voter voted before the end; raise --voters for a longer surge')
+    return recorder.report(elapsed)
+
+def print_report(scenario, endpoints):
+    print(f'scenario: {scenario}')
+    print(f"{'endpoint':24s} {'requests':>9s} {'errors':>7s} {'req/s':>8s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s}")
+    for name, stats in endpoints.items():
+        print(f"{name:24s} {stats['requests']:9d} {stats['errors']:7d} {stats['throughput']:8.1f} "
+              f"{stats['p50_ms']:8.1f} {stats['p95_ms']:8.1f} {stats['p99_ms']:8.1f}")
+
+def compare(baseline, endpoints, threshold):
+    """Return one message per endpoint metric that regressed past the threshold"""
+    regressions = []
+    for name, base in baseline['endpoints'].items():
+        current = endpoints.get(name)
+        if current is None:
+            regressions.append(f'{name}: no requests completed')
+            continue
+        for metric in ['p95_ms', 'p99_ms']:
+            if base[metric] and current[metric] > base[metric] * (1 + threshold):
+                regressions.append(f'{name}: {metric} {current[metric]:.1f} vs baseline {base[metric]:.1f}')
+        if base['throughput'] and current['throughput'] < base['throughput'] * (1 - threshold):
+            regressions.append(f"{name}: throughput {current['throughput']:.1f} vs baseline {base['throughput']:.1f} req/s")
+        if current['error_rate'] > base['error_rate'] + 0.01:
+            regressions.append(f"{name}: error rate {current['error_rate']:.2%} vs baseline {base['error_rate']:.2%}")
+    return regressions
+
+def start_server(args):
+    env = dict(os.environ,
+               MYSQL_HOST=args.mysql_host, MYSQL_PORT=str(args.mysql_port), MYSQL_USER=args.mysql_user,
+               MYSQL_PASSWORD=args.mysql_password, MYSQL_DB=args.mysql_db,
+               RATE_LIMIT_ENABLED='0')
+    parts = urlsplit(args.base_url)
+    env['GUNICORN_BIND'] = f'{parts.hostname}:{parts.port or 80}'
+    server = subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'], cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.perf_counter() + 30
+    while time.perf_counter() < deadline:
+        try:
+            conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=1)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return server
+        except OSError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise SystemExit('Server did not come up within 30 seconds')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='election_day')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--start-server', action='store_true', help='Run gunicorn against the test database')
+    parser.add_argument('--duration', type=float, default=60)
+    parser.add_argument('--warmup', type=float, default=5)
+    parser.add_argument('--voters', type=int, default=20000, help='Seeded voter accounts (each votes once per run)')
+    parser.add_argument('--parties', type=int, default=8)
+    parser.add_argument('--poll-interval', type=float, default=2, help='Mean seconds between party list polls')
+    parser.add_argument('--export-every', type=float, default=15, help='Seconds between admin vote exports')
+    parser.add_argument('--mysql-host', default='127.0.0.1')
+    parser.add_argument('--mysql-port', type=int, default=3307)
+    parser.add_argument('--mysql-user', default='root')
+    parser.add_argument('--mysql-password', default='loadtest')
+    parser.add_argument('--mysql-db', default='voting_system')
+    parser.add_argument('--save-baseline', action='store_true', help='Store this run as the scenario baseline')
+    parser.add_argument('--compare', action='store_true', help='Fail if this run regressed against the baseline')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed relative regression (0.2 = 20%%)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    
+    random.seed(args.seed)
+    party_ids = seed(args)
+    
+    server = start_server(args) if args.start_server else None
+    try:
+        open_election(args.base_url)
+        endpoints = run_scenario(args, party_ids)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+    
+    print_report(args.scenario, endpoints)
+    
+    baseline_path = os.path.join(BASELINE_DIR, f'{args.scenario}.json')
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path, 'w') as f:
+            json.dump({'scenario': args.scenario, 'duration': args.duration, 'endpoints': endpoints}, f, indent=2)
+        print(f'baseline saved to {baseline_path}')
+    
+    if args.compare:
+        if not os.path.exists(baseline_path):
+            raise SystemExit(f'No baseline at {baseline_path}; run with --save-baseline first')
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, endpoints, args.threshold)
+        for message in regressions:
+            print(f'REGRESSION {message}')
+        if regressions:
+            sys.exit(1)
+        print(f'no regressions beyond {args.threshold:.0%} against {baseline_path}')
+
+if __name__ == '__main__':
+    main()
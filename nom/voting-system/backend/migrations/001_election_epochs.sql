@@ -0,0 +1,43 @@
+-- Key votes and voter participation by election so a reset only opens a new election.
+-- Run once against an existing voting_system database created from the old schema.
+USE voting_system;
+
+CREATE TABLE elections (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    status ENUM('open', 'closed', 'purged') NOT NULL DEFAULT 'open',
+    opened_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    closed_at TIMESTAMP NULL DEFAULT NULL,
+    INDEX idx_status (status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    status ENUM('pending', 'running', 'completed', 'failed') NOT NULL DEFAULT 'pending',
+    progress TEXT,
+    error TEXT,
+    created_by INT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE SET NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT INTO elections (id, name) VALUES (1, 'Election 1');
+
+-- Existing ballots belong to the first election
+ALTER TABLE votes
+    ADD COLUMN election_id INT NOT NULL DEFAULT 1 AFTER id,
+    ADD INDEX idx_voter_id (voter_id),
+    ADD INDEX idx_election_party (election_id, party_id),
+    ADD CONSTRAINT fk_votes_election FOREIGN KEY (election_id) REFERENCES elections(id);
+
+ALTER TABLE votes
+    DROP INDEX unique_vote,
+    ADD UNIQUE KEY unique_vote (election_id, voter_id),
+    ALTER COLUMN election_id DROP DEFAULT;
+
+-- Participation is "voted in the open election" instead of a flag that must be cleared
+ALTER TABLE users ADD COLUMN voted_election_id INT DEFAULT NULL AFTER has_voted;
+UPDATE users SET voted_election_id = 1 WHERE has_voted = TRUE;
+ALTER TABLE users DROP COLUMN has_voted;
@@ -0,0 +1,5 @@
+-- Allow elections to be marked as archived once their rows move to cold storage.
+USE voting_system;
+
+ALTER TABLE elections
+    MODIFY status ENUM('open', 'closed', 'purged', 'archived') NOT NULL DEFAULT 'open';
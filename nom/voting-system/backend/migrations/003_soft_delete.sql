@@ -0,0 +1,5 @@
+-- Users and parties are hidden immediately on delete and removed by a chunked background job.
+USE voting_system;
+
+ALTER TABLE users ADD COLUMN deleted_at TIMESTAMP NULL DEFAULT NULL AFTER created_at;
+ALTER TABLE parties ADD COLUMN deleted_at TIMESTAMP NULL DEFAULT NULL AFTER created_at;
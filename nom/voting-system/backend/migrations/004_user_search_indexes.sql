@@ -0,0 +1,6 @@
+-- Indexes behind paginated user search and filtering in /api/admin/users.
+USE voting_system;
+
+ALTER TABLE users
+    ADD INDEX idx_name (name),
+    ADD INDEX idx_voted_election (voted_election_id);
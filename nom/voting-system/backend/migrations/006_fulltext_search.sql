@@ -0,0 +1,7 @@
+-- FULLTEXT indexes behind /api/voter/search. InnoDB maintains them on every
+-- insert and update, so new campaigns and edited parties are searchable at once.
+USE voting_system;
+
+ALTER TABLE campaigns ADD FULLTEXT INDEX ft_campaign_text (title, description);
+
+ALTER TABLE parties ADD FULLTEXT INDEX ft_party_text (name, description);
@@ -0,0 +1,8 @@
+-- Indexes behind keyset pagination of the campaign lists on (created_at, id).
+-- InnoDB appends the primary key to secondary indexes, so both already end in id.
+USE voting_system;
+
+ALTER TABLE campaigns
+    ADD INDEX idx_party_created (party_id, created_at),
+    ADD INDEX idx_created (created_at),
+    DROP INDEX idx_party_id;
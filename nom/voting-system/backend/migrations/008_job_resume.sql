@@ -0,0 +1,7 @@
+-- Jobs keep their arguments and a lease so a job left by a stopped worker can be resumed.
+USE voting_system;
+
+ALTER TABLE jobs
+    ADD COLUMN args TEXT AFTER kind,
+    ADD COLUMN lease_expires_at TIMESTAMP NULL DEFAULT NULL AFTER status,
+    ADD INDEX idx_status_lease (status, lease_expires_at);
@@ -8,10 +8,23 @@ CREATE TABLE users (
     email VARCHAR(100) UNIQUE NOT NULL,
     password_hash VARCHAR(255) NOT NULL,
     role ENUM('voter', 'party', 'admin') NOT NULL DEFAULT 'voter',
-    has_voted BOOLEAN DEFAULT FALSE,
+    voted_election_id INT DEFAULT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    deleted_at TIMESTAMP NULL DEFAULT NULL,
     INDEX idx_email (email),
-    INDEX idx_role (role)
+    INDEX idx_name (name),
+    INDEX idx_role (role),
+    INDEX idx_voted_election (voted_election_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Elections Table (votes and voter participation are keyed by election)
+CREATE TABLE elections (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    status ENUM('open', 'closed', 'purged', 'archived') NOT NULL DEFAULT 'open',
+    opened_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    closed_at TIMESTAMP NULL DEFAULT NULL,
+    INDEX idx_status (status)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Parties Table
@@ -22,8 +35,10 @@ CREATE TABLE parties (
     logo_url VARCHAR(255) DEFAULT '🎯',
     created_by INT NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    deleted_at TIMESTAMP NULL DEFAULT NULL,
     FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE CASCADE,
-    INDEX idx_created_by (created_by)
+    INDEX idx_created_by (created_by),
+    FULLTEXT INDEX ft_party_text (name, description)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Campaigns Table
@@ -35,18 +50,24 @@ CREATE TABLE campaigns (
     image_url VARCHAR(255) DEFAULT '📢',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (party_id) REFERENCES parties(id) ON DELETE CASCADE,
-    INDEX idx_party_id (party_id)
+    INDEX idx_party_created (party_id, created_at),
+    INDEX idx_created (created_at),
+    FULLTEXT INDEX ft_campaign_text (title, description)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Votes Table
 CREATE TABLE votes (
     id INT AUTO_INCREMENT PRIMARY KEY,
+    election_id INT NOT NULL,
     voter_id INT NOT NULL,
     party_id INT NOT NULL,
     voted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (election_id) REFERENCES elections(id),
     FOREIGN KEY (voter_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (party_id) REFERENCES parties(id) ON DELETE CASCADE,
-    UNIQUE KEY unique_vote (voter_id),
+    UNIQUE KEY unique_vote (election_id, voter_id),
+    INDEX idx_election_party (election_id, party_id),
+    INDEX idx_voter_id (voter_id),
     INDEX idx_party_id (party_id),
     INDEX idx_voted_at (voted_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -63,6 +84,34 @@ CREATE TABLE logs (
     INDEX idx_created_at (created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Polling Stations Table (kiosks that upload signed ballot batches)
+CREATE TABLE polling_stations (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(100) UNIQUE NOT NULL,
+    api_secret VARCHAR(64) NOT NULL,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Jobs Table (progress of background maintenance jobs)
+CREATE TABLE jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    args TEXT,
+    status ENUM('pending', 'running', 'completed', 'failed') NOT NULL DEFAULT 'pending',
+    lease_expires_at TIMESTAMP NULL DEFAULT NULL,
+    progress TEXT,
+    error TEXT,
+    created_by INT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE SET NULL,
+    INDEX idx_status_lease (status, lease_expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Open The First Election
+INSERT INTO elections (name) VALUES ('Election 1');
+
 -- Insert Default Admin User (Password: admin123)
 INSERT INTO users (name, email, password_hash, role) VALUES 
 ('System Admin', 'admin@voting.com', 'scrypt:32768:8:1$vJ8xQZ5PqKXYzFHc$dc8e3b3f5c6e1f0a7d8f2e9c3b4a6d5e7f1c2b8a9e0d3c5f4b7a8e1d2c6f9b0a3e5c7d1f4b8a2e6c9d0f3b5a8e1c4d7', 'admin');
@@ -0,0 +1,97 @@
+"""The ASGI voter app must hand its aiomysql connections back to the pool for reuse."""
+import pytest
+
+pytest.importorskip('aiomysql')
+pytest.importorskip('starlette')
+
+import aiomysql.pool
+from starlette.testclient import TestClient
+import asgi_voter
+
+class FakeReader:
+    eof_received = False
+    
+    def at_eof(self):
+        return False
+    
+    def exception(self):
+        return None
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        return False
+    
+    async def execute(self, query, args=None):
+        # Like MySQL: outside autocommit any statement opens a transaction
+        self.connection.in_transaction = not self.connection.autocommit
+        if 'FROM elections' in query:
+            self.rows = [{'id': 1}]
+        elif 'FROM users' in query:
+            self.rows = [{'voted_election_id': None}]
+        else:
+            self.rows = []
+    
+    async def fetchone(self):
+        return self.rows[0] if self.rows else None
+    
+    async def fetchall(self):
+        return self.rows
+
+class FakeConnection:
+    def __init__(self, autocommit):
+        self.autocommit = autocommit
+        self.in_transaction = False
+        self.closed = False
+        self.last_usage = 0
+        self._reader = FakeReader()
+    
+    def cursor(self, cursor_class=None):
+        return FakeCursor(self)
+    
+    def get_transaction_status(self):
+        return self.in_transaction
+    
+    def close(self):
+        self.closed = True
+    
+    async def ensure_closed(self):
+        self.closed = True
+
+@pytest.fixture
+def connections(monkeypatch):
+    opened = []
+    
+    async def connect(**kwargs):
+        connection = FakeConnection(kwargs.get('autocommit', False))
+        opened.append(connection)
+        return connection
+    
+    monkeypatch.setattr(aiomysql.pool, 'connect', connect)
+    return opened
+
+def voter_cookie(**session):
+    return asgi_voter.session_serializer.dumps({'user_id': 1, 'role': 'voter', **session})
+
+def test_pool_reuses_connection_after_requests(connections):
+    with TestClient(asgi_voter.app) as client:
+        client.cookies.set(asgi_voter.SESSION_COOKIE_NAME, voter_cookie())
+        for _ in range(3):
+            response = client.get('/api/voter/parties')
+            assert response.status_code == 200
+            assert asgi_voter.pool.freesize == asgi_voter.pool.size == 1
+    
+    assert len(connections) == 1
+
+def test_status_reports_journaled_vote_as_pending(connections):
+    with TestClient(asgi_voter.app) as client:
+        client.cookies.set(asgi_voter.SESSION_COOKIE_NAME, voter_cookie(voted_election_id=1))
+        response = client.get('/api/voter/status')
+    
+    assert response.json() == {'hasVoted': True, 'pending': True, 'votedParty': None}
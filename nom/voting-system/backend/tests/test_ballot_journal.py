@@ -0,0 +1,82 @@
+"""Replaying journaled ballots against an in-memory stand-in for MySQL."""
+import json
+import re
+import sqlite3
+from types import SimpleNamespace
+import pytest
+from utils import ballot_journal
+
+SCHEMA = """
+    CREATE TABLE elections (id INTEGER PRIMARY KEY, status TEXT);
+    CREATE TABLE parties (id INTEGER PRIMARY KEY, deleted_at TEXT);
+    CREATE TABLE users (id INTEGER PRIMARY KEY, voted_election_id INTEGER, deleted_at TEXT);
+    CREATE TABLE votes (id INTEGER PRIMARY KEY, election_id INTEGER, voter_id INTEGER, party_id INTEGER, voted_at TEXT);
+    CREATE TABLE logs (id INTEGER PRIMARY KEY, action TEXT, user_id INTEGER, details TEXT);
+    INSERT INTO elections VALUES (1, 'open');
+    INSERT INTO parties VALUES (1, NULL), (2, NULL);
+    INSERT INTO users VALUES (10, NULL, NULL);
+"""
+
+class SQLiteCursor:
+    """Just enough of a MySQLdb DictCursor for apply_ballots"""
+    
+    def __init__(self, db):
+        self.cursor = db.cursor()
+    
+    def _translate(self, query):
+        return re.sub(r'LOCK IN SHARE MODE|FOR UPDATE', '', query).replace('%s', '?')
+    
+    def execute(self, query, args=()):
+        self.cursor.execute(self._translate(query), args)
+    
+    def executemany(self, query, args):
+        self.cursor.executemany(self._translate(query), [[str(value) for value in row] for row in args])
+    
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        return dict(row) if row else None
+    
+    def fetchall(self):
+        return [dict(row) for row in self.cursor.fetchall()]
+    
+    def close(self):
+        self.cursor.close()
+
+class SQLiteConnection:
+    def __init__(self, db):
+        self.db = db
+    
+    def cursor(self, cursor_class=None):
+        return SQLiteCursor(self.db)
+    
+    def commit(self):
+        self.db.commit()
+
+@pytest.fixture
+def db(monkeypatch):
+    db = sqlite3.connect(':memory:')
+    db.row_factory = sqlite3.Row
+    db.executescript(SCHEMA)
+    monkeypatch.setattr(ballot_journal, 'mysql', SimpleNamespace(connection=SQLiteConnection(db)))
+    return db
+
+def rows(db, query):
+    return [tuple(row) for row in db.execute(query)]
+
+def write_segment(directory, ballots):
+    with open(ballot_journal.segment_path(directory, 1), 'wb') as segment:
+        for ballot in ballots:
+            segment.write(ballot_journal.encode_record(json.dumps(ballot).encode('utf-8')))
+
+def test_duplicate_ballot_in_segment_is_logged(db, tmp_path):
+    write_segment(str(tmp_path), [[1, 10, 1, 1700000000.0], [1, 10, 2, 1700000001.0]])
+    
+    replayed = ballot_journal.Replayer(str(tmp_path)).replay(ballot_journal.apply_ballots)
+    
+    assert replayed == 2
+    assert rows(db, "SELECT voter_id, party_id FROM votes") == [(10, 1)]
+    assert rows(db, "SELECT action, user_id, details FROM logs ORDER BY id") == [
+        ('Vote cast for party ID: 1', 10, 'Replayed from ballot journal'),
+        ('Journaled vote for party ID: 2 not counted', 10, 'Duplicate ballot in journal')
+    ]
+    assert ballot_journal.segment_numbers(str(tmp_path)) == []
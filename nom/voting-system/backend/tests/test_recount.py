@@ -0,0 +1,108 @@
+"""Recount cross-checks against an SQLite stand-in for MySQL (WAL mode gives readers a snapshot)."""
+import re
+import sqlite3
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip('numpy')
+
+from app import create_app
+from utils import recount
+
+SCHEMA = """
+    CREATE TABLE elections (id INTEGER PRIMARY KEY, status TEXT);
+    CREATE TABLE parties (id INTEGER PRIMARY KEY, deleted_at TEXT);
+    CREATE TABLE users (id INTEGER PRIMARY KEY, voted_election_id INTEGER);
+    CREATE TABLE votes (id INTEGER PRIMARY KEY, election_id INTEGER, voter_id INTEGER, party_id INTEGER);
+    INSERT INTO elections VALUES (1, 'open');
+    INSERT INTO parties VALUES (1, NULL), (2, NULL);
+    INSERT INTO users VALUES (1, 1), (2, NULL), (3, 1);
+    INSERT INTO votes VALUES (1, 1, 1, 1), (2, 1, 3, 2);
+"""
+
+class SQLiteCursor:
+    """A MySQLdb DictCursor, or a tuple cursor when a cursor class is asked for"""
+    
+    def __init__(self, connection, as_tuples):
+        self.connection = connection
+        self.cursor = connection.db.cursor()
+        self.as_tuples = as_tuples
+    
+    def execute(self, query, args=()):
+        query = query.replace('START TRANSACTION WITH CONSISTENT SNAPSHOT', 'BEGIN')
+        self.cursor.execute(re.sub(r'%s', '?', query), args)
+        self.connection.after_execute(query)
+    
+    def _row(self, row):
+        return tuple(row) if self.as_tuples else dict(row)
+    
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        return self._row(row) if row else None
+    
+    def fetchall(self):
+        return [self._row(row) for row in self.cursor.fetchall()]
+    
+    def fetchmany(self, size):
+        return [self._row(row) for row in self.cursor.fetchmany(size)]
+    
+    def close(self):
+        self.cursor.close()
+
+class SQLiteConnection:
+    def __init__(self, db, after_execute):
+        self.db = db
+        self.after_execute = after_execute
+    
+    def cursor(self, cursor_class=None):
+        return SQLiteCursor(self, as_tuples=cursor_class is not None)
+    
+    def rollback(self):
+        if self.db.in_transaction:
+            self.db.rollback()
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    path = str(tmp_path / 'votes.db')
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute('PRAGMA journal_mode=WAL')
+    writer.executescript(SCHEMA)
+    
+    reader = sqlite3.connect(path, isolation_level=None)
+    reader.row_factory = sqlite3.Row
+    hooks = []
+    connection = SQLiteConnection(reader, lambda query: [hook(query) for hook in hooks])
+    monkeypatch.setattr(recount, 'mysql', SimpleNamespace(connection=connection))
+    
+    with create_app().app_context():
+        yield writer, hooks
+
+def test_open_election_recount_ignores_ballots_cast_meanwhile(database):
+    writer, hooks = database
+    
+    def cast_vote(query):
+        # A voter casts a ballot after the served tallies were read
+        if 'COUNT(v.id)' in query and not writer.in_transaction:
+            writer.execute("INSERT INTO votes VALUES (3, 1, 2, 1)")
+            writer.execute("UPDATE users SET voted_election_id = 1 WHERE id = 2")
+    hooks.append(cast_vote)
+    
+    report = recount.recount(1)
+    
+    assert report['status'] == 'open'
+    assert report['tallies'] == {1: 1, 2: 1}
+    assert report['tally_mismatches'] == []
+    assert report['ballots_without_flag'] == report['flagged_without_ballot'] == 0
+    assert report['ok']
+    assert writer.execute("SELECT COUNT(*) FROM votes").fetchone() == (3,)
+
+def test_deleted_party_ballots_are_reported_apart(database):
+    writer, _ = database
+    writer.execute("UPDATE parties SET deleted_at = '2024-01-01' WHERE id = 2")
+    
+    report = recount.recount(1)
+    
+    assert report['tally_mismatches'] == []
+    assert report['deleted_party_ballots'] == {2: 1}
+    assert report['served_total'] == 1
+    assert report['ok']
@@ -0,0 +1,38 @@
+"""Validation of polling-station ballot batches before they reach the database."""
+import json
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from app import create_app
+from blueprints import station
+
+class FakeCursor:
+    def execute(self, query, args=None):
+        self.query = query
+    
+    def fetchone(self):
+        if 'FROM elections' in self.query:
+            return {'id': 1, 'opened_at': datetime(2024, 1, 1)}
+        return None
+    
+    def fetchall(self):
+        return []
+    
+    def close(self):
+        pass
+
+@pytest.fixture
+def client(monkeypatch):
+    app = create_app()
+    monkeypatch.setattr(station, '_verify_station', lambda: ({'id': 1, 'name': 'Kiosk'}, None))
+    monkeypatch.setattr(station, 'mysql', SimpleNamespace(connection=SimpleNamespace(cursor=FakeCursor)))
+    monkeypatch.setattr(station, 'log_action', lambda *args: None)
+    return app.test_client()
+
+@pytest.mark.parametrize('timestamp', [1e20, -1e20])
+def test_unrepresentable_timestamp_is_invalid(client, timestamp):
+    body = {'ballots': [{'voter_id': 1, 'party_id': 1, 'timestamp': timestamp}]}
+    response = client.post('/api/station/ballots', data=json.dumps(body))
+    
+    assert response.status_code == 200
+    assert response.get_json()['results'] == [{'index': 0, 'voter_id': None, 'status': 'invalid'}]
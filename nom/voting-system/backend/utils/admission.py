@@ -0,0 +1,129 @@
+import threading
+import time
+from functools import wraps
+from flask import jsonify
+from utils import metrics
+
+# Share of the current limit each priority may occupy; lower priorities are shed first
+PRIORITY_SHARES = {'critical': 1.0, 'normal': 0.8, 'low': 0.5}
+
+limiter = None
+retry_after_seconds = 1
+
+metrics.describe('votex_admission_rejections_total', 'Requests shed by admission control')
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit driven by observed DB latency.
+    
+    Every request that finishes under the latency target nudges the limit
+    up by 1/limit (about +1 per full window); a slow or failed one cuts it
+    by `decrease`, at most once per target interval so a burst of slow
+    completions counts as a single congestion signal.
+    """
+    
+    def __init__(self, initial, minimum, maximum, target_seconds, decrease, queue_timeout):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_seconds = target_seconds
+        self.decrease = decrease
+        self.queue_timeout = queue_timeout
+        self.inflight = 0
+        self.waiting = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+    
+    def _capacity(self, priority):
+        return max(1, int(self.limit * PRIORITY_SHARES[priority]))
+    
+    def acquire(self, priority):
+        """Take a slot, or return False at once (briefly waiting only for critical requests)"""
+        with self._cond:
+            if self.inflight < self._capacity(priority):
+                self.inflight += 1
+                return True
+            
+            if priority != 'critical' or self.queue_timeout <= 0:
+                return False
+            
+            deadline = time.monotonic() + self.queue_timeout
+            self.waiting += 1
+            try:
+                while self.inflight >= self._capacity(priority):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                self.inflight += 1
+                return True
+            finally:
+                self.waiting -= 1
+    
+    def release(self, latency, failed):
+        with self._cond:
+            self.inflight -= 1
+            now = time.monotonic()
+            if failed or latency > self.target_seconds:
+                if now - self._last_decrease >= self.target_seconds:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify()
+
+def init_app(app):
+    global limiter, retry_after_seconds
+    config = app.config
+    limiter = AdaptiveLimiter(
+        initial=config['ADMISSION_INITIAL_LIMIT'],
+        minimum=config['ADMISSION_MIN_LIMIT'],
+        maximum=config['ADMISSION_MAX_LIMIT'],
+        target_seconds=config['ADMISSION_TARGET_DB_LATENCY_MS'] / 1000.0,
+        decrease=config['ADMISSION_DECREASE_FACTOR'],
+        queue_timeout=config['ADMISSION_QUEUE_TIMEOUT_MS'] / 1000.0
+    )
+    retry_after_seconds = config['ADMISSION_RETRY_AFTER_SECONDS']
+
+def _gauge(name):
+    def read():
+        return getattr(limiter, name) if limiter else 0
+    return read
+
+metrics.register_gauge('votex_admission_limit', 'Current adaptive concurrency limit', _gauge('limit'))
+metrics.register_gauge('votex_admission_inflight', 'Requests holding an admission slot', _gauge('inflight'))
+metrics.register_gauge('votex_admission_queue_depth', 'Critical requests waiting for a slot', _gauge('waiting'))
+
+def admission_controlled(priority):
+    """Decorator to shed load with 503 + Retry-After when the DB is saturated"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if limiter is None:
+                return f(*args, **kwargs)
+            
+            if not limiter.acquire(priority):
+                metrics.inc('votex_admission_rejections_total', priority=priority)
+                return jsonify({'error': 'Server is busy, please retry shortly'}), 503, {'Retry-After': str(retry_after_seconds)}
+            
+            start = time.perf_counter()
+            
+            def release(failed):
+                # Judge the DB, not the handler: use the request's DB time when it ran any SQL
+                latency = metrics.current_db_seconds() or (time.perf_counter() - start)
+                limiter.release(latency, failed)
+            
+            try:
+                result = f(*args, **kwargs)
+            except BaseException:
+                release(True)
+                raise
+            
+            if getattr(result, 'is_streamed', False):
+                # A streamed body runs its query after we return; hold the slot until it closes
+                result.call_on_close(lambda: release(False))
+                return result
+            status = result[1] if isinstance(result, tuple) and len(result) > 1 else getattr(result, 'status_code', 200)
+            release(isinstance(status, int) and status >= 500)
+            return result
+        return decorated_function
+    return decorator
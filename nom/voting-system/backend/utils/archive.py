@@ -0,0 +1,256 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from datetime import date, datetime, timezone
+from flask import current_app
+from utils.db import mysql
+from utils.jobs import job_target
+from MySQLdb.cursors import SSCursor
+
+ARCHIVE_FORMAT = 'votex-columnar'
+ARCHIVE_VERSION = 1
+
+# Logs carry no election id; an election's own logs are its ballots' 'Vote cast' rows inside its window
+VOTE_LOG_PATTERN = 'Vote cast for party ID:%'
+
+# The window is half-open, [opened_at, closed_at): the next election opens as this one closes,
+# so a row stamped with that shared second belongs to the next election alone
+LOG_WINDOW = "created_at >= %s AND created_at < %s AND action LIKE %s"
+
+# Each archived dataset: columns and a streaming query (parameters are bound in archive_election)
+DATASETS = {
+    'votes': {
+        'columns': ['id', 'voter_id', 'party_id', 'voted_at'],
+        'query': """
+            SELECT id, voter_id, party_id, voted_at
+            FROM votes
+            WHERE election_id = %s
+            ORDER BY id
+        """,
+        'count': "SELECT COUNT(*) as count FROM votes WHERE election_id = %s"
+    },
+    'tallies': {
+        'columns': ['party_id', 'party_name', 'vote_count'],
+        'query': """
+            SELECT v.party_id, p.name, COUNT(*)
+            FROM votes v
+            LEFT JOIN parties p ON v.party_id = p.id
+            WHERE v.election_id = %s
+            GROUP BY v.party_id, p.name
+            ORDER BY v.party_id
+        """,
+        'count': "SELECT COUNT(DISTINCT party_id) as count FROM votes WHERE election_id = %s"
+    },
+    'logs': {
+        'columns': ['id', 'action', 'user_id', 'details', 'created_at'],
+        'query': f"""
+            SELECT id, action, user_id, details, created_at
+            FROM logs
+            WHERE {LOG_WINDOW}
+            ORDER BY id
+        """,
+        'count': f"SELECT COUNT(*) as count FROM logs WHERE {LOG_WINDOW}"
+    }
+}
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def election_archive_dir(election_id):
+    return os.path.join(current_app.config['ARCHIVE_FOLDER'], f'election_{election_id}')
+
+def write_dataset(path, columns, cursor, chunk_size):
+    """Stream cursor rows into a gzip file of column-oriented row groups, returning the row count.
+    
+    Line 1 is a header naming the columns; every following line is one row group
+    holding a list of values per column.
+    """
+    rows_written = 0
+    with gzip.open(path, 'wt', encoding='utf-8') as out:
+        out.write(json.dumps({'format': ARCHIVE_FORMAT, 'version': ARCHIVE_VERSION, 'columns': columns}) + '\n')
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            group = [[_encode_value(value) for value in column] for column in zip(*rows)]
+            out.write(json.dumps(group, separators=(',', ':')) + '\n')
+            rows_written += len(rows)
+    return rows_written
+
+def read_dataset(path, columns=None):
+    """Yield rows of an archived dataset as dicts, optionally only the named columns"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('format') != ARCHIVE_FORMAT:
+            raise ValueError(f'Not an archive file: {path}')
+        
+        names = header['columns']
+        wanted = [i for i, name in enumerate(names) if columns is None or name in columns]
+        for line in f:
+            group = json.loads(line)
+            for values in zip(*(group[i] for i in wanted)):
+                yield dict(zip((names[i] for i in wanted), values))
+
+def count_dataset_rows(path):
+    """Count rows in an archived dataset by summing row group lengths"""
+    total = 0
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        f.readline()
+        for line in f:
+            group = json.loads(line)
+            total += len(group[0]) if group else 0
+    return total
+
+def read_manifest(election_id):
+    path = os.path.join(election_archive_dir(election_id), 'manifest.json')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def verify_archive(election_id, manifest=None):
+    """Check every dataset file against the checksums and row counts in its manifest"""
+    manifest = manifest or read_manifest(election_id)
+    if not manifest:
+        raise ValueError(f'No archive for election {election_id}')
+    
+    archive_dir = election_archive_dir(election_id)
+    for name, dataset in manifest['datasets'].items():
+        path = os.path.join(archive_dir, dataset['file'])
+        if _file_sha256(path) != dataset['sha256']:
+            raise ValueError(f'Checksum mismatch in archived {name}')
+        if count_dataset_rows(path) != dataset['rows']:
+            raise ValueError(f'Row count mismatch in archived {name}')
+    return manifest
+
+def _delete_in_batches(progress, label, query, params, batch_size):
+    deleted = 0
+    cur = mysql.connection.cursor()
+    while True:
+        cur.execute(query, params + (batch_size,))
+        mysql.connection.commit()
+        if cur.rowcount == 0:
+            break
+        deleted += cur.rowcount
+        progress.update(**{f'{label}_deleted': deleted})
+    cur.close()
+    return deleted
+
+@job_target('archive_election')
+def archive_election(progress, election_id):
+    """Archive a closed election's ballots, tallies and logs to disk, then drop the rows.
+    
+    Safe to re-run: an existing verified archive is reused and only the
+    remaining row deletion is repeated.
+    """
+    config = current_app.config
+    chunk_size = config['ARCHIVE_CHUNK_SIZE']
+    
+    cur = mysql.connection.cursor()
+    cur.execute("SELECT id, name, status, opened_at, closed_at FROM elections WHERE id = %s", (election_id,))
+    election = cur.fetchone()
+    cur.close()
+    
+    if not election:
+        raise ValueError(f'Election {election_id} not found')
+    if election['status'] == 'archived':
+        return read_manifest(election_id)
+    if election['status'] != 'closed':
+        raise ValueError(f"Only closed elections can be archived (election is {election['status']})")
+    
+    params = {
+        'votes': (election_id,),
+        'tallies': (election_id,),
+        'logs': (election['opened_at'], election['closed_at'], VOTE_LOG_PATTERN)
+    }
+    
+    manifest = read_manifest(election_id)
+    if manifest:
+        verify_archive(election_id, manifest)
+    else:
+        archive_dir = election_archive_dir(election_id)
+        staging_dir = archive_dir + '.tmp'
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+        
+        manifest = {
+            'format': ARCHIVE_FORMAT,
+            'version': ARCHIVE_VERSION,
+            'election': {key: _encode_value(value) for key, value in election.items()},
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'datasets': {}
+        }
+        
+        for name, dataset in DATASETS.items():
+            file_name = f'{name}.jsonl.gz'
+            path = os.path.join(staging_dir, file_name)
+            
+            # Stream through a server-side cursor so the table is never loaded whole
+            stream = mysql.connection.cursor(SSCursor)
+            stream.execute(dataset['query'], params[name])
+            rows = write_dataset(path, dataset['columns'], stream, chunk_size)
+            stream.close()
+            
+            cur = mysql.connection.cursor()
+            cur.execute(dataset['count'], params[name])
+            expected = cur.fetchone()['count']
+            cur.close()
+            
+            if rows != expected or count_dataset_rows(path) != rows:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+                raise ValueError(f'Archived {name} has {rows} rows, database has {expected}')
+            
+            manifest['datasets'][name] = {
+                'file': file_name,
+                'columns': dataset['columns'],
+                'rows': rows,
+                'sha256': _file_sha256(path)
+            }
+            progress.update(force=True, **{f'{name}_archived': rows})
+        
+        with open(os.path.join(staging_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        
+        # Publish the archive only once every file is written and verified
+        os.replace(staging_dir, archive_dir)
+    
+    _delete_in_batches(progress, 'votes', "DELETE FROM votes WHERE election_id = %s LIMIT %s",
+                       params['votes'], chunk_size)
+    _delete_in_batches(progress, 'logs',
+                       f"DELETE FROM logs WHERE {LOG_WINDOW} LIMIT %s",
+                       params['logs'], chunk_size)
+    
+    cur = mysql.connection.cursor()
+    cur.execute("UPDATE elections SET status = 'archived' WHERE id = %s", (election_id,))
+    mysql.connection.commit()
+    cur.close()
+    
+    progress.update(force=True, archived=True)
+    return manifest
+
+def get_archived_results(election_id):
+    """Return the manifest and per-party tallies of an archived election, read from its files"""
+    manifest = read_manifest(election_id)
+    if not manifest:
+        return None
+    
+    tallies_file = os.path.join(election_archive_dir(election_id), manifest['datasets']['tallies']['file'])
+    tallies = list(read_dataset(tallies_file))
+    
+    return {
+        'election': manifest['election'],
+        'totalVotes': sum(row['vote_count'] for row in tallies),
+        'tallies': tallies,
+        'datasets': {name: {'rows': d['rows'], 'sha256': d['sha256']} for name, d in manifest['datasets'].items()}
+    }
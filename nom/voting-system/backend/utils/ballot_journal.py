@@ -0,0 +1,478 @@
+"""Write-ahead journal for online ballots (BALLOT_JOURNAL_ENABLED).
+
+With the journal on, cast_vote appends the ballot to a local file and
+answers as soon as the record is fsynced. A replayer thread applies
+journaled ballots to MySQL, so a stall or failover delays the tallies
+instead of failing the vote.
+
+Each worker claims one slot directory under BALLOT_JOURNAL_DIR (held with
+flock) and appends to numbered segment files in it. A record is
+
+    <payload length: u32> <crc32 of payload: u32> <payload>
+
+where the payload is the JSON array [election_id, voter_id, party_id,
+unix time]. Appends are group-committed: a flusher writes and fsyncs
+everything buffered every BALLOT_JOURNAL_FSYNC_INTERVAL_MS (with 0, the
+first waiting writer flushes for everyone queued behind it). Segments
+rotate at BALLOT_JOURNAL_SEGMENT_BYTES and are deleted once applied. A torn
+or corrupt record ends a segment's replay; a sealed segment that stops
+early is renamed to .corrupt for inspection instead of being deleted.
+
+Replay is idempotent on voter id: a ballot whose voter already has a vote
+in that election is skipped, so a segment can be replayed any number of
+times. On startup a worker replays whatever its slot still holds, and
+slots no live worker holds are adopted and drained.
+"""
+import fcntl
+import itertools
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+import MySQLdb
+from flask import current_app
+from utils.db import mysql
+from utils import metrics, shared_store
+
+RECORD_HEADER = struct.Struct('<II')
+SEGMENT_SUFFIX = '.wal'
+
+config = {}
+_state = {'pid': None, 'journal': None, 'replayer': None}
+_state_lock = threading.Lock()
+
+metrics.describe('votex_journal_appends_total', 'Ballots appended to the write-ahead journal')
+metrics.describe('votex_journal_fsyncs_total', 'Journal flushes (each fsyncs one group of appends)')
+metrics.describe('votex_journal_replayed_total', 'Journaled ballots replayed into MySQL by outcome')
+
+class JournalError(Exception):
+    pass
+
+def segment_path(directory, number):
+    return os.path.join(directory, f'{number:010d}{SEGMENT_SUFFIX}')
+
+def segment_numbers(directory):
+    return sorted(
+        int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(directory)
+        if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit()
+    )
+
+def encode_record(payload):
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+def read_records(path, start=0, end=None):
+    """Yield (offset after the record, payload) from start, stopping at end or the first bad record"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read() if end is None else f.read(end - start)
+    
+    offset = 0
+    while offset + RECORD_HEADER.size <= len(data):
+        length, checksum = RECORD_HEADER.unpack_from(data, offset)
+        payload = data[offset + RECORD_HEADER.size:offset + RECORD_HEADER.size + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            return
+        offset += RECORD_HEADER.size + length
+        yield start + offset, payload
+
+class Journal:
+    """Append-only, checksummed, segment-rotated log with group-committed fsync"""
+    
+    def __init__(self, directory, segment_bytes, fsync_interval):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._flushed = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()
+        self._buffer = []
+        self._appended = 0
+        self._durable = 0
+        self._error = None
+        self._closed = False
+        self.fsyncs = 0
+        
+        # Never append to a segment left by a crash; its tail may be torn
+        existing = segment_numbers(directory)
+        self.segment = existing[-1] + 1 if existing else 1
+        self._file = open(segment_path(directory, self.segment), 'ab')
+        self._size = 0
+        self._fsync_directory()
+        self.durable_position = (self.segment, 0)
+        
+        if fsync_interval > 0:
+            threading.Thread(target=self._flush_loop, name='journal-flush', daemon=True).start()
+    
+    def append(self, payload, timeout=None):
+        """Append one record and return once it is on disk"""
+        record = encode_record(payload)
+        with self._lock:
+            if self._closed:
+                raise JournalError('Journal is closed')
+            self._buffer.append(record)
+            self._appended += 1
+            ticket = self._appended
+        
+        if self.fsync_interval == 0:
+            self.flush()
+        
+        with self._lock:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self._durable < ticket and self._error is None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise JournalError('Timed out waiting for the journal fsync')
+                self._flushed.wait(remaining)
+            if self._durable < ticket:
+                raise JournalError(f'Journal write failed: {self._error}')
+        metrics.inc('votex_journal_appends_total')
+    
+    def flush(self):
+        """Write and fsync everything buffered; concurrent callers share one fsync"""
+        with self._write_lock:
+            with self._lock:
+                records, self._buffer = self._buffer, []
+                target = self._appended
+            if not records:
+                return
+            
+            try:
+                data = b''.join(records)
+                self._file.write(data)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._size += len(data)
+                position = (self.segment, self._size)
+                
+                if self._size >= self.segment_bytes:
+                    self._rotate()
+                    position = (self.segment, 0)
+            except OSError as e:
+                with self._lock:
+                    self._error = e
+                    self._flushed.notify_all()
+                raise
+            
+            metrics.inc('votex_journal_fsyncs_total')
+            with self._lock:
+                self.fsyncs += 1
+                self._durable = target
+                self.durable_position = position
+                self._flushed.notify_all()
+    
+    def _rotate(self):
+        self._file.close()
+        self.segment += 1
+        self._file = open(segment_path(self.directory, self.segment), 'ab')
+        self._size = 0
+        self._fsync_directory()
+    
+    def _fsync_directory(self):
+        # Makes a new segment's directory entry durable, not just its contents
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    
+    def _flush_loop(self):
+        while not self._closed:
+            time.sleep(self.fsync_interval)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Journal flush failed: {e}")
+    
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._closed = True
+        self._file.close()
+
+def first_cast_at(path, offset):
+    """Unix time in the record at offset, or None if there is no whole record there"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return None
+            length, checksum = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+    except FileNotFoundError:
+        return None
+    if len(payload) < length or zlib.crc32(payload) != checksum:
+        return None
+    return json.loads(payload)[3]
+
+class Replayer:
+    """Applies one slot directory's records in order, remembering how far it got"""
+    
+    def __init__(self, directory, journal=None, batch_size=500):
+        self.directory = directory
+        self.journal = journal
+        self.batch_size = batch_size
+        self.offsets = {}
+    
+    def backlog(self):
+        """(durable bytes not yet applied, unix time of the oldest of those ballots or None)"""
+        pending, oldest = 0, None
+        durable_segment, durable_offset = self.journal.durable_position if self.journal else (None, None)
+        for number in segment_numbers(self.directory):
+            if durable_segment is not None and number > durable_segment:
+                break
+            path = segment_path(self.directory, number)
+            offset = self.offsets.get(number, 0)
+            try:
+                end = durable_offset if number == durable_segment else os.path.getsize(path)
+            except FileNotFoundError:
+                continue  # Replayed and removed meanwhile
+            if end <= offset:
+                continue
+            pending += end - offset
+            if oldest is None:
+                oldest = first_cast_at(path, offset)
+        return pending, oldest
+    
+    def replay(self, apply):
+        """Apply every durable record not yet applied; sealed segments are removed once done"""
+        total = 0
+        for number in segment_numbers(self.directory):
+            # Segments before the one being appended to are complete and durable
+            sealed, end = True, None
+            if self.journal is not None:
+                durable_segment, durable_offset = self.journal.durable_position
+                if number > durable_segment:
+                    break
+                if number == durable_segment:
+                    sealed, end = False, durable_offset
+            
+            path = segment_path(self.directory, number)
+            offset = self.offsets.get(number, 0)
+            batch = []
+            for next_offset, payload in read_records(path, offset, end):
+                batch.append(json.loads(payload))
+                if len(batch) >= self.batch_size:
+                    apply(batch)
+                    total += len(batch)
+                    offset = self.offsets[number] = next_offset
+                    batch = []
+            if batch:
+                apply(batch)
+                total += len(batch)
+                offset = self.offsets[number] = next_offset
+            
+            if not sealed:
+                continue
+            
+            self.offsets.pop(number, None)
+            if offset < os.path.getsize(path):
+                print(f"Journal segment {path} has a bad record at offset {offset}; kept as .corrupt")
+                os.replace(path, path + '.corrupt')
+            else:
+                os.unlink(path)
+        return total
+
+def apply_ballots(ballots):
+    """Insert journaled ballots in one transaction.
+    
+    Only ballots for the election that is still open are counted; ballots for
+    an election closed since they were cast, from voters who already voted or
+    were deleted, for parties removed meanwhile, or repeating a voter earlier
+    in the batch are skipped, and each one leaves a log row so an acked but
+    uncounted vote can be traced.
+    """
+    cur = mysql.connection.cursor()
+    applied = 0
+    rejected = []
+    
+    elections = {}
+    for election_id, voter_id, party_id, cast_at in ballots:
+        ballots_by_voter = elections.setdefault(election_id, {})
+        if voter_id in ballots_by_voter:
+            # The voter's first ballot in the batch is the one that counts
+            rejected.append((voter_id, party_id, 'Duplicate ballot in journal'))
+        else:
+            ballots_by_voter[voter_id] = (party_id, cast_at)
+    
+    # Share-lock the open election so a reset can't close it under this transaction
+    cur.execute("SELECT id FROM elections WHERE status = 'open' ORDER BY id DESC LIMIT 1 LOCK IN SHARE MODE")
+    open_election = cur.fetchone()
+    open_election_id = open_election['id'] if open_election else None
+    
+    for election_id, ballots_by_voter in elections.items():
+        if election_id != open_election_id:
+            rejected.extend(
+                (voter_id, party_id, f'Election {election_id} is no longer open')
+                for voter_id, (party_id, _) in ballots_by_voter.items()
+            )
+            continue
+        
+        voter_ids = sorted(ballots_by_voter)
+        cur.execute(f"""
+            SELECT id, voted_election_id
+            FROM users
+            WHERE id IN ({', '.join(['%s'] * len(voter_ids))}) AND deleted_at IS NULL
+            ORDER BY id
+            FOR UPDATE
+        """, tuple(voter_ids))
+        voted = {row['id']: row['voted_election_id'] for row in cur.fetchall()}
+        
+        party_ids = sorted({party_id for party_id, _ in ballots_by_voter.values()})
+        cur.execute(
+            f"SELECT id FROM parties WHERE id IN ({', '.join(['%s'] * len(party_ids))}) AND deleted_at IS NULL",
+            tuple(party_ids)
+        )
+        parties = {row['id'] for row in cur.fetchall()}
+        
+        rows = []
+        for voter_id, (party_id, cast_at) in ballots_by_voter.items():
+            if voter_id not in voted:
+                rejected.append((voter_id, party_id, 'Voter not found'))
+            elif voted[voter_id] is not None and voted[voter_id] >= election_id:
+                rejected.append((voter_id, party_id, 'Voter already voted'))
+            elif party_id not in parties:
+                rejected.append((voter_id, party_id, 'Party not found'))
+            else:
+                rows.append((election_id, voter_id, party_id, datetime.fromtimestamp(cast_at)))
+        if not rows:
+            continue
+        
+        cur.executemany("INSERT INTO votes (election_id, voter_id, party_id, voted_at) VALUES (%s, %s, %s, %s)", rows)
+        cur.execute(
+            f"UPDATE users SET voted_election_id = %s WHERE id IN ({', '.join(['%s'] * len(rows))})",
+            (election_id, *[row[1] for row in rows])
+        )
+        cur.executemany(
+            "INSERT INTO logs (action, user_id, details) VALUES (%s, %s, %s)",
+            [(f'Vote cast for party ID: {row[2]}', row[1], 'Replayed from ballot journal') for row in rows]
+        )
+        applied += len(rows)
+    
+    if rejected:
+        cur.executemany(
+            "INSERT INTO logs (action, user_id, details) VALUES (%s, %s, %s)",
+            [(f'Journaled vote for party ID: {party_id} not counted', voter_id, reason)
+             for voter_id, party_id, reason in rejected]
+        )
+    mysql.connection.commit()
+    cur.close()
+    
+    metrics.inc('votex_journal_replayed_total', applied, outcome='applied')
+    metrics.inc('votex_journal_replayed_total', len(rejected), outcome='rejected')
+    if applied:
+        shared_store.mark_dirty()
+
+def _apply_with_retry(ballots):
+    # Another worker's replayer or a station upload can still hit the unique key; re-check and retry
+    for attempt in range(3):
+        try:
+            apply_ballots(ballots)
+            return
+        except MySQLdb.IntegrityError:
+            mysql.connection.rollback()
+            if attempt == 2:
+                raise
+
+def _claim_slot(root):
+    """Lock the first slot directory no other process holds; returns (directory, lock fd)"""
+    for number in itertools.count():
+        directory = os.path.join(root, f'slot-{number}')
+        os.makedirs(directory, exist_ok=True)
+        fd = os.open(os.path.join(directory, '.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return directory, fd
+        except BlockingIOError:
+            os.close(fd)
+
+def drain_orphaned_slots(root, apply, batch_size):
+    """Replay and empty every slot directory no live process holds"""
+    total = 0
+    if not os.path.isdir(root):
+        return total
+    for name in sorted(os.listdir(root)):
+        directory = os.path.join(root, name)
+        if not name.startswith('slot-') or not os.path.isdir(directory):
+            continue
+        fd = os.open(os.path.join(directory, '.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            continue
+        try:
+            total += Replayer(directory, batch_size=batch_size).replay(apply)
+        finally:
+            os.close(fd)
+    return total
+
+def _replay_loop(app, replayer):
+    last_adopt = 0.0
+    while True:
+        time.sleep(config['replay_interval'])
+        try:
+            with app.app_context():
+                replayer.replay(_apply_with_retry)
+                
+                if time.monotonic() - last_adopt >= config['adopt_interval']:
+                    last_adopt = time.monotonic()
+                    drain_orphaned_slots(config['directory'], _apply_with_retry, config['batch_size'])
+        except Exception as e:
+            # Records stay in the journal; the next pass retries from the same offset
+            print(f"Journal replay failed: {e}")
+
+def journal():
+    """This worker's journal, created with its replayer thread on first use after fork"""
+    pid = os.getpid()
+    if _state['pid'] == pid:
+        return _state['journal']
+    with _state_lock:
+        if _state['pid'] != pid:
+            directory, _ = _claim_slot(config['directory'])
+            log = Journal(directory, config['segment_bytes'], config['fsync_interval'])
+            replayer = Replayer(directory, log, config['batch_size'])
+            app = current_app._get_current_object()
+            threading.Thread(target=_replay_loop, args=(app, replayer), name='journal-replay', daemon=True).start()
+            _state.update(pid=pid, journal=log, replayer=replayer)
+    return _state['journal']
+
+def enabled():
+    return config.get('enabled', False)
+
+def record_ballot(election_id, voter_id, party_id):
+    """Durably journal one ballot; raises JournalError if it could not be written"""
+    payload = json.dumps([election_id, voter_id, party_id, round(time.time(), 3)], separators=(',', ':'))
+    journal().append(payload.encode('utf-8'), timeout=config['ack_timeout'])
+
+def backlog():
+    """This worker's replay backlog as (bytes, seconds since the oldest pending ballot was cast)"""
+    if _state['pid'] != os.getpid():
+        return 0, 0.0
+    pending, oldest = _state['replayer'].backlog()
+    return pending, (max(0.0, time.time() - oldest) if oldest is not None else 0.0)
+
+def start():
+    """Background starter: open the journal so leftovers in this worker's slot are replayed at once"""
+    if enabled():
+        journal()
+
+def init_app(app):
+    from utils import readiness
+    
+    app_config = app.config
+    config.update(
+        enabled=app_config['BALLOT_JOURNAL_ENABLED'],
+        directory=app_config['BALLOT_JOURNAL_DIR'],
+        segment_bytes=app_config['BALLOT_JOURNAL_SEGMENT_BYTES'],
+        fsync_interval=app_config['BALLOT_JOURNAL_FSYNC_INTERVAL_MS'] / 1000,
+        ack_timeout=app_config['BALLOT_JOURNAL_ACK_TIMEOUT_SECONDS'],
+        replay_interval=app_config['BALLOT_JOURNAL_REPLAY_INTERVAL_SECONDS'],
+        adopt_interval=app_config['BALLOT_JOURNAL_ADOPT_INTERVAL_SECONDS'],
+        batch_size=app_config['BALLOT_JOURNAL_REPLAY_BATCH_SIZE']
+    )
+    readiness.register_background(start)
@@ -0,0 +1,47 @@
+# Shared by blueprints/voter.py, blueprints/party.py and asgi_voter.py, so no Flask or driver imports here
+
+CAMPAIGNS_PAGE_SIZE = 20
+CAMPAIGNS_MAX_PAGE_SIZE = 100
+
+# Projectable campaign fields and the column behind each
+CAMPAIGN_FIELDS = {
+    'id': 'c.id',
+    'party_id': 'c.party_id',
+    'title': 'c.title',
+    'description': 'c.description',
+    'image_url': 'c.image_url',
+    'created_at': 'c.created_at',
+    'party_name': 'p.name as party_name'
+}
+
+def campaign_page_query(fields, limit, party_id=None, after=None):
+    """Build the SQL and parameters for one page of campaigns, newest first.
+    
+    Pages are keyed on (created_at, id), which idx_created and
+    idx_party_created serve in order, so every page costs the same however
+    many campaigns exist. id and created_at are always selected since the
+    next cursor is built from them. Fetches limit + 1 rows so the caller can
+    tell whether another page exists.
+    """
+    columns = ['id', 'created_at'] + [field for field in fields if field not in ['id', 'created_at']]
+    conditions = ["p.deleted_at IS NULL"]
+    params = []
+    
+    if party_id is not None:
+        conditions.append("c.party_id = %s")
+        params.append(party_id)
+    
+    if after:
+        conditions.append("(c.created_at < %s OR (c.created_at = %s AND c.id < %s))")
+        params.extend([after[0], after[0], after[1]])
+    
+    params.append(limit + 1)
+    query = f"""
+        SELECT {', '.join(CAMPAIGN_FIELDS[column] for column in columns)}
+        FROM campaigns c
+        JOIN parties p ON c.party_id = p.id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY c.created_at DESC, c.id DESC
+        LIMIT %s
+    """
+    return query, tuple(params)
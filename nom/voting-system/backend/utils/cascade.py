@@ -0,0 +1,113 @@
+from flask import current_app
+from utils.db import mysql
+from utils.file_handler import upload_path_from_url, delete_campaign_image
+from utils import shared_store
+from utils.jobs import job_target
+
+def _delete_chunks(progress, counter, query, params, chunk_size):
+    """Run a LIMITed DELETE/UPDATE until it stops matching rows, committing after each chunk"""
+    cur = mysql.connection.cursor()
+    while True:
+        cur.execute(query, params + (chunk_size,))
+        mysql.connection.commit()
+        if cur.rowcount == 0:
+            break
+        progress.update(**{counter: progress.values.get(counter, 0) + cur.rowcount})
+    cur.close()
+
+def _delete_party_rows(progress, party_id, chunk_size):
+    cur = mysql.connection.cursor()
+    
+    # Campaigns go first so their image files can be removed alongside them
+    progress.update(force=True, stage='campaigns', party_id=party_id)
+    while True:
+        cur.execute(
+            "SELECT id, image_url FROM campaigns WHERE party_id = %s ORDER BY id LIMIT %s",
+            (party_id, chunk_size)
+        )
+        campaigns = cur.fetchall()
+        if not campaigns:
+            break
+        
+        ids = [campaign['id'] for campaign in campaigns]
+        placeholders = ', '.join(['%s'] * len(ids))
+        cur.execute(f"DELETE FROM campaigns WHERE id IN ({placeholders})", tuple(ids))
+        mysql.connection.commit()
+        
+        images_deleted = 0
+        for campaign in campaigns:
+            image_path = upload_path_from_url(campaign['image_url'])
+            if image_path:
+                delete_campaign_image(image_path)
+                images_deleted += 1
+        
+        progress.update(
+            campaigns_deleted=progress.values.get('campaigns_deleted', 0) + len(ids),
+            images_deleted=progress.values.get('images_deleted', 0) + images_deleted
+        )
+    
+    cur.execute("SELECT logo_url FROM parties WHERE id = %s", (party_id,))
+    party = cur.fetchone()
+    cur.close()
+    
+    if not party:
+        return
+    
+    # The party is already hidden from tallies, so removing its ballots never shows partial counts
+    progress.update(force=True, stage='votes')
+    _delete_chunks(progress, 'votes_deleted', "DELETE FROM votes WHERE party_id = %s LIMIT %s",
+                   (party_id,), chunk_size)
+    
+    logo_path = upload_path_from_url(party['logo_url'])
+    if logo_path:
+        delete_campaign_image(logo_path)
+        progress.update(images_deleted=progress.values.get('images_deleted', 0) + 1)
+    
+    cur = mysql.connection.cursor()
+    cur.execute("DELETE FROM parties WHERE id = %s", (party_id,))
+    mysql.connection.commit()
+    cur.close()
+
+@job_target('delete_party')
+def delete_party_cascade(progress, party_id):
+    """Background job: remove a soft-deleted party with its campaigns, ballots and images in chunks"""
+    _delete_party_rows(progress, party_id, current_app.config['DELETE_CHUNK_SIZE'])
+    progress.update(force=True, stage='done')
+
+@job_target('delete_user')
+def delete_user_cascade(progress, user_id):
+    """Background job: remove a soft-deleted user and everything that depends on it in chunks.
+    
+    Log rows are kept and detached, matching the ON DELETE SET NULL audit trail.
+    """
+    chunk_size = current_app.config['DELETE_CHUNK_SIZE']
+    
+    cur = mysql.connection.cursor()
+    cur.execute("SELECT id FROM parties WHERE created_by = %s", (user_id,))
+    parties = cur.fetchall()
+    
+    if parties:
+        cur.execute("UPDATE parties SET deleted_at = CURRENT_TIMESTAMP WHERE created_by = %s AND deleted_at IS NULL",
+                    (user_id,))
+        mysql.connection.commit()
+    cur.close()
+    
+    for party in parties:
+        _delete_party_rows(progress, party['id'], chunk_size)
+    
+    progress.update(force=True, stage='votes', user_id=user_id)
+    _delete_chunks(progress, 'votes_deleted', "DELETE FROM votes WHERE voter_id = %s LIMIT %s",
+                   (user_id,), chunk_size)
+    # Running tallies can't go down incrementally; have the shared store recount
+    shared_store.mark_dirty(full=True)
+    
+    progress.update(force=True, stage='logs')
+    _delete_chunks(progress, 'logs_detached', "UPDATE logs SET user_id = NULL WHERE user_id = %s LIMIT %s",
+                   (user_id,), chunk_size)
+    
+    cur = mysql.connection.cursor()
+    cur.execute("DELETE FROM users WHERE id = %s", (user_id,))
+    mysql.connection.commit()
+    cur.close()
+    
+    progress.update(force=True, stage='done')
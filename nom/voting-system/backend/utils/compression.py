@@ -0,0 +1,176 @@
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from flask import request
+from utils import metrics
+
+# Optional codecs (requirements-compression.txt); gzip always works
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Server preference when the client rates several encodings equally
+PREFERENCE = ['zstd', 'br', 'gzip']
+
+min_size = 1024
+mimetypes = set()
+levels = {}
+cache = None
+
+metrics.describe('votex_compression_input_bytes_total', 'Response bytes before compression')
+metrics.describe('votex_compression_output_bytes_total', 'Response bytes after compression')
+metrics.describe('votex_compression_cache_hits_total', 'Responses served from already-compressed bytes')
+
+class CompressedCache:
+    """LRU of compressed bodies keyed by (body digest, encoding), bounded by total bytes.
+    
+    Hashing a body is far cheaper than compressing it, so identical
+    responses (the party list, a popular campaign page) are compressed once.
+    """
+    
+    def __init__(self, max_bytes, max_entry_bytes):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+    
+    def put(self, key, value):
+        if len(value) > self.max_entry_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+def available_encodings():
+    encodings = ['gzip']
+    if brotli is not None:
+        encodings.append('br')
+    if zstandard is not None:
+        encodings.append('zstd')
+    return encodings
+
+def choose_encoding(accept_encodings):
+    """Pick the best enabled encoding the client accepts with q > 0, preferring PREFERENCE order on ties"""
+    best, best_quality = None, 0
+    for encoding in PREFERENCE:
+        if encoding not in levels:
+            continue
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def compress(data, encoding):
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(levels['gzip'], zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+    if encoding == 'br':
+        return brotli.compress(data, quality=levels['br'])
+    return zstandard.ZstdCompressor(level=levels['zstd']).compress(data)
+
+def _stream_compressor(encoding):
+    """Return (compress, finish) functions of an incremental compressor"""
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(levels['gzip'], zlib.DEFLATED, 31)
+        return compressor.compress, compressor.flush
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=levels['br'])
+        return compressor.process, compressor.finish
+    compressor = zstandard.ZstdCompressor(level=levels['zstd']).compressobj()
+    return compressor.compress, compressor.flush
+
+def compress_stream(chunks, encoding):
+    """Compress a streamed body chunk by chunk, yielding output as the codec emits it"""
+    compress_chunk, finish = _stream_compressor(encoding)
+    total_in = total_out = 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            total_in += len(chunk)
+            data = compress_chunk(chunk)
+            if data:
+                total_out += len(data)
+                yield data
+        data = finish()
+        total_out += len(data)
+        yield data
+    finally:
+        metrics.inc('votex_compression_input_bytes_total', total_in, encoding=encoding)
+        metrics.inc('votex_compression_output_bytes_total', total_out, encoding=encoding)
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+def compress_response(response):
+    """after_request hook: compress text responses the client can decode"""
+    if (response.status_code != 200
+            or response.mimetype not in mimetypes
+            or 'Content-Encoding' in response.headers
+            or response.direct_passthrough
+            or request.method == 'HEAD'):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    
+    if response.is_streamed:
+        # Exports: compress as rows are produced instead of buffering the whole file
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+        response.headers['Content-Encoding'] = encoding
+        return response
+    
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+    
+    key = (hashlib.blake2b(data, digest_size=16).digest(), encoding)
+    compressed = cache.get(key)
+    if compressed is None:
+        compressed = compress(data, encoding)
+        cache.put(key, compressed)
+    else:
+        metrics.inc('votex_compression_cache_hits_total', encoding=encoding)
+    
+    metrics.inc('votex_compression_input_bytes_total', len(data), encoding=encoding)
+    metrics.inc('votex_compression_output_bytes_total', len(compressed), encoding=encoding)
+    
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def init_app(app):
+    """Compress eligible responses with the best encoding each client accepts"""
+    global min_size, mimetypes, levels, cache
+    config = app.config
+    min_size = config['COMPRESS_MIN_SIZE']
+    mimetypes = set(config['COMPRESS_MIMETYPES'])
+    levels = {
+        encoding: config['COMPRESS_LEVELS'][encoding]
+        for encoding in available_encodings()
+        if encoding in config['COMPRESS_ENCODINGS']
+    }
+    cache = CompressedCache(config['COMPRESS_CACHE_MAX_BYTES'], config['COMPRESS_CACHE_MAX_ENTRY_BYTES'])
+    app.after_request(compress_response)
@@ -0,0 +1,249 @@
+import os
+import threading
+import time
+from time import perf_counter
+import flask_mysqldb
+import MySQLdb
+from MySQLdb import cursors
+from flask import current_app, g
+from utils import metrics, slow_query_log
+
+class InstrumentedCursorMixin:
+    """Times every statement and reports it to the per-request metrics"""
+    
+    _in_executemany = False
+    
+    def execute(self, query, args=None):
+        if self._in_executemany:
+            return super().execute(query, args)
+        start = perf_counter()
+        try:
+            return super().execute(query, args)
+        finally:
+            elapsed = perf_counter() - start
+            metrics.record_query(elapsed)
+            slow_query_log.record(query, args, elapsed)
+    
+    def executemany(self, query, args):
+        # MySQLdb may loop over execute() internally; count the batch as one statement
+        self._in_executemany = True
+        start = perf_counter()
+        try:
+            return super().executemany(query, args)
+        finally:
+            self._in_executemany = False
+            elapsed = perf_counter() - start
+            metrics.record_query(elapsed)
+            slow_query_log.record(query, args, elapsed, many=True)
+
+_instrumented_classes = {}
+
+def instrumented_cursor_class(cursor_class):
+    """Return a subclass of cursor_class that reports statement timings"""
+    if issubclass(cursor_class, InstrumentedCursorMixin):
+        return cursor_class
+    instrumented = _instrumented_classes.get(cursor_class)
+    if instrumented is None:
+        instrumented = type(f'Instrumented{cursor_class.__name__}', (InstrumentedCursorMixin, cursor_class), {})
+        _instrumented_classes[cursor_class] = instrumented
+    return instrumented
+
+class PoolExhausted(Exception):
+    """No pooled connection became free within MYSQL_POOL_TIMEOUT"""
+
+class ConnectionPool:
+    """A bounded per-process pool of MySQLdb connections.
+    
+    Connections are created on demand up to max_size and reused LIFO, so a
+    quiet worker keeps only the connections it actually needs warm.
+    """
+    
+    def __init__(self, connect, max_size, timeout, recycle_seconds):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle_seconds = recycle_seconds
+        self.pid = os.getpid()
+        self._idle = []
+        self._size = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+    
+    def acquire(self, timeout=None):
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhausted(f'All {self.max_size} database connections are busy')
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+        
+        try:
+            if conn is None:
+                return self.connect()
+            # Connections idle for a while may have been dropped by the server
+            if time.monotonic() - idle_since > self.recycle_seconds:
+                try:
+                    conn.ping()
+                except MySQLdb.Error:
+                    self._close(conn)
+                    conn = None
+                    return self.connect()
+            return conn
+        except Exception:
+            if conn is not None:
+                self._close(conn)
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+    
+    def release(self, conn):
+        try:
+            # End any open transaction so the next user starts from a fresh snapshot
+            conn.rollback()
+        except Exception:
+            self._close(conn)
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+    
+    def fill(self, count):
+        """Open connections until `count` are idle, for warming a new worker"""
+        opened = []
+        try:
+            for _ in range(min(count, self.max_size)):
+                opened.append(self.acquire())
+        finally:
+            for conn in opened:
+                self.release(conn)
+        return len(opened)
+    
+    def close(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn, _ in idle:
+            self._close(conn)
+    
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+    
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'waiting': self._waiting,
+                'max_size': self.max_size
+            }
+
+class MySQL(flask_mysqldb.MySQL):
+    """Flask-MySQLdb extension backed by a per-process connection pool.
+    
+    Each app context borrows one connection on first use and returns it on
+    teardown. The pool is rebuilt when the process id changes, so workers
+    forked from a preloaded master never share the master's sockets.
+    """
+    
+    def __init__(self, app=None):
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        super().__init__(app)
+    
+    def init_app(self, app):
+        app.config.setdefault('MYSQL_POOL_SIZE', 10)
+        app.config.setdefault('MYSQL_POOL_TIMEOUT', 5)
+        app.config.setdefault('MYSQL_POOL_RECYCLE_SECONDS', 60)
+        super().init_app(app)
+    
+    def _connect(self):
+        config = current_app.config
+        kwargs = {}
+        
+        # Same settings Flask-MySQLdb reads, passed only when set
+        options = {
+            'host': 'MYSQL_HOST',
+            'user': 'MYSQL_USER',
+            'passwd': 'MYSQL_PASSWORD',
+            'db': 'MYSQL_DB',
+            'port': 'MYSQL_PORT',
+            'unix_socket': 'MYSQL_UNIX_SOCKET',
+            'connect_timeout': 'MYSQL_CONNECT_TIMEOUT',
+            'read_default_file': 'MYSQL_READ_DEFAULT_FILE',
+            'use_unicode': 'MYSQL_USE_UNICODE',
+            'charset': 'MYSQL_CHARSET',
+            'sql_mode': 'MYSQL_SQL_MODE'
+        }
+        for argument, key in options.items():
+            if config.get(key):
+                kwargs[argument] = config[key]
+        if config.get('MYSQL_CUSTOM_OPTIONS'):
+            kwargs.update(config['MYSQL_CUSTOM_OPTIONS'])
+        
+        cursor_class = cursors.Cursor
+        if config.get('MYSQL_CURSORCLASS'):
+            cursor_class = getattr(cursors, config['MYSQL_CURSORCLASS'])
+        kwargs['cursorclass'] = instrumented_cursor_class(cursor_class)
+        
+        conn = MySQLdb.connect(**kwargs)
+        conn.autocommit(bool(config.get('MYSQL_AUTOCOMMIT')))
+        return conn
+    
+    @property
+    def pool(self):
+        pool = self._pool
+        if pool is None or pool.pid != os.getpid():
+            with self._pool_lock:
+                pool = self._pool
+                if pool is None or pool.pid != os.getpid():
+                    config = current_app.config
+                    pool = self._pool = ConnectionPool(
+                        connect=self._connect,
+                        max_size=config['MYSQL_POOL_SIZE'],
+                        timeout=config['MYSQL_POOL_TIMEOUT'],
+                        recycle_seconds=config['MYSQL_POOL_RECYCLE_SECONDS']
+                    )
+        return pool
+    
+    def reset_pool(self):
+        """Drop this process's pool; call after fork so each worker opens its own connections"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        # A pool inherited across fork holds the parent's sockets; forget them without closing
+        if pool is not None and pool.pid == os.getpid():
+            pool.close()
+    
+    @property
+    def connection(self):
+        conn = g.get('mysql_db')
+        if conn is None:
+            conn = g.mysql_db = self.pool.acquire()
+        return conn
+    
+    def teardown(self, exception):
+        conn = g.pop('mysql_db', None)
+        if conn is not None:
+            self.pool.release(conn)
+
+# The single extension instance shared by the app, blueprints and background jobs
+mysql = MySQL()
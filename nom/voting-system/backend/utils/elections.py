@@ -0,0 +1,61 @@
+from flask import current_app
+from utils.db import mysql
+from utils.jobs import job_target
+
+def get_active_election_id(cur):
+    """Return the id of the open election, or None if no election is open"""
+    cur.execute("SELECT id FROM elections WHERE status = 'open' ORDER BY id DESC LIMIT 1")
+    election = cur.fetchone()
+    return election['id'] if election else None
+
+def open_new_election(cur, name=None):
+    """Close the open election and open a new one.
+    
+    Only the elections table is written, so this is constant time no matter how
+    many ballots were cast. Ballots of the closed election stay in place until
+    purge_election_votes removes them. The caller commits.
+    """
+    cur.execute("SELECT id FROM elections WHERE status = 'open' ORDER BY id DESC LIMIT 1 FOR UPDATE")
+    previous = cur.fetchone()
+    previous_id = previous['id'] if previous else None
+    
+    if previous_id:
+        cur.execute(
+            "UPDATE elections SET status = 'closed', closed_at = CURRENT_TIMESTAMP WHERE id = %s",
+            (previous_id,)
+        )
+    
+    cur.execute("INSERT INTO elections (name) VALUES (%s)", (name or 'Election',))
+    
+    return previous_id, cur.lastrowid
+
+@job_target('purge_election')
+def purge_election_votes(progress, election_id):
+    """Background job: delete a closed election's ballots in short chunked transactions"""
+    chunk_size = current_app.config['ELECTION_PURGE_CHUNK_SIZE']
+    deleted = 0
+    
+    cur = mysql.connection.cursor()
+    cur.execute("SELECT status FROM elections WHERE id = %s", (election_id,))
+    election = cur.fetchone()
+    
+    if not election:
+        cur.close()
+        raise ValueError(f'Election {election_id} not found')
+    if election['status'] == 'open':
+        cur.close()
+        raise ValueError('Cannot purge the open election')
+    
+    while True:
+        cur.execute("DELETE FROM votes WHERE election_id = %s LIMIT %s", (election_id, chunk_size))
+        mysql.connection.commit()
+        if cur.rowcount == 0:
+            break
+        deleted += cur.rowcount
+        progress.update(election_id=election_id, votes_deleted=deleted)
+    
+    cur.execute("UPDATE elections SET status = 'purged' WHERE id = %s", (election_id,))
+    mysql.connection.commit()
+    cur.close()
+    
+    progress.update(force=True, election_id=election_id, votes_deleted=deleted)
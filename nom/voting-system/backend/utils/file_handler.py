@@ -75,4 +75,21 @@ def save_base64_image(base64_data, filename_prefix="campaign"):
         f.write(base64.b64decode(image_data))
     
     # Return relative path for database storage
-    return f"campaigns/{unique_filename}"
\ No newline at end of file
+    return f"campaigns/{unique_filename}"
+
+def upload_path_from_url(value):
+    """Return the upload-relative path a stored logo/image value points at, or None"""
+    if not value:
+        return None
+    
+    # Values saved from the upload endpoints are full URLs ending in /uploads/<path>
+    if '/uploads/' in value:
+        value = value.split('/uploads/', 1)[1]
+    elif value.startswith('http://') or value.startswith('https://'):
+        return None
+    
+    # Emoji placeholders have no path component
+    if '/' not in value:
+        return None
+    
+    return value.split('?', 1)[0].lstrip('/')
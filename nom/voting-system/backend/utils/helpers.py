@@ -1,8 +1,7 @@
 from flask import session, jsonify
 from functools import wraps
-from flask_mysqldb import MySQL
-
-mysql = MySQL()
+from utils.db import mysql
+from utils.elections import get_active_election_id
 
 def log_action(action, user_id=None, details=None):
     """Log system actions to database"""
@@ -46,7 +45,11 @@ def get_current_user():
     
     try:
         cur = mysql.connection.cursor()
-        cur.execute("SELECT id, name, email, role, has_voted FROM users WHERE id = %s", (session['user_id'],))
+        election_id = get_active_election_id(cur)
+        cur.execute("""
+            SELECT id, name, email, role, COALESCE(voted_election_id = %s, FALSE) as has_voted
+            FROM users WHERE id = %s AND deleted_at IS NULL
+        """, (election_id, session['user_id']))
         user = cur.fetchone()
         cur.close()
         return user
@@ -0,0 +1,215 @@
+import json
+import os
+import threading
+import time
+from flask import current_app
+from utils.db import mysql
+
+# Progress rows are rewritten at most this often so chunked jobs don't spam the table
+PROGRESS_WRITE_INTERVAL = 0.5
+
+config = {}
+# kind -> target, so a job abandoned by a dead worker can be started again
+_targets = {}
+# Ids of the jobs this process runs, whose leases the heartbeat renews
+_owned = set()
+_owned_lock = threading.Lock()
+_started = {'pid': None}
+
+class JobProgress:
+    """Progress handle passed to a background job target"""
+    
+    def __init__(self, job_id, values=None):
+        self.job_id = job_id
+        self.values = values or {}
+        self._last_write = 0.0
+    
+    def update(self, force=False, **values):
+        """Merge progress counters and persist them to the jobs table"""
+        self.values.update(values)
+        now = time.monotonic()
+        if not force and now - self._last_write < PROGRESS_WRITE_INTERVAL:
+            return
+        self._last_write = now
+        _write_job(self.job_id, progress=self.values)
+
+def _write_job(job_id, status=None, progress=None, error=None):
+    updates = []
+    params = []
+    
+    if status is not None:
+        updates.append("status = %s")
+        params.append(status)
+    
+    if progress is not None:
+        updates.append("progress = %s")
+        params.append(json.dumps(progress, default=str))
+    
+    if error is not None:
+        updates.append("error = %s")
+        params.append(error)
+    
+    params.append(job_id)
+    cur = mysql.connection.cursor()
+    cur.execute(f"UPDATE jobs SET {', '.join(updates)} WHERE id = %s", tuple(params))
+    mysql.connection.commit()
+    cur.close()
+
+def job_target(kind):
+    """Decorator: register f as the target of jobs of this kind, so they can be resumed.
+    
+    The defining module must be imported when the app is built (the admin
+    blueprint imports every target), not lazily inside a view.
+    """
+    def decorator(f):
+        _targets[kind] = f
+        return f
+    return decorator
+
+def _run_job(app, job_id, target, args, progress_values=None):
+    with app.app_context():
+        progress = JobProgress(job_id, progress_values)
+        try:
+            _write_job(job_id, status='running')
+            target(progress, *args)
+            _write_job(job_id, status='completed', progress=progress.values)
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            try:
+                mysql.connection.rollback()
+                _write_job(job_id, status='failed', progress=progress.values, error=str(e))
+            except Exception as write_error:
+                print(f"Could not record failure of job {job_id}: {write_error}")
+        finally:
+            with _owned_lock:
+                _owned.discard(job_id)
+
+def _spawn(app, job_id, kind, target, args, progress_values=None):
+    with _owned_lock:
+        _owned.add(job_id)
+    thread = threading.Thread(
+        target=_run_job,
+        args=(app, job_id, target, args, progress_values),
+        name=f'job-{kind}-{job_id}',
+        daemon=True
+    )
+    thread.start()
+
+def start_job(kind, target, *args, created_by=None):
+    """Record a job and run target(progress, *args) on a background thread.
+    
+    Job state lives in the jobs table so any worker can report progress. The
+    running worker holds a lease on the row; if it dies (a recycle or a crash)
+    the lease lapses and another worker starts the job again from its stored
+    args, so targets must be registered with @job_target and safe to re-run.
+    """
+    cur = mysql.connection.cursor()
+    cur.execute("""
+        INSERT INTO jobs (kind, args, status, lease_expires_at, created_by)
+        VALUES (%s, %s, 'pending', NOW() + INTERVAL %s SECOND, %s)
+    """, (kind, json.dumps(args), config['lease_seconds'], created_by))
+    mysql.connection.commit()
+    job_id = cur.lastrowid
+    cur.close()
+    
+    _spawn(current_app._get_current_object(), job_id, kind, target, args)
+    
+    return job_id
+
+def resume_stale_jobs():
+    """Start again every unfinished job whose worker stopped renewing its lease; returns how many"""
+    cur = mysql.connection.cursor()
+    cur.execute("""
+        SELECT id, kind, args, progress
+        FROM jobs
+        WHERE status IN ('pending', 'running')
+          AND (lease_expires_at IS NULL OR lease_expires_at < NOW())
+    """)
+    stale = cur.fetchall()
+    
+    resumed = 0
+    for job in stale:
+        target = _targets.get(job['kind'])
+        if target is None or job['args'] is None:
+            cur.execute(
+                "UPDATE jobs SET status = 'failed', error = %s WHERE id = %s AND status IN ('pending', 'running')",
+                ('Abandoned by a worker restart and cannot be resumed', job['id'])
+            )
+            mysql.connection.commit()
+            continue
+        
+        # Claim the row; another worker may be resuming it at the same moment
+        cur.execute("""
+            UPDATE jobs SET lease_expires_at = NOW() + INTERVAL %s SECOND
+            WHERE id = %s AND status IN ('pending', 'running')
+              AND (lease_expires_at IS NULL OR lease_expires_at < NOW())
+        """, (config['lease_seconds'], job['id']))
+        mysql.connection.commit()
+        if cur.rowcount != 1:
+            continue
+        
+        progress = json.loads(job['progress']) if job['progress'] else {}
+        progress['resumed'] = progress.get('resumed', 0) + 1
+        print(f"Resuming job {job['id']} ({job['kind']}) left by a stopped worker")
+        _spawn(current_app._get_current_object(), job['id'], job['kind'], target, tuple(json.loads(job['args'])), progress)
+        resumed += 1
+    
+    cur.close()
+    return resumed
+
+def _heartbeat(app):
+    """Background thread: renew this process's job leases and pick up abandoned jobs"""
+    while True:
+        try:
+            with app.app_context():
+                with _owned_lock:
+                    owned = sorted(_owned)
+                if owned:
+                    cur = mysql.connection.cursor()
+                    cur.execute(
+                        f"UPDATE jobs SET lease_expires_at = NOW() + INTERVAL %s SECOND WHERE id IN ({', '.join(['%s'] * len(owned))})",
+                        (config['lease_seconds'], *owned)
+                    )
+                    mysql.connection.commit()
+                    cur.close()
+                resume_stale_jobs()
+        except Exception as e:
+            print(f"Job heartbeat failed: {e}")
+        time.sleep(config['heartbeat_seconds'])
+
+def start():
+    """Start this worker's heartbeat thread (run post-fork, so it resumes stale jobs at once)"""
+    if _started['pid'] == os.getpid():
+        return
+    _started['pid'] = os.getpid()
+    app = current_app._get_current_object()
+    threading.Thread(target=_heartbeat, args=(app,), name='jobs-heartbeat', daemon=True).start()
+
+def running_jobs():
+    """Number of job threads running in this process"""
+    return sum(1 for thread in threading.enumerate() if thread.name.startswith('job-'))
+
+def get_job(job_id):
+    """Return a job row with its progress decoded, or None"""
+    cur = mysql.connection.cursor()
+    cur.execute("""
+        SELECT id, kind, status, progress, error, created_at, updated_at
+        FROM jobs
+        WHERE id = %s
+    """, (job_id,))
+    job = cur.fetchone()
+    cur.close()
+    
+    if job:
+        job['progress'] = json.loads(job['progress']) if job['progress'] else {}
+    
+    return job
+
+def init_app(app):
+    from utils import readiness
+    
+    config.update(
+        lease_seconds=app.config['JOB_LEASE_SECONDS'],
+        heartbeat_seconds=app.config['JOB_HEARTBEAT_SECONDS']
+    )
+    readiness.register_background(start)
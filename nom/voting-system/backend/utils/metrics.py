@@ -0,0 +1,208 @@
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from flask import request, g
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Each thread aggregates into its own shard so recording never takes a lock.
+# Shards are only registered (under a lock) the first time a thread records.
+_local = threading.local()
+_shards = []
+_shards_lock = threading.Lock()
+
+# name -> (type, help) for counters other modules record with inc()
+_descriptions = {}
+# name -> (help, callback returning {labels_tuple: value}) for point-in-time gauges
+_gauges = {}
+
+class _Shard:
+    __slots__ = ('routes', 'counters')
+    
+    def __init__(self):
+        self.routes = {}
+        self.counters = {}
+
+class _RouteStats:
+    __slots__ = ('buckets', 'count', 'total_seconds', 'statuses', 'queries', 'db_seconds')
+    
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.statuses = {}
+        self.queries = 0
+        self.db_seconds = 0.0
+
+def _shard():
+    shard = getattr(_local, 'shard', None)
+    if shard is None:
+        shard = _local.shard = _Shard()
+        with _shards_lock:
+            _shards.append(shard)
+    return shard
+
+def describe(name, help_text, metric_type='counter'):
+    """Register the HELP/TYPE lines for a metric recorded with inc()"""
+    _descriptions[name] = (metric_type, help_text)
+
+def register_gauge(name, help_text, callback):
+    """Expose a gauge whose value is read from callback() at scrape time.
+    
+    callback returns a number, or a dict mapping label tuples such as
+    (('priority', 'high'),) to numbers.
+    """
+    _gauges[name] = (help_text, callback)
+
+def inc(name, amount=1, **labels):
+    """Add to a counter, e.g. inc('votex_rejections_total', reason='rate_limit')"""
+    counters = _shard().counters
+    key = (name, tuple(sorted(labels.items())))
+    counters[key] = counters.get(key, 0) + amount
+
+def record_query(seconds):
+    """Called by the instrumented cursor after every statement"""
+    state = getattr(_local, 'request', None)
+    if state is not None:
+        state[0] += 1
+        state[1] += seconds
+
+def current_db_seconds():
+    """DB time spent so far by the request running on this thread"""
+    state = getattr(_local, 'request', None)
+    return state[1] if state is not None else 0.0
+
+def start_request():
+    _local.request = [0, 0.0]
+    g._metrics_start = perf_counter()
+
+def finish_request(response):
+    start = g.pop('_metrics_start', None)
+    if start is None:
+        return response
+    route = request.endpoint or 'unmatched'
+    
+    if response.is_streamed:
+        # The body (and its SQL) runs after this hook; record once the stream closes
+        response.call_on_close(lambda: _record(route, response.status_code, start))
+    else:
+        _record(route, response.status_code, start)
+    return response
+
+def _record(route, status, start):
+    elapsed = perf_counter() - start
+    
+    state = _local.request
+    _local.request = None
+    
+    routes = _shard().routes
+    stats = routes.get(route)
+    if stats is None:
+        stats = routes[route] = _RouteStats()
+    
+    stats.buckets[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+    stats.count += 1
+    stats.total_seconds += elapsed
+    stats.statuses[status] = stats.statuses.get(status, 0) + 1
+    stats.queries += state[0]
+    stats.db_seconds += state[1]
+
+def init_app(app):
+    """Record latency, status and DB usage for every request"""
+    app.before_request(start_request)
+    app.after_request(finish_request)
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+def render():
+    """Merge every thread's shard and return the Prometheus text exposition"""
+    with _shards_lock:
+        shards = list(_shards)
+    
+    routes = {}
+    counters = {}
+    for shard in shards:
+        # Copy before iterating; the owning thread may add keys concurrently
+        for route, stats in list(shard.routes.items()):
+            merged = routes.get(route)
+            if merged is None:
+                merged = routes[route] = _RouteStats()
+            for i, bucket in enumerate(stats.buckets):
+                merged.buckets[i] += bucket
+            merged.count += stats.count
+            merged.total_seconds += stats.total_seconds
+            for status, count in list(stats.statuses.items()):
+                merged.statuses[status] = merged.statuses.get(status, 0) + count
+            merged.queries += stats.queries
+            merged.db_seconds += stats.db_seconds
+        for key, value in list(shard.counters.items()):
+            counters[key] = counters.get(key, 0) + value
+    
+    lines = [
+        '# HELP votex_http_request_duration_seconds Request latency by route',
+        '# TYPE votex_http_request_duration_seconds histogram'
+    ]
+    for route in sorted(routes):
+        stats = routes[route]
+        cumulative = 0
+        for bound, bucket in zip(LATENCY_BUCKETS + (float('inf'),), stats.buckets):
+            cumulative += bucket
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'votex_http_request_duration_seconds_bucket{{route="{route}",le="{le}"}} {cumulative}')
+        lines.append(f'votex_http_request_duration_seconds_sum{{route="{route}"}} {stats.total_seconds!r}')
+        lines.append(f'votex_http_request_duration_seconds_count{{route="{route}"}} {stats.count}')
+    
+    lines.append('# HELP votex_http_responses_total Responses by route and status code')
+    lines.append('# TYPE votex_http_responses_total counter')
+    for route in sorted(routes):
+        for status, count in sorted(routes[route].statuses.items()):
+            lines.append(f'votex_http_responses_total{{route="{route}",status="{status}"}} {count}')
+    
+    lines.append('# HELP votex_db_queries_total SQL statements executed by route')
+    lines.append('# TYPE votex_db_queries_total counter')
+    for route in sorted(routes):
+        lines.append(f'votex_db_queries_total{{route="{route}"}} {routes[route].queries}')
+    
+    lines.append('# HELP votex_db_seconds_total Time spent in SQL statements by route')
+    lines.append('# TYPE votex_db_seconds_total counter')
+    for route in sorted(routes):
+        lines.append(f'votex_db_seconds_total{{route="{route}"}} {routes[route].db_seconds!r}')
+    
+    by_name = {}
+    for (name, labels), value in counters.items():
+        by_name.setdefault(name, []).append((labels, value))
+    for name in sorted(by_name):
+        metric_type, help_text = _descriptions.get(name, ('counter', name))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for labels, value in sorted(by_name[name]):
+            lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    
+    for name in sorted(_gauges):
+        help_text, callback = _gauges[name]
+        try:
+            values = callback()
+        except Exception as e:
+            print(f"Metrics gauge {name} failed: {e}")
+            continue
+        if not isinstance(values, dict):
+            values = {(): values}
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} gauge')
+        for labels, value in sorted(values.items()):
+            lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,74 @@
+import threading
+from collections import OrderedDict
+from utils import metrics, shared_store
+
+cache = None
+
+metrics.describe('votex_party_owner_cache_total', 'Party owner lookups by outcome (hit, miss)')
+
+class OwnerCache:
+    """LRU of user id -> (party id, parties version stamp) for party accounts.
+    
+    An entry is only trusted while the shared store still publishes the
+    version it was stored under. Creating, renaming or deleting any party
+    bumps that stamp, so a deleted party stops resolving within one store
+    refresh. Users without a party are never cached, so a newly created
+    party is seen at once.
+    """
+    
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[1] != version:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[0]
+    
+    def put(self, user_id, party_id, version):
+        with self._lock:
+            self._entries[user_id] = (party_id, version)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def forget(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+def owned_party_id(cur, user_id):
+    """Id of the live party user_id owns, or None; cached while the shared store is fresh"""
+    snapshot = shared_store.read()
+    version = snapshot['versions']['parties'] if snapshot is not None else None
+    
+    if version is not None:
+        party_id = cache.get(user_id, version)
+        if party_id is not None:
+            metrics.inc('votex_party_owner_cache_total', outcome='hit')
+            return party_id
+    
+    metrics.inc('votex_party_owner_cache_total', outcome='miss')
+    cur.execute("SELECT id FROM parties WHERE created_by = %s AND deleted_at IS NULL", (user_id,))
+    party = cur.fetchone()
+    if not party:
+        return None
+    
+    if version is not None:
+        cache.put(user_id, party['id'], version)
+    return party['id']
+
+def forget(user_id):
+    """Drop a cached mapping at once (this worker); other workers follow the version stamp"""
+    if cache is not None:
+        cache.forget(user_id)
+
+def init_app(app):
+    global cache
+    cache = OwnerCache(app.config['PARTY_OWNER_CACHE_SIZE'])
@@ -0,0 +1,51 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+_running = threading.Lock()
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+def sample_stacks(seconds, interval=0.005):
+    """Sample every thread's stack for `seconds` and return collapsed stacks.
+    
+    Output lines are 'outer;...;inner count', the input format of
+    flamegraph.pl and speedscope. Runs on the calling thread and only one
+    profile may run at a time; a second call raises RuntimeError.
+    """
+    if not _running.acquire(blocking=False):
+        raise RuntimeError('A profile is already running')
+    
+    try:
+        own_thread = threading.get_ident()
+        names = {}
+        stacks = Counter()
+        samples = 0
+        deadline = time.monotonic() + seconds
+        
+        while time.monotonic() < deadline:
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f'thread-{thread_id}'))
+                stack.reverse()
+                stacks[';'.join(stack)] += 1
+            
+            samples += 1
+            time.sleep(interval)
+        
+        lines = [f'{stack} {count}' for stack, count in stacks.most_common()]
+        return samples, '\n'.join(lines) + '\n'
+    finally:
+        _running.release()
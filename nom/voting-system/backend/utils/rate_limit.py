@@ -0,0 +1,157 @@
+"""Token-bucket rate limits shared by every worker on the host.
+
+Buckets live in one mmap file (RATE_LIMIT_PATH, under /dev/shm by default)
+organised as a set-associative table: a key's 64-bit fingerprint picks a
+set of WAYS slots, and a key missing from its set takes the slot idle the
+longest (an idle bucket has refilled anyway). Each slot holds
+
+    <fingerprint: u64> <tokens: f64> <updated at: f64> <padding>
+
+Sets are guarded by STRIPES byte-range locks on the companion .lock file,
+plus a thread lock per stripe since fcntl locks don't exclude threads of
+the same process. A check is a hash, two lock round trips and one slot
+read-modify-write, and runs before any password hashing or SQL.
+"""
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from functools import wraps
+from flask import jsonify, request, session
+from utils import metrics
+
+SLOT = struct.Struct('<Qdd8x')
+WAYS = 4
+STRIPES = 256
+
+config = {}
+_table = {'pid': None, 'table': None}
+_table_lock = threading.Lock()
+
+metrics.describe('votex_rate_limit_rejections_total', 'Requests rejected by rate limiting')
+
+def default_path(db_name):
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, f'votex-ratelimit-{db_name}')
+
+class BucketTable:
+    def __init__(self, path, slots):
+        self.sets = max(1, slots // WAYS)
+        size = self.sets * WAYS * SLOT.size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self.map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self.lock_fd = os.open(path + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+        self.thread_locks = [threading.Lock() for _ in range(STRIPES)]
+    
+    def take(self, key, burst, per_seconds):
+        """Spend one token from key's bucket; return 0 if allowed, else seconds until a token is available"""
+        fingerprint = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little') or 1
+        set_index = fingerprint % self.sets
+        stripe = set_index % STRIPES
+        rate = burst / per_seconds
+        base = set_index * WAYS * SLOT.size
+        
+        with self.thread_locks[stripe]:
+            fcntl.lockf(self.lock_fd, fcntl.LOCK_EX, 1, stripe)
+            try:
+                now = time.time()
+                offset = None
+                oldest = None
+                for way in range(WAYS):
+                    slot_offset = base + way * SLOT.size
+                    slot_fingerprint, tokens, updated = SLOT.unpack_from(self.map, slot_offset)
+                    if slot_fingerprint == fingerprint:
+                        offset = slot_offset
+                        tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+                        break
+                    if oldest is None or updated < oldest[1]:
+                        oldest = (slot_offset, updated)
+                else:
+                    offset, tokens = oldest[0], float(burst)
+                
+                if tokens >= 1:
+                    SLOT.pack_into(self.map, offset, fingerprint, tokens - 1, now)
+                    return 0
+                SLOT.pack_into(self.map, offset, fingerprint, tokens, now)
+                return (1 - tokens) / rate
+            finally:
+                fcntl.lockf(self.lock_fd, fcntl.LOCK_UN, 1, stripe)
+
+def table():
+    """This process's mapping of the bucket table (opened again after a fork)"""
+    pid = os.getpid()
+    if _table['pid'] == pid:
+        return _table['table']
+    with _table_lock:
+        if _table['pid'] != pid:
+            _table['table'] = BucketTable(config['path'], config['slots'])
+            _table['pid'] = pid
+    return _table['table']
+
+def client_ip():
+    """The client address, read from X-Forwarded-For when RATE_LIMIT_PROXY_HOPS proxies sit in front"""
+    hops = config.get('proxy_hops', 0)
+    if hops:
+        forwarded = [part.strip() for part in request.headers.get('X-Forwarded-For', '').split(',') if part.strip()]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.remote_addr or 'unknown'
+
+def json_email():
+    """Account key for login/register: the email in the JSON body, case-folded"""
+    data = request.get_json(silent=True)
+    email = data.get('email') if isinstance(data, dict) else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+def session_user():
+    return session.get('user_id')
+
+def rate_limited(route, account=None):
+    """Decorator: 429 + Retry-After once the client IP or account (account() -> key) exceeds RATE_LIMITS[route]"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            limits = config.get('limits', {}).get(route) if config.get('enabled') else None
+            if not limits:
+                return f(*args, **kwargs)
+            
+            checks = []
+            if 'ip' in limits:
+                checks.append(('ip', client_ip()))
+            if 'account' in limits and account is not None:
+                value = account()
+                if value is not None:
+                    checks.append(('account', value))
+            
+            buckets = table()
+            for dimension, value in checks:
+                burst, per_seconds = limits[dimension]
+                wait = buckets.take(f'{route}:{dimension}:{value}', burst, per_seconds)
+                if wait:
+                    metrics.inc('votex_rate_limit_rejections_total', route=route, dimension=dimension)
+                    return (jsonify({'error': 'Too many requests, please retry later'}), 429,
+                            {'Retry-After': str(math.ceil(wait))})
+            
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def init_app(app):
+    app_config = app.config
+    config.update(
+        enabled=app_config['RATE_LIMIT_ENABLED'],
+        path=app_config['RATE_LIMIT_PATH'] or default_path(app_config['MYSQL_DB']),
+        slots=app_config['RATE_LIMIT_SLOTS'],
+        proxy_hops=app_config['RATE_LIMIT_PROXY_HOPS'],
+        limits=app_config['RATE_LIMITS']
+    )
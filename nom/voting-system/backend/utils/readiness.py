@@ -0,0 +1,156 @@
+import threading
+import time
+from flask import current_app
+from utils.db import mysql
+from utils import admission, ballot_journal
+from utils.jobs import running_jobs
+
+# Hot queries run during warm-up so their pages and plans are cached before traffic arrives
+WARMUP_QUERIES = [
+    ("""
+        SELECT p.id, p.name, p.description, p.logo_url, COUNT(v.id) as vote_count
+        FROM parties p
+        LEFT JOIN votes v ON p.id = v.party_id
+            AND v.election_id = (SELECT MAX(id) FROM elections WHERE status = 'open')
+        WHERE p.deleted_at IS NULL
+        GROUP BY p.id
+    """, ()),
+    ("""
+        SELECT c.id, c.party_id, c.title, c.image_url, c.created_at, p.name
+        FROM campaigns c
+        JOIN parties p ON c.party_id = p.id
+        WHERE p.deleted_at IS NULL
+        ORDER BY c.created_at DESC, c.id DESC
+        LIMIT 100
+    """, ())
+]
+
+# Per-worker background thread starters, each called with no arguments in an app context
+_background = []
+
+_state = {'warmed': False, 'warming': False, 'warmup_error': None, 'warmup_seconds': None}
+_cache = {'checked_at': 0.0, 'result': None}
+_lock = threading.Lock()
+_warm_lock = threading.Lock()
+
+def register_background(function):
+    """Run function() when a worker starts, whether or not its warm-up succeeds"""
+    _background.append(function)
+    return function
+
+def start_background(app):
+    """Start this worker's background threads; they must not wait for the database to be warm"""
+    with app.app_context():
+        for function in _background:
+            try:
+                function()
+            except Exception as e:
+                print(f"Background start failed in {function.__module__}: {e}")
+
+def warm_up(app):
+    """Open pool connections and prime hot data; readiness stays false until this succeeds"""
+    with _warm_lock:
+        if _state['warming']:
+            return False
+        _state['warming'] = True
+    
+    start = time.monotonic()
+    try:
+        with app.app_context():
+            mysql.pool.fill(app.config['WARMUP_POOL_CONNECTIONS'])
+            
+            cur = mysql.connection.cursor()
+            for query, params in WARMUP_QUERIES:
+                cur.execute(query, params)
+                cur.fetchall()
+            cur.close()
+        
+        _state.update(warmed=True, warmup_error=None, warmup_seconds=round(time.monotonic() - start, 3))
+        return True
+    except Exception as e:
+        print(f"Warm-up failed: {e}")
+        _state['warmup_error'] = str(e)
+        return False
+    finally:
+        _state['warming'] = False
+
+def _check_database():
+    start = time.perf_counter()
+    conn = mysql.pool.acquire(timeout=current_app.config['READY_DB_TIMEOUT_SECONDS'])
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT 1")
+        cur.fetchall()
+        cur.close()
+    finally:
+        mysql.pool.release(conn)
+    return round((time.perf_counter() - start) * 1000, 2)
+
+def _run_checks():
+    config = current_app.config
+    checks = {}
+    ready = True
+    
+    try:
+        checks['database'] = {'ok': True, 'latency_ms': _check_database()}
+    except Exception as e:
+        checks['database'] = {'ok': False, 'error': str(e)}
+        ready = False
+    
+    pool = mysql.pool.stats()
+    pool['ok'] = pool['waiting'] <= config['READY_MAX_POOL_WAITING']
+    checks['pool'] = pool
+    ready = ready and pool['ok']
+    
+    limiter = admission.limiter
+    queued = limiter.waiting if limiter else 0
+    checks['queues'] = {
+        'ok': queued <= config['READY_MAX_ADMISSION_QUEUE'],
+        'admission_waiting': queued,
+        'admission_inflight': limiter.inflight if limiter else 0,
+        'background_jobs': running_jobs()
+    }
+    ready = ready and checks['queues']['ok']
+    
+    if ballot_journal.enabled():
+        backlog_bytes, lag = ballot_journal.backlog()
+        checks['journal'] = {
+            'ok': lag <= config['READY_MAX_JOURNAL_LAG_SECONDS'],
+            'backlog_bytes': backlog_bytes,
+            'lag_seconds': round(lag, 3)
+        }
+        ready = ready and checks['journal']['ok']
+    
+    checks['warmup'] = {
+        'ok': _state['warmed'],
+        'seconds': _state['warmup_seconds'],
+        'error': _state['warmup_error']
+    }
+    ready = ready and _state['warmed']
+    
+    return {'status': 'ready' if ready else 'not_ready', 'checks': checks}
+
+def check():
+    """Return the readiness report, recomputed at most every READY_CACHE_SECONDS.
+    
+    Only one thread runs the checks at a time; concurrent probes get the
+    previous result instead of piling onto the database.
+    """
+    now = time.monotonic()
+    if _cache['result'] is not None and now - _cache['checked_at'] < current_app.config['READY_CACHE_SECONDS']:
+        return _cache['result']
+    
+    if not _lock.acquire(blocking=_cache['result'] is None):
+        return _cache['result']
+    try:
+        result = _run_checks()
+        _cache.update(checked_at=time.monotonic(), result=result)
+    finally:
+        _lock.release()
+    
+    # A worker whose warm-up failed (say MySQL was still starting) retries it in the background
+    if not _state['warmed'] and not _state['warming'] and result['checks']['database']['ok']:
+        app = current_app._get_current_object()
+        threading.Thread(target=warm_up, args=(app,), name='warm-up', daemon=True).start()
+    
+    return result
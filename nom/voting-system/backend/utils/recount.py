@@ -0,0 +1,301 @@
+import csv
+import gzip
+import json
+import multiprocessing
+import os
+import numpy as np
+import MySQLdb
+from MySQLdb.cursors import SSCursor
+from flask import current_app
+from utils.db import mysql, instrumented_cursor_class
+
+# Party and voter ids fit comfortably in 32 bits; halves memory for large recounts
+ID_DTYPE = np.int32
+
+def _connection_settings(config):
+    """Plain MySQLdb connect() arguments; worker processes open their own connections"""
+    settings = {
+        'host': config['MYSQL_HOST'],
+        'user': config['MYSQL_USER'],
+        'passwd': config['MYSQL_PASSWORD'],
+        'db': config['MYSQL_DB']
+    }
+    if config.get('MYSQL_PORT'):
+        settings['port'] = config['MYSQL_PORT']
+    return settings
+
+def _tally_range(task):
+    """Worker: stream one votes id range and bincount its party ids"""
+    settings, election_id, start_id, end_id, chunk_size, minlength, with_voters = task
+    
+    conn = MySQLdb.connect(**settings)
+    try:
+        cur = conn.cursor(SSCursor)
+        cur.execute("""
+            SELECT party_id, voter_id
+            FROM votes
+            WHERE election_id = %s AND id >= %s AND id < %s
+        """, (election_id, start_id, end_id))
+        return _tally_rows(cur, chunk_size, minlength, with_voters)
+    finally:
+        conn.close()
+
+def _tally_rows(cur, chunk_size, minlength, with_voters):
+    """Bincount the (party_id, voter_id) rows of an executed streaming cursor, then close it"""
+    counts = np.zeros(minlength, dtype=np.int64)
+    voters = []
+    while True:
+        rows = cur.fetchmany(chunk_size)
+        if not rows:
+            break
+        block = np.array(rows, dtype=ID_DTYPE)
+        counts = _add_counts(counts, block[:, 0])
+        if with_voters:
+            voters.append(block[:, 1])
+    cur.close()
+    
+    voter_ids = np.concatenate(voters) if voters else np.empty(0, dtype=ID_DTYPE)
+    return counts, voter_ids
+
+def _merge_counts(counts, other):
+    """Sum two per-party count arrays that may differ in length"""
+    if len(other) > len(counts):
+        counts, other = other, counts
+    counts[:len(other)] += other
+    return counts
+
+def _add_counts(counts, party_ids):
+    return _merge_counts(counts, np.bincount(party_ids, minlength=len(counts)))
+
+def _split_ranges(min_id, max_id, parts):
+    step = max(1, -(-(max_id - min_id + 1) // parts))
+    return [(start, min(start + step, max_id + 1)) for start in range(min_id, max_id + 1, step)]
+
+def tally_database(election_id, processes=None, chunk_size=None, with_voters=True):
+    """Recount an election's ballots straight from the votes table.
+    
+    The primary key range is split into several slices per process so slow
+    slices don't leave the other workers idle. Returns (counts, voter_ids)
+    where counts[party_id] is that party's ballot count.
+    """
+    config = current_app.config
+    processes = processes or os.cpu_count() or 1
+    chunk_size = chunk_size or config['RECOUNT_CHUNK_SIZE']
+    
+    cur = mysql.connection.cursor()
+    cur.execute("""
+        SELECT MIN(id) as min_id, MAX(id) as max_id
+        FROM votes
+        WHERE election_id = %s
+    """, (election_id,))
+    bounds = cur.fetchone()
+    cur.execute("SELECT COALESCE(MAX(id), 0) + 1 as minlength FROM parties")
+    minlength = cur.fetchone()['minlength']
+    cur.close()
+    
+    if bounds['min_id'] is None:
+        return np.zeros(minlength, dtype=np.int64), np.empty(0, dtype=ID_DTYPE)
+    
+    settings = _connection_settings(config)
+    tasks = [
+        (settings, election_id, start, end, chunk_size, minlength, with_voters)
+        for start, end in _split_ranges(bounds['min_id'], bounds['max_id'], processes * 4)
+    ]
+    
+    counts = np.zeros(minlength, dtype=np.int64)
+    voters = []
+    if processes == 1:
+        results = map(_tally_range, tasks)
+    else:
+        pool = multiprocessing.Pool(processes)
+        results = pool.imap_unordered(_tally_range, tasks)
+    try:
+        for range_counts, range_voters in results:
+            counts = _merge_counts(counts, range_counts)
+            voters.append(range_voters)
+    finally:
+        if processes != 1:
+            pool.terminate()
+    
+    voter_ids = np.concatenate(voters) if voters else np.empty(0, dtype=ID_DTYPE)
+    return counts, voter_ids
+
+def tally_snapshot(election_id, chunk_size=None, with_voters=True):
+    """Recount on the app's own connection, inside whatever snapshot it holds.
+    
+    Slower than tally_database for big elections, but the only way to read
+    the ballots of an open election consistently with other queries.
+    """
+    chunk_size = chunk_size or current_app.config['RECOUNT_CHUNK_SIZE']
+    
+    cur = mysql.connection.cursor()
+    cur.execute("SELECT COALESCE(MAX(id), 0) + 1 as minlength FROM parties")
+    minlength = cur.fetchone()['minlength']
+    cur.close()
+    
+    stream = mysql.connection.cursor(instrumented_cursor_class(SSCursor))
+    stream.execute("SELECT party_id, voter_id FROM votes WHERE election_id = %s", (election_id,))
+    return _tally_rows(stream, chunk_size, minlength, with_voters)
+
+def _iter_file_blocks(path, chunk_size):
+    """Yield (party_ids, voter_ids) arrays from a votes CSV export or an archived votes file"""
+    if path.endswith('.jsonl.gz'):
+        # Archive row groups are already column-oriented
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            columns = json.loads(f.readline())['columns']
+            party_col, voter_col = columns.index('party_id'), columns.index('voter_id')
+            for line in f:
+                group = json.loads(line)
+                if group:
+                    yield np.array(group[party_col], dtype=ID_DTYPE), np.array(group[voter_col], dtype=ID_DTYPE)
+        return
+    
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        party_col, voter_col = header.index('Party ID'), header.index('Voter ID')
+        parties, voters = [], []
+        for row in reader:
+            parties.append(row[party_col])
+            voters.append(row[voter_col])
+            if len(parties) >= chunk_size:
+                yield np.array(parties, dtype=ID_DTYPE), np.array(voters, dtype=ID_DTYPE)
+                parties, voters = [], []
+        if parties:
+            yield np.array(parties, dtype=ID_DTYPE), np.array(voters, dtype=ID_DTYPE)
+
+def tally_file(path, chunk_size=None):
+    """Recount ballots from a votes export (CSV) or an archived votes.jsonl.gz file"""
+    chunk_size = chunk_size or current_app.config['RECOUNT_CHUNK_SIZE']
+    counts = np.zeros(0, dtype=np.int64)
+    voters = []
+    for party_ids, voter_ids in _iter_file_blocks(path, chunk_size):
+        counts = _add_counts(counts, party_ids)
+        voters.append(voter_ids)
+    voter_ids = np.concatenate(voters) if voters else np.empty(0, dtype=ID_DTYPE)
+    return counts, voter_ids
+
+def _served_tallies(cur, election_id):
+    """The per-party counts the API serves for an election"""
+    cur.execute("SELECT status FROM elections WHERE id = %s", (election_id,))
+    election = cur.fetchone()
+    if not election:
+        raise ValueError(f'Election {election_id} not found')
+    
+    if election['status'] == 'archived':
+        from utils.archive import get_archived_results
+        results = get_archived_results(election_id)
+        return election['status'], {row['party_id']: row['vote_count'] for row in results['tallies']}
+    
+    cur.execute("""
+        SELECT p.id, COUNT(v.id) as vote_count
+        FROM parties p
+        LEFT JOIN votes v ON p.id = v.party_id AND v.election_id = %s
+        WHERE p.deleted_at IS NULL
+        GROUP BY p.id
+    """, (election_id,))
+    return election['status'], {row['id']: row['vote_count'] for row in cur.fetchall()}
+
+def _deleted_parties(cur):
+    """Ids of soft-deleted parties; the API no longer serves them, but their ballots wait for the purge job"""
+    cur.execute("SELECT id FROM parties WHERE deleted_at IS NOT NULL")
+    return {row['id'] for row in cur.fetchall()}
+
+def _flagged_voters(election_id, chunk_size):
+    """Ids of users marked as having voted in the election (users.voted_election_id)"""
+    stream = mysql.connection.cursor(instrumented_cursor_class(SSCursor))
+    stream.execute("SELECT id FROM users WHERE voted_election_id = %s", (election_id,))
+    blocks = []
+    while True:
+        rows = stream.fetchmany(chunk_size)
+        if not rows:
+            break
+        blocks.append(np.array(rows, dtype=ID_DTYPE).ravel())
+    stream.close()
+    return np.concatenate(blocks) if blocks else np.empty(0, dtype=ID_DTYPE)
+
+def recount(election_id, path=None, processes=None, chunk_size=None, check_voters=True, sample=20):
+    """Independently tabulate an election and cross-check it against what the API serves.
+    
+    Returns a report with the recounted and served tallies and every
+    discrepancy found; report['ok'] is True when nothing disagrees. Ballots
+    for soft-deleted parties are reported apart, as the API no longer
+    serves those parties.
+    
+    An open election keeps taking ballots, so its database recount, served
+    tallies and voter flags are all read from one consistent snapshot. A
+    file recount of an open election can't be, and says so in warnings.
+    """
+    chunk_size = chunk_size or current_app.config['RECOUNT_CHUNK_SIZE']
+    
+    cur = mysql.connection.cursor()
+    cur.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+    try:
+        status, served = _served_tallies(cur, election_id)
+        deleted_parties = _deleted_parties(cur)
+        
+        if path:
+            counts, voter_ids = tally_file(path, chunk_size)
+        elif status == 'open':
+            counts, voter_ids = tally_snapshot(election_id, chunk_size, with_voters=check_voters)
+        else:
+            # Nothing writes a closed election's ballots, so parallel connections see the same rows
+            counts, voter_ids = tally_database(election_id, processes, chunk_size, with_voters=check_voters)
+        
+        # Only the open election's voters still carry its id in voted_election_id;
+        # after it closes, anyone who votes again moves on to the next election
+        flagged = _flagged_voters(election_id, chunk_size) if check_voters and status == 'open' else None
+    finally:
+        cur.close()
+        mysql.connection.rollback()
+    
+    recounted = {int(party_id): int(count) for party_id, count in enumerate(counts) if count}
+    
+    tally_mismatches = []
+    deleted_party_ballots = {}
+    for party_id in sorted(set(recounted) | set(served)):
+        expected, actual = recounted.get(party_id, 0), served.get(party_id)
+        if actual is None and party_id in deleted_parties:
+            deleted_party_ballots[party_id] = expected
+        elif actual is None:
+            tally_mismatches.append({'party_id': party_id, 'recounted': expected, 'served': None})
+        elif expected != actual:
+            tally_mismatches.append({'party_id': party_id, 'recounted': expected, 'served': actual})
+    
+    report = {
+        'election_id': election_id,
+        'status': status,
+        'source': path or 'database',
+        'total_ballots': int(counts.sum()),
+        'served_total': sum(served.values()),
+        'tallies': recounted,
+        'tally_mismatches': tally_mismatches,
+        'deleted_party_ballots': deleted_party_ballots,
+        'warnings': []
+    }
+    if path and status == 'open':
+        report['warnings'].append('Election is still open; the file may trail the served tallies')
+    
+    if check_voters:
+        voter_ids.sort()
+        repeated = voter_ids[1:][voter_ids[1:] == voter_ids[:-1]]
+        unique_voters = np.unique(voter_ids)
+        
+        report['duplicate_voters'] = int(len(np.unique(repeated)))
+        report['duplicate_voter_sample'] = np.unique(repeated)[:sample].tolist()
+        
+        if flagged is not None:
+            unflagged = np.setdiff1d(unique_voters, flagged, assume_unique=True)
+            without_ballot = np.setdiff1d(flagged, unique_voters, assume_unique=True)
+            report['ballots_without_flag'] = int(len(unflagged))
+            report['ballots_without_flag_sample'] = unflagged[:sample].tolist()
+            report['flagged_without_ballot'] = int(len(without_ballot))
+            report['flagged_without_ballot_sample'] = without_ballot[:sample].tolist()
+    
+    report['ok'] = not (
+        tally_mismatches
+        or report.get('duplicate_voters')
+        or report.get('ballots_without_flag')
+        or report.get('flagged_without_ballot')
+    )
+    return report
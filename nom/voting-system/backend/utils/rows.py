@@ -0,0 +1,143 @@
+import csv
+import math
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from io import StringIO
+from json.encoder import encode_basestring_ascii
+from MySQLdb import cursors
+from flask import current_app, stream_with_context
+from utils.db import mysql, instrumented_cursor_class
+
+def tuple_cursor(server_side=False):
+    """A cursor on the request's connection that returns plain tuples instead of dicts"""
+    cursor_class = cursors.SSCursor if server_side else cursors.Cursor
+    return mysql.connection.cursor(instrumented_cursor_class(cursor_class))
+
+class RowSet:
+    """Query results kept as the driver's tuples plus one shared list of column names.
+    
+    A DictCursor builds a dict per row that repeats every key; here a row
+    costs one tuple, and encode_rows writes JSON straight from the tuples.
+    """
+    
+    __slots__ = ('columns', 'rows', '_index')
+    
+    def __init__(self, columns, rows):
+        self.columns = list(columns)
+        self.rows = rows if isinstance(rows, list) else list(rows)
+        self._index = {column: i for i, column in enumerate(self.columns)}
+    
+    @classmethod
+    def fetch(cls, cur):
+        """Build a RowSet from everything a tuple cursor's last query returned"""
+        return cls([column[0] for column in cur.description], cur.fetchall())
+    
+    def __len__(self):
+        return len(self.rows)
+    
+    def __iter__(self):
+        return iter(self.rows)
+    
+    def value(self, row, column):
+        return self.rows[row][self._index[column]]
+    
+    def truncate(self, count):
+        del self.rows[count:]
+    
+    def map_column(self, column, function):
+        """Replace every value of one column with function(value)"""
+        i = self._index[column]
+        self.rows = [row[:i] + (function(row[i]),) + row[i + 1:] for row in self.rows]
+    
+    def to_json(self):
+        return encode_rows(self.columns, self.rows)
+
+_DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = (None, 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+def _encode_datetime(value):
+    # Same wire format as Flask's default JSON provider (werkzeug's http_date), without
+    # its timetuple round trip; naive values are taken as UTC just as http_date does
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return '"%s, %02d %s %04d %02d:%02d:%02d GMT"' % (
+        _DAYS[value.weekday()], value.day, _MONTHS[value.month], value.year,
+        value.hour, value.minute, value.second
+    )
+
+def _encode_date(value):
+    return '"%s, %02d %s %04d 00:00:00 GMT"' % (_DAYS[value.weekday()], value.day, _MONTHS[value.month], value.year)
+
+def _encode_float(value):
+    return repr(value) if math.isfinite(value) else current_app.json.dumps(value)
+
+_ENCODERS = {
+    str: encode_basestring_ascii,
+    int: int.__repr__,
+    float: _encode_float,
+    bool: lambda value: 'true' if value else 'false',
+    type(None): lambda value: 'null',
+    datetime: _encode_datetime,
+    date: _encode_date,
+    Decimal: lambda value: '"' + str(value) + '"'
+}
+
+def encode_value(value):
+    encoder = _ENCODERS.get(type(value))
+    if encoder is None:
+        return current_app.json.dumps(value)
+    return encoder(value)
+
+def encode_rows(columns, rows):
+    """Encode tuple rows as a JSON array of objects keyed by columns"""
+    template = '{' + ','.join(
+        encode_basestring_ascii(column).replace('%', '%%') + ':%s' for column in columns
+    ) + '}'
+    get = _ENCODERS.get
+    return '[' + ','.join([
+        template % tuple([(get(type(value)) or encode_value)(value) for value in row])
+        for row in rows
+    ]) + ']'
+
+def json_response(**members):
+    """A JSON object response whose RowSet members are encoded from their tuples"""
+    body = '{' + ','.join(
+        encode_basestring_ascii(key) + ':' + (value.to_json() if isinstance(value, RowSet) else encode_value(value))
+        for key, value in members.items()
+    ) + '}'
+    return current_app.response_class(body, mimetype='application/json')
+
+def stream_csv(filename, header, query, params=(), chunk_size=None):
+    """Stream a query as a CSV download without loading the result set.
+    
+    The query's columns must already be in CSV order. Rows come through a
+    server-side cursor, so nothing else may use the connection until the
+    download finishes.
+    """
+    chunk_size = chunk_size or current_app.config['EXPORT_CHUNK_SIZE']
+    
+    def generate():
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+        
+        cur = tuple_cursor(server_side=True)
+        try:
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                writer.writerows(rows)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        finally:
+            cur.close()
+        
+        if buffer.tell():
+            yield buffer.getvalue()
+    
+    response = current_app.response_class(stream_with_context(generate()), mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
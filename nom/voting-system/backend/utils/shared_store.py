@@ -0,0 +1,374 @@
+"""Cross-worker snapshot of the party list, tallies and dashboard counts.
+
+Every gunicorn worker maps the same file (SHARED_STORE_PATH, under /dev/shm
+by default). One worker at a time holds an flock on the companion .lock file
+and runs the publisher thread; the rest only read. If that worker dies the
+kernel drops its lock and another worker takes over within
+SHARED_STORE_LEADER_RETRY_SECONDS.
+
+Layout: a 64-byte header followed by a JSON payload. The header's seq field
+is a seqlock: the publisher makes it odd, rewrites the payload, then makes it
+even again. Readers retry while it is odd or changes under them, and only
+decode the payload when seq moved, so most reads touch just the header.
+
+    0  magic 'VTXS'      4  layout version   8  seq
+    16 dirty counter     24 full-dirty counter
+    32 published at (unix time, rewritten on every refresh)
+    40 payload length
+
+Readers treat a missing, uninitialised or stale store (older than
+SHARED_STORE_MAX_AGE_SECONDS) as absent and fall back to MySQL.
+"""
+import fcntl
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from flask import current_app
+from utils.db import mysql
+from utils.elections import get_active_election_id
+from utils import metrics
+
+MAGIC = b'VTXS'
+LAYOUT_VERSION = 1
+HEADER_SIZE = 64
+SEQ_OFFSET = 8
+DIRTY_OFFSET = 16
+FULL_DIRTY_OFFSET = 24
+PUBLISHED_OFFSET = 32
+LENGTH_OFFSET = 40
+
+_U32 = struct.Struct('<I')
+_U64 = struct.Struct('<Q')
+_F64 = struct.Struct('<d')
+
+READ_ATTEMPTS = 100
+
+config = {}
+_segment = {'pid': None, 'map': None}
+_segment_lock = threading.Lock()
+# Decoded payload of the last seq this process read
+_decoded = {'seq': None, 'data': None}
+_started = {'pid': None}
+
+metrics.describe('votex_shared_store_reads_total', 'Shared store reads by outcome (hit, stale, missing)')
+metrics.describe('votex_shared_store_publishes_total', 'Snapshots written by the publisher worker')
+
+def default_path(db_name):
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, f'votex-store-{db_name}')
+
+def _map():
+    """This process's mapping of the store file, created on first use (and again after a fork)"""
+    pid = os.getpid()
+    if _segment['pid'] == pid:
+        return _segment['map']
+    with _segment_lock:
+        if _segment['pid'] != pid:
+            fd = os.open(config['path'], os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if os.fstat(fd).st_size < config['size']:
+                    os.ftruncate(fd, config['size'])
+                _segment['map'] = mmap.mmap(fd, config['size'])
+            finally:
+                os.close(fd)
+            _segment['pid'] = pid
+    return _segment['map']
+
+def read(allow_stale=False):
+    """Return the latest snapshot dict, or None when the store is disabled, missing or stale.
+    
+    allow_stale=True also returns snapshots older than SHARED_STORE_MAX_AGE_SECONDS,
+    for callers that only need slow-changing data (the open election, which parties exist).
+    """
+    if not config.get('enabled'):
+        return None
+    try:
+        mm = _map()
+    except OSError:
+        metrics.inc('votex_shared_store_reads_total', outcome='missing')
+        return None
+    
+    if mm[:4] != MAGIC or _U32.unpack_from(mm, 4)[0] != LAYOUT_VERSION:
+        metrics.inc('votex_shared_store_reads_total', outcome='missing')
+        return None
+    
+    for _ in range(READ_ATTEMPTS):
+        seq = _U64.unpack_from(mm, SEQ_OFFSET)[0]
+        if seq & 1:
+            time.sleep(0)
+            continue
+        if seq == _decoded['seq']:
+            data = _decoded['data']
+            break
+        length = _U32.unpack_from(mm, LENGTH_OFFSET)[0]
+        payload = mm[HEADER_SIZE:HEADER_SIZE + length]
+        if _U64.unpack_from(mm, SEQ_OFFSET)[0] != seq:
+            continue
+        if seq == 0 or length == 0:
+            metrics.inc('votex_shared_store_reads_total', outcome='missing')
+            return None
+        data = json.loads(payload)
+        _decoded.update(seq=seq, data=data)
+        break
+    else:
+        metrics.inc('votex_shared_store_reads_total', outcome='missing')
+        return None
+    
+    if not allow_stale and time.time() - _F64.unpack_from(mm, PUBLISHED_OFFSET)[0] > config['max_age']:
+        metrics.inc('votex_shared_store_reads_total', outcome='stale')
+        return None
+    
+    metrics.inc('votex_shared_store_reads_total', outcome='hit')
+    return data
+
+def mark_dirty(full=False):
+    """Ask the publisher for an early refresh after a write.
+    
+    full=True means ballots were deleted, so tallies are recounted instead of
+    advanced incrementally. Concurrent increments may collapse into one, which
+    is fine: the publisher only looks for a change.
+    """
+    if not config.get('enabled'):
+        return
+    try:
+        mm = _map()
+    except OSError:
+        return
+    offset = FULL_DIRTY_OFFSET if full else DIRTY_OFFSET
+    _U64.pack_into(mm, offset, _U64.unpack_from(mm, offset)[0] + 1)
+
+def age_seconds():
+    if not config.get('enabled'):
+        return 0
+    try:
+        mm = _map()
+    except OSError:
+        return 0
+    published_at = _F64.unpack_from(mm, PUBLISHED_OFFSET)[0]
+    return round(time.time() - published_at, 3) if published_at else 0
+
+metrics.register_gauge('votex_shared_store_age_seconds', 'Seconds since the shared store was last refreshed',
+                       age_seconds)
+
+class Publisher:
+    """Builds snapshots from MySQL; runs only in the worker holding the leader lock.
+    
+    Tallies are kept incrementally: ballots with id <= watermark are folded
+    into base counts, and only newer ids are counted on each refresh. The
+    watermark advances to ids seen at least SHARED_STORE_SETTLE_SECONDS ago,
+    so a ballot whose transaction commits a little after a higher id is still
+    counted. Deletes, election changes and SHARED_STORE_FULL_REFRESH_SECONDS
+    trigger a full recount.
+    """
+    
+    def __init__(self, mm):
+        self.mm = mm
+        self.election_id = None
+        self.base = {}
+        self.watermark = 0
+        self.observed = []
+        self.last_full = None
+        self.last_stats = 0.0
+        self.user_counts = None
+        self.sections = {}
+        self.versions = {'parties': 0, 'tallies': 0, 'stats': 0}
+        
+        if mm[:4] != MAGIC or _U32.unpack_from(mm, 4)[0] != LAYOUT_VERSION:
+            mm[:HEADER_SIZE] = b'\0' * HEADER_SIZE
+            mm[:4] = MAGIC
+            _U32.pack_into(mm, 4, LAYOUT_VERSION)
+        else:
+            # Carry on from the previous publisher's version stamps
+            previous = read_payload(mm)
+            if previous:
+                self.versions.update(previous.get('versions', {}))
+    
+    def _count_votes(self, cur, low, high=None):
+        query = "SELECT party_id, COUNT(*) as count FROM votes WHERE election_id = %s AND id > %s"
+        params = (self.election_id, low)
+        if high is not None:
+            query += " AND id <= %s"
+            params += (high,)
+        cur.execute(query + " GROUP BY party_id", params)
+        return {row['party_id']: row['count'] for row in cur.fetchall()}
+    
+    def _max_vote_id(self, cur, low):
+        cur.execute("SELECT COALESCE(MAX(id), 0) as max_id FROM votes WHERE election_id = %s AND id > %s",
+                    (self.election_id, low))
+        return cur.fetchone()['max_id']
+    
+    def _tallies(self, cur, full):
+        now = time.monotonic()
+        election_id = get_active_election_id(cur)
+        
+        if election_id is None:
+            self.election_id, self.base, self.watermark, self.observed = None, {}, 0, []
+            return {}
+        
+        if (full or election_id != self.election_id or self.last_full is None
+                or now - self.last_full >= config['full_refresh']):
+            self.election_id = election_id
+            self.watermark = self._max_vote_id(cur, 0)
+            self.base = self._count_votes(cur, 0, self.watermark)
+            self.observed = []
+            self.last_full = now
+        
+        fresh = self._count_votes(cur, self.watermark)
+        tallies = dict(self.base)
+        for party_id, count in fresh.items():
+            tallies[party_id] = tallies.get(party_id, 0) + count
+        
+        self.observed.append((now, self._max_vote_id(cur, self.watermark)))
+        settled = max((max_id for seen_at, max_id in self.observed if now - seen_at >= config['settle']), default=0)
+        self.observed = [(seen_at, max_id) for seen_at, max_id in self.observed if now - seen_at < config['settle']]
+        if settled > self.watermark:
+            for party_id, count in self._count_votes(cur, self.watermark, settled).items():
+                self.base[party_id] = self.base.get(party_id, 0) + count
+            self.watermark = settled
+        
+        return tallies
+    
+    def _user_counts(self, cur, full):
+        now = time.monotonic()
+        if full or self.user_counts is None or now - self.last_stats >= config['stats_refresh']:
+            cur.execute("""
+                SELECT COUNT(*) as total_users, COALESCE(SUM(role = 'voter'), 0) as total_voters
+                FROM users WHERE deleted_at IS NULL
+            """)
+            row = cur.fetchone()
+            self.user_counts = (int(row['total_voters']), int(row['total_users']))
+            self.last_stats = now
+        return self.user_counts
+    
+    def refresh(self, full=False):
+        cur = mysql.connection.cursor()
+        tallies = self._tallies(cur, full)
+        cur.execute("SELECT id, name, description, logo_url FROM parties WHERE deleted_at IS NULL ORDER BY name")
+        parties = [[row['id'], row['name'], row['description'], row['logo_url']] for row in cur.fetchall()]
+        total_voters, total_users = self._user_counts(cur, full)
+        cur.close()
+        
+        party_tallies = {str(party[0]): tallies.get(party[0], 0) for party in parties}
+        sections = {
+            'parties': parties,
+            'tallies': party_tallies,
+            'stats': {
+                'totalVoters': total_voters,
+                'totalParties': len(parties),
+                'totalVotes': sum(party_tallies.values()),
+                'totalUsers': total_users
+            }
+        }
+        
+        versions = dict(self.versions)
+        changed = False
+        for name, value in sections.items():
+            if self.sections.get(name) != value:
+                versions[name] += 1
+                changed = True
+        changed = changed or self.sections.get('election_id') != self.election_id
+        sections['election_id'] = self.election_id
+        
+        if changed:
+            payload = json.dumps(dict(sections, versions=versions), separators=(',', ':')).encode('utf-8')
+            if not self.publish(payload):
+                # Readers fall back to MySQL; the next refresh tries again
+                self.sections = {}
+                return
+            self.sections, self.versions = sections, versions
+        _F64.pack_into(self.mm, PUBLISHED_OFFSET, time.time())
+    
+    def publish(self, payload):
+        """Write payload under the seqlock; False (and the snapshot withdrawn) when it doesn't fit"""
+        mm = self.mm
+        fits = HEADER_SIZE + len(payload) <= len(mm)
+        if not fits:
+            print(f"Shared store: snapshot of {len(payload)} bytes exceeds SHARED_STORE_SIZE; withdrawn")
+            payload = b''
+        seq = _U64.unpack_from(mm, SEQ_OFFSET)[0]
+        if seq & 1:
+            seq += 1  # A previous publisher died mid-write
+        _U64.pack_into(mm, SEQ_OFFSET, seq + 1)
+        mm[HEADER_SIZE:HEADER_SIZE + len(payload)] = payload
+        _U32.pack_into(mm, LENGTH_OFFSET, len(payload))
+        _U64.pack_into(mm, SEQ_OFFSET, seq + 2)
+        if fits:
+            metrics.inc('votex_shared_store_publishes_total')
+        return fits
+
+def read_payload(mm):
+    """Decode the payload regardless of age (used when a new publisher takes over)"""
+    seq = _U64.unpack_from(mm, SEQ_OFFSET)[0]
+    if seq == 0 or seq & 1:
+        return None
+    length = _U32.unpack_from(mm, LENGTH_OFFSET)[0]
+    try:
+        return json.loads(mm[HEADER_SIZE:HEADER_SIZE + length])
+    except ValueError:
+        return None
+
+def _run(app):
+    """Background thread in every worker: wait for the leader lock, then keep the store fresh"""
+    lock_fd = os.open(config['path'] + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+    publisher = None
+    seen = None
+    last_refresh = 0.0
+    
+    while True:
+        if publisher is None:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                time.sleep(config['leader_retry'])
+                continue
+            publisher = Publisher(_map())
+            seen = None
+        
+        mm = publisher.mm
+        dirty = (_U64.unpack_from(mm, DIRTY_OFFSET)[0], _U64.unpack_from(mm, FULL_DIRTY_OFFSET)[0])
+        now = time.monotonic()
+        due = now - last_refresh >= config['refresh']
+        if due or (dirty != seen and now - last_refresh >= config['min_interval']):
+            full = seen is not None and dirty[1] != seen[1]
+            seen = dirty
+            last_refresh = now
+            try:
+                with app.app_context():
+                    publisher.refresh(full=full)
+            except Exception as e:
+                print(f"Shared store refresh failed: {e}")
+                # Recount from scratch once the database is back
+                publisher.last_full = None
+        
+        time.sleep(config['poll'])
+
+def start():
+    """Start this worker's publisher thread (registered as a background starter, so it runs post-fork)"""
+    if not config.get('enabled') or _started['pid'] == os.getpid():
+        return
+    _started['pid'] = os.getpid()
+    app = current_app._get_current_object()
+    threading.Thread(target=_run, args=(app,), name='shared-store', daemon=True).start()
+
+def init_app(app):
+    from utils import readiness
+    
+    app_config = app.config
+    config.update(
+        enabled=app_config['SHARED_STORE_ENABLED'],
+        path=app_config['SHARED_STORE_PATH'] or default_path(app_config['MYSQL_DB']),
+        size=app_config['SHARED_STORE_SIZE'],
+        refresh=app_config['SHARED_STORE_REFRESH_SECONDS'],
+        min_interval=app_config['SHARED_STORE_MIN_INTERVAL_SECONDS'],
+        full_refresh=app_config['SHARED_STORE_FULL_REFRESH_SECONDS'],
+        stats_refresh=app_config['SHARED_STORE_STATS_REFRESH_SECONDS'],
+        settle=app_config['SHARED_STORE_SETTLE_SECONDS'],
+        max_age=app_config['SHARED_STORE_MAX_AGE_SECONDS'],
+        leader_retry=app_config['SHARED_STORE_LEADER_RETRY_SECONDS'],
+        poll=app_config['SHARED_STORE_POLL_SECONDS']
+    )
+    readiness.register_background(start)
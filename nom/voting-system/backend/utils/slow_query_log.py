@@ -0,0 +1,73 @@
+import logging
+import re
+import threading
+import time
+from collections import deque
+from flask import has_request_context, request
+from utils import metrics
+
+logger = logging.getLogger('votex.slow_query')
+
+# Replaced from Config by init_app; None disables the log
+threshold_seconds = None
+_entries = deque(maxlen=500)
+
+_whitespace = re.compile(r'\s+')
+_string_literal = re.compile(r"'(?:[^'\\]|\\.)*'")
+_number_literal = re.compile(r'\b\d+(?:\.\d+)?\b')
+_in_list = re.compile(r'\bIN\s*\(\s*(?:\?\s*,\s*)*\?\s*\)', re.IGNORECASE)
+
+metrics.describe('votex_slow_queries_total', 'SQL statements slower than the slow query threshold')
+
+def init_app(app):
+    global threshold_seconds, _entries
+    threshold_ms = app.config.get('SLOW_QUERY_THRESHOLD_MS')
+    threshold_seconds = threshold_ms / 1000.0 if threshold_ms is not None else None
+    _entries = deque(maxlen=app.config.get('SLOW_QUERY_LOG_SIZE', 500))
+
+def normalize_sql(query):
+    """Reduce a statement to its shape: literals and placeholders become ?, IN lists collapse"""
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    query = _string_literal.sub('?', query)
+    query = query.replace('%s', '?')
+    query = _number_literal.sub('?', query)
+    query = _in_list.sub('IN (...)', query)
+    return _whitespace.sub(' ', query).strip()
+
+def params_shape(args, many=False):
+    """Describe parameters by type only, so values never reach the log"""
+    if args is None:
+        return None
+    if many:
+        args = list(args)
+        first = params_shape(args[0]) if args else '()'
+        return f'{len(args)} x {first}'
+    if isinstance(args, dict):
+        return '{' + ', '.join(f'{key}: {type(value).__name__}' for key, value in args.items()) + '}'
+    if isinstance(args, (list, tuple)):
+        return '(' + ', '.join(type(value).__name__ for value in args) + ')'
+    return type(args).__name__
+
+def record(query, args, seconds, many=False):
+    """Called by the instrumented cursor with every statement's duration"""
+    if threshold_seconds is None or seconds < threshold_seconds:
+        return
+    
+    endpoint = request.endpoint if has_request_context() else threading.current_thread().name
+    entry = {
+        'sql': normalize_sql(query),
+        'params': params_shape(args, many),
+        'duration_ms': round(seconds * 1000, 3),
+        'endpoint': endpoint,
+        'at': time.time()
+    }
+    _entries.append(entry)
+    metrics.inc('votex_slow_queries_total', route=endpoint or 'none')
+    logger.warning('slow query %.1f ms in %s: %s %s', entry['duration_ms'], endpoint, entry['sql'], entry['params'])
+
+def recent(limit=100):
+    """Most recent slow statements first"""
+    entries = list(_entries)
+    entries.reverse()
+    return entries[:limit]
@@ -0,0 +1,143 @@
+import os
+import time
+from flask import current_app
+from MySQLdb.cursors import SSCursor
+from utils.db import mysql, instrumented_cursor_class
+from utils.file_handler import upload_path_from_url
+from utils.helpers import log_action
+from utils.jobs import job_target
+
+STREAM_BATCH_SIZE = 1000
+# Orphaned paths kept in a job's progress row
+JOB_FILE_SAMPLE = 100
+
+def collect_referenced_paths(connection):
+    """Build the set of upload paths referenced by parties and campaigns in one streaming pass"""
+    referenced = set()
+    
+    # Server-side cursor so the result set is never held in memory as a whole
+    cur = connection.cursor(instrumented_cursor_class(SSCursor))
+    try:
+        cur.execute("""
+            SELECT logo_url FROM parties
+            UNION ALL
+            SELECT image_url FROM campaigns
+        """)
+        while True:
+            rows = cur.fetchmany(STREAM_BATCH_SIZE)
+            if not rows:
+                break
+            for (value,) in rows:
+                path = upload_path_from_url(value)
+                if path:
+                    referenced.add(path)
+    finally:
+        cur.close()
+    
+    return referenced
+
+def iter_upload_files(root):
+    """Yield (relative_path, DirEntry) for every file below the upload folder"""
+    stack = ['']
+    while stack:
+        relative_dir = stack.pop()
+        try:
+            with os.scandir(os.path.join(root, relative_dir)) as entries:
+                for entry in entries:
+                    relative_path = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(relative_path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield relative_path, entry
+        except FileNotFoundError:
+            continue
+
+def collect_orphaned_uploads(connection, dry_run=True, grace_seconds=None, max_deletes_per_second=None, progress=None):
+    """Delete upload files that no party or campaign references any more.
+    
+    Files younger than the grace period are kept because an upload is saved
+    before the campaign that will reference it is created. A job progress
+    handle, if given, receives the running counters.
+    """
+    config = current_app.config
+    if grace_seconds is None:
+        grace_seconds = config['UPLOAD_GC_GRACE_SECONDS']
+    if max_deletes_per_second is None:
+        max_deletes_per_second = config['UPLOAD_GC_MAX_DELETES_PER_SECOND']
+    
+    referenced = collect_referenced_paths(connection)
+    cutoff = time.time() - grace_seconds
+    delete_interval = 1.0 / max_deletes_per_second if max_deletes_per_second else 0
+    
+    stats = {
+        'dry_run': dry_run,
+        'scanned': 0,
+        'referenced': len(referenced),
+        'orphaned': 0,
+        'deleted': 0,
+        'bytes_freed': 0,
+        'skipped_recent': 0,
+        'errors': 0,
+        'files': []
+    }
+    
+    next_delete_at = time.monotonic()
+    for relative_path, entry in iter_upload_files(config['UPLOAD_FOLDER']):
+        stats['scanned'] += 1
+        if progress is not None:
+            progress.update(**{key: value for key, value in stats.items() if key != 'files'})
+        if relative_path in referenced:
+            continue
+        
+        try:
+            info = entry.stat(follow_symlinks=False)
+        except FileNotFoundError:
+            continue
+        
+        if info.st_mtime > cutoff:
+            stats['skipped_recent'] += 1
+            continue
+        
+        stats['orphaned'] += 1
+        if len(stats['files']) < 1000:
+            stats['files'].append(relative_path)
+        
+        if dry_run:
+            stats['bytes_freed'] += info.st_size
+            continue
+        
+        # Rate limit deletions so a large sweep doesn't saturate the disk
+        if delete_interval:
+            now = time.monotonic()
+            if now < next_delete_at:
+                time.sleep(next_delete_at - now)
+            next_delete_at = max(now, next_delete_at) + delete_interval
+        
+        try:
+            os.remove(entry.path)
+            stats['deleted'] += 1
+            stats['bytes_freed'] += info.st_size
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            stats['errors'] += 1
+            print(f"Error deleting orphaned upload {relative_path}: {e}")
+    
+    return stats
+
+@job_target('gc_uploads')
+def gc_uploads_job(progress, dry_run, grace_seconds, max_deletes_per_second, admin_id):
+    """Background job: sweep orphaned uploads and keep the totals as the job's progress"""
+    stats = collect_orphaned_uploads(
+        mysql.connection,
+        dry_run=dry_run,
+        grace_seconds=grace_seconds,
+        max_deletes_per_second=max_deletes_per_second,
+        progress=progress
+    )
+    files = stats.pop('files')
+    progress.update(force=True, files=files[:JOB_FILE_SAMPLE], **stats)
+    
+    if not dry_run:
+        log_action('Orphaned uploads removed', admin_id,
+                   f"{stats['deleted']} files, {stats['bytes_freed']} bytes")
@@ -19,6 +19,21 @@ import {
 
 const API_URL = "http://localhost:5000/api";
 
+// Campaign lists are paged; pass a page's next_cursor to fetch the one after it
+const fetchCampaignPage = async (path, cursor = null) => {
+  const params = new URLSearchParams();
+  if (cursor) params.set("cursor", cursor);
+  const res = await fetch(`${API_URL}${path}?${params}`, {
+    credentials: "include",
+  });
+  const data = await res.json();
+  if (!res.ok) throw new Error(data.error || "Failed to load campaigns");
+  return {
+    campaigns: data.campaigns || [],
+    nextCursor: data.next_cursor || null,
+  };
+};
+
 function App() {
   const [user, setUser] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -38,6 +53,7 @@ function App() {
   // Voter States
   const [parties, setParties] = useState([]);
   const [campaigns, setCampaigns] = useState([]);
+  const [campaignsCursor, setCampaignsCursor] = useState(null);
   const [selectedParty, setSelectedParty] = useState(null);
   const [voteStatus, setVoteStatus] = useState({
     hasVoted: false,
@@ -49,6 +65,7 @@ function App() {
   // Party States
   const [partyProfile, setPartyProfile] = useState(null);
   const [partyCampaigns, setPartyCampaigns] = useState([]);
+  const [partyCampaignsCursor, setPartyCampaignsCursor] = useState(null);
   const [voteCount, setVoteCount] = useState(0);
   const [newParty, setNewParty] = useState({
     name: "",
@@ -70,6 +87,8 @@ function App() {
   const [logs, setLogs] = useState([]);
   // Search State for Admin Users (from previous request)
   const [searchQuery, setSearchQuery] = useState("");
+  // Cursor for the next page of admin users; null once the list is complete
+  const [usersCursor, setUsersCursor] = useState(null);
 
   // Check session on mount
   useEffect(() => {
@@ -165,16 +184,16 @@ function App() {
   // ============ VOTER FUNCTIONS ============
   const loadVoterData = async () => {
     try {
-      const [partiesRes, campaignsRes, statusRes] = await Promise.all([
+      const [partiesRes, campaignPage, statusRes] = await Promise.all([
         fetch(`${API_URL}/voter/parties`, { credentials: "include" }),
-        fetch(`${API_URL}/voter/campaigns`, { credentials: "include" }),
+        fetchCampaignPage("/voter/campaigns"),
         fetch(`${API_URL}/voter/status`, { credentials: "include" }),
       ]);
       const partiesData = await partiesRes.json();
-      const campaignsData = await campaignsRes.json();
       const statusData = await statusRes.json();
       setParties(partiesData.parties || []);
-      setCampaigns(campaignsData.campaigns || []);
+      setCampaigns(campaignPage.campaigns);
+      setCampaignsCursor(campaignPage.nextCursor);
       setVoteStatus(statusData);
     } catch (err) {
       showMessage("Failed to load voter data", true);
@@ -206,6 +225,16 @@ function App() {
     }
   };
 
+  const loadMoreCampaigns = async () => {
+    try {
+      const page = await fetchCampaignPage("/voter/campaigns", campaignsCursor);
+      setCampaigns((current) => [...current, ...page.campaigns]);
+      setCampaignsCursor(page.nextCursor);
+    } catch (err) {
+      showMessage(err.message, true);
+    }
+  };
+
   // NEW: Filtered Campaigns Logic
   const filteredCampaigns = campaigns.filter(
     (campaign) =>
@@ -223,22 +252,35 @@ function App() {
   // ============ PARTY FUNCTIONS ============
   const loadPartyData = async () => {
     try {
-      const [profileRes, campaignsRes, votesRes] = await Promise.all([
+      const [profileRes, campaignPage, votesRes] = await Promise.all([
         fetch(`${API_URL}/party/profile`, { credentials: "include" }),
-        fetch(`${API_URL}/party/campaigns`, { credentials: "include" }),
+        fetchCampaignPage("/party/campaigns"),
         fetch(`${API_URL}/party/votes`, { credentials: "include" }),
       ]);
       const profileData = await profileRes.json();
-      const campaignsData = await campaignsRes.json();
       const votesData = await votesRes.json();
       setPartyProfile(profileData.party);
-      setPartyCampaigns(campaignsData.campaigns || []);
+      setPartyCampaigns(campaignPage.campaigns);
+      setPartyCampaignsCursor(campaignPage.nextCursor);
       setVoteCount(votesData.voteCount || 0);
     } catch (err) {
       console.error("Failed to load party data:", err);
     }
   };
 
+  const loadMorePartyCampaigns = async () => {
+    try {
+      const page = await fetchCampaignPage(
+        "/party/campaigns",
+        partyCampaignsCursor
+      );
+      setPartyCampaigns((current) => [...current, ...page.campaigns]);
+      setPartyCampaignsCursor(page.nextCursor);
+    } catch (err) {
+      showMessage(err.message, true);
+    }
+  };
+
   const handleCreateParty = async (e) => {
     e.preventDefault();
     try {
@@ -356,18 +398,16 @@ function App() {
   // ============ ADMIN FUNCTIONS ============
   const loadAdminData = async () => {
     try {
-      const [statsRes, usersRes, partiesRes, logsRes] = await Promise.all([
+      const [statsRes, partiesRes, logsRes] = await Promise.all([
         fetch(`${API_URL}/admin/stats`, { credentials: "include" }),
-        fetch(`${API_URL}/admin/users`, { credentials: "include" }),
         fetch(`${API_URL}/admin/parties`, { credentials: "include" }),
         fetch(`${API_URL}/admin/logs`, { credentials: "include" }),
+        loadUsers(),
       ]);
       const statsData = await statsRes.json();
-      const usersData = await usersRes.json();
       const partiesData = await partiesRes.json();
       const logsData = await logsRes.json();
       setStats(statsData);
-      setUsers(usersData.users || []);
       setAdminParties(partiesData.parties || []);
       setLogs(logsData.logs || []);
     } catch (err) {
@@ -375,6 +415,31 @@ function App() {
     }
   };
 
+  // Users are paged and searched on the server; a cursor appends the next page
+  const loadUsers = async (cursor = null) => {
+    const params = new URLSearchParams();
+    const query = searchQuery.trim();
+    if (query) params.set("q", query);
+    if (cursor) params.set("cursor", cursor);
+    const res = await fetch(`${API_URL}/admin/users?${params}`, {
+      credentials: "include",
+    });
+    const data = await res.json();
+    if (!res.ok) throw new Error(data.error || "Failed to load users");
+    setUsers((current) =>
+      cursor ? [...current, ...(data.users || [])] : data.users || []
+    );
+    setUsersCursor(data.next_cursor || null);
+  };
+
+  const loadMoreUsers = async () => {
+    try {
+      await loadUsers(usersCursor);
+    } catch (err) {
+      showMessage(err.message, true);
+    }
+  };
+
   const handleDeleteUser = async (userId) => {
     if (!window.confirm("Are you sure you want to delete this user?")) return;
     try {
@@ -416,7 +481,7 @@ function App() {
   const handleResetElection = async () => {
     if (
       !window.confirm(
-        "Are you sure you want to reset the election? This will delete all votes!"
+        "Are you sure you want to reset the election? The current election will be closed and a new one opened."
       )
     )
       return;
@@ -441,14 +506,6 @@ function App() {
     window.open(`${API_URL}/admin/export/${type}`, "_blank");
   };
 
-  // Filtered Users logic (kept from previous request for completeness)
-  const filteredUsers = users.filter(
-    (u) =>
-      u.name.toLowerCase().includes(searchQuery.toLowerCase()) ||
-      u.email.toLowerCase().includes(searchQuery.toLowerCase()) ||
-      u.role.toLowerCase().includes(searchQuery.toLowerCase())
-  );
-
   // Load data when tab changes
   useEffect(() => {
     if (user) {
@@ -459,6 +516,16 @@ function App() {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [activeTab, user]);
 
+  // Search users on the server once typing pauses
+  useEffect(() => {
+    if (!user || activeTab !== "admin-users") return;
+    const timer = setTimeout(() => {
+      loadUsers().catch((err) => showMessage(err.message, true));
+    }, 300);
+    return () => clearTimeout(timer);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [searchQuery, activeTab, user]);
+
   if (loading) {
     return (
       <div style={styles.loading}>
@@ -735,6 +802,11 @@ function App() {
                           <strong>{voteStatus.votedParty.name}</strong>
                         </p>
                       )}
+                      {voteStatus.pending && (
+                        <p>
+                          Your vote was received and will be counted shortly.
+                        </p>
+                      )}
                     </div>
                   ) : (
                     <div style={styles.partiesGrid}>
@@ -845,6 +917,14 @@ function App() {
                       </p>
                     )}
                   </div>
+                  {campaignsCursor && (
+                    <button
+                      onClick={loadMoreCampaigns}
+                      style={styles.loadMoreBtn}
+                    >
+                      Load more campaigns
+                    </button>
+                  )}
                 </div>
               )}
 
@@ -939,6 +1019,7 @@ function App() {
                           <h4>Campaigns</h4>
                           <p style={styles.statNumber}>
                             {partyCampaigns.length}
+                            {partyCampaignsCursor ? "+" : ""}
                           </p>
                         </div>
                       </div>
@@ -1061,6 +1142,14 @@ function App() {
                       </div>
                     ))}
                   </div>
+                  {partyCampaignsCursor && (
+                    <button
+                      onClick={loadMorePartyCampaigns}
+                      style={styles.loadMoreBtn}
+                    >
+                      Load more campaigns
+                    </button>
+                  )}
                 </div>
               )}
 
@@ -1127,7 +1216,7 @@ function App() {
                     <Search size={20} color="#6b7280" />
                     <input
                       type="text"
-                      placeholder="Search users by name, email, or role..."
+                      placeholder="Search users by name or email..."
                       value={searchQuery}
                       onChange={(e) => setSearchQuery(e.target.value)}
                       style={styles.searchBarInput}
@@ -1147,8 +1236,7 @@ function App() {
                         </tr>
                       </thead>
                       <tbody>
-                        {/* Use filteredUsers instead of users */}
-                        {filteredUsers.map((u) => (
+                        {users.map((u) => (
                           <tr key={u.id} style={styles.tr}>
                             <td style={styles.td}>{u.id}</td>
                             <td style={styles.td}>{u.name}</td>
@@ -1175,7 +1263,7 @@ function App() {
                         ))}
                       </tbody>
                     </table>
-                    {filteredUsers.length === 0 && (
+                    {users.length === 0 && (
                       <p
                         style={{
                           textAlign: "center",
@@ -1186,6 +1274,14 @@ function App() {
                         No users found matching your search.
                       </p>
                     )}
+                    {usersCursor && (
+                      <button
+                        onClick={loadMoreUsers}
+                        style={styles.loadMoreBtn}
+                      >
+                        Load more users
+                      </button>
+                    )}
                   </div>
                 </div>
               )}
@@ -1715,6 +1811,18 @@ const styles = {
     fontSize: "14px",
     fontWeight: "500",
   },
+  loadMoreBtn: {
+    display: "block",
+    margin: "20px auto",
+    padding: "10px 20px",
+    backgroundColor: "#6366f1",
+    color: "white",
+    border: "none",
+    borderRadius: "8px",
+    cursor: "pointer",
+    fontSize: "14px",
+    fontWeight: "500",
+  },
   tableContainer: {
     overflowX: "auto",
     borderRadius: "12px",